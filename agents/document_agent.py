@@ -1,7 +1,12 @@
-from typing import Any, Dict, List
+import hashlib
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
 from agents.base_agent import BaseAgent
+from core.embedding_pool import EmbeddingPool
 from core.llm_client import LLMClient
 from rag.retriever import RAGRetriever
+from rag.context_builder import ContextBuilder
 from rag.chunker import TextChunker
 from utils.text_cleaner import TextCleaner
 
@@ -11,7 +16,8 @@ class DocumentAgent(BaseAgent):
         llm_client: LLMClient,
         retriever: RAGRetriever,
         chunker: TextChunker,
-        cleaner: TextCleaner
+        cleaner: TextCleaner,
+        context_builder: Optional[ContextBuilder] = None
     ):
         """
         Belge işleme ajanı.
@@ -21,6 +27,7 @@ class DocumentAgent(BaseAgent):
             retriever: RAG retriever
             chunker: Metin parçalayıcı
             cleaner: Metin temizleyici
+            context_builder: Verilirse özetlenecek belge token bütçesine sığdırılır
         """
         super().__init__(
             name="Belge İşleme Uzmanı",
@@ -30,6 +37,7 @@ class DocumentAgent(BaseAgent):
         self.retriever = retriever
         self.chunker = chunker
         self.cleaner = cleaner
+        self.context_builder = context_builder
 
     def _process_document(self, text: str) -> Dict[str, Any]:
         """
@@ -41,21 +49,95 @@ class DocumentAgent(BaseAgent):
         Returns:
             Dict[str, Any]: İşleme sonuçları
         """
+        chunks, metadatas, results = self._prepare_document(text)
+        
+        # Parçaları belge kimliğiyle birlikte vektör veritabanına ekle
+        self.retriever.vector_store.add_texts(chunks, metadatas=metadatas)
+        
+        return results
+
+    def _prepare_document(self, text: str) -> Tuple[List[str], List[Dict[str, Any]], Dict[str, Any]]:
+        """Belgeyi temizler ve parçalar; parçaları, metadata'larını ve özet bilgiyi döndürür."""
         # Metni temizle
         cleaned_text = self.cleaner.clean_text(text)
         
         # Metni parçalara ayır
         chunks = self.chunker.split_text(cleaned_text)
         
-        # Parçaları vektör veritabanına ekle
-        self.retriever.vector_store.add_texts(chunks)
+        doc_id = hashlib.sha256(cleaned_text.encode("utf-8")).hexdigest()[:16]
+        uploaded_at = int(time.time())
+        metadatas = [
+            {"doc_id": doc_id, "chunk": i, "uploaded_at": uploaded_at}
+            for i in range(len(chunks))
+        ]
         
-        return {
+        return chunks, metadatas, {
+            "doc_id": doc_id,
             "chunk_count": len(chunks),
             "total_length": len(cleaned_text),
             "average_chunk_length": len(cleaned_text) / len(chunks) if chunks else 0
         }
 
+    def bulk_ingest(
+        self,
+        documents: List[str],
+        pool: Optional[EmbeddingPool] = None,
+        write_batch_size: int = 4096
+    ) -> List[Dict[str, Any]]:
+        """
+        Çok sayıda belgeyi özetlemeden vektör veritabanına ekler.
+        
+        Tüm belgelerin parçaları tek listede toplanır ve çok süreçli
+        embedding havuzunda kodlanır; havuzdan gelen parçalar biriktirilip
+        write_batch_size satıra ulaştıkça tek yazmada (tek segment) eklenir.
+        
+        Args:
+            documents: İşlenecek belge metinleri
+            pool: Embedding havuzu (None ise işlem süresince depodaki modelin
+                arka ucu, iş parçacığı sayısı ve önbelleğiyle geçici havuz açılır)
+            write_batch_size: Tek yazmada eklenecek en az satır sayısı
+            
+        Returns:
+            List[Dict[str, Any]]: Belge başına işleme sonuçları
+        """
+        texts, metadatas, results = [], [], []
+        for document in documents:
+            chunks, chunk_metadatas, info = self._prepare_document(document)
+            texts.extend(chunks)
+            metadatas.extend(chunk_metadatas)
+            results.append(info)
+        
+        vector_store = self.retriever.vector_store
+        owned = pool is None
+        if owned:
+            model = getattr(vector_store, "embedding_model", None) or getattr(vector_store, "embedder", None)
+            pool = EmbeddingPool.from_model(model)
+        
+        rows: List[int] = []
+        embeddings: List[np.ndarray] = []
+        def flush() -> None:
+            vector_store.add_texts(
+                [texts[i] for i in rows],
+                metadatas=[metadatas[i] for i in rows],
+                embeddings=np.concatenate(embeddings)
+            )
+            rows.clear()
+            embeddings.clear()
+        
+        try:
+            for start, batch in pool.iter_encode(texts):
+                rows.extend(range(start, start + len(batch)))
+                embeddings.append(batch)
+                if len(rows) >= write_batch_size:
+                    flush()
+            if rows:
+                flush()
+        finally:
+            if owned:
+                pool.close()
+        
+        return results
+
     def _summarize_document(self, text: str) -> str:
         """
         Belgeyi özetler.
@@ -66,6 +148,10 @@ class DocumentAgent(BaseAgent):
         Returns:
             str: Belge özeti
         """
+        if self.context_builder is not None:
+            # Bütçeyi aşan belgeden en bilgi yoğun cümleler gönderilir
+            text = self.context_builder.compress(text)
+        
         prompt = f"""Aşağıdaki metni ana noktaları, önemli detayları ve tüm kritik bilgileri içerecek şekilde ayrıntılı olarak özetle. Yanıtını sadece Türkçe ver. Gerekiyorsa çok uzun ve kapsamlı bir özet oluştur.
 
 Metin:
@@ -3,13 +3,15 @@ from agents.base_agent import BaseAgent
 from agents.financial_agent import FinancialAgent
 from agents.document_agent import DocumentAgent
 from core.llm_client import LLMClient
+from rag.context_builder import ContextBuilder
 
 class PlannerAgent(BaseAgent):
     def __init__(
         self,
         llm_client: LLMClient,
         financial_agent: FinancialAgent,
-        document_agent: DocumentAgent
+        document_agent: DocumentAgent,
+        context_builder: Optional[ContextBuilder] = None
     ):
         """
         Planlayıcı ajan.
@@ -18,6 +20,7 @@ class PlannerAgent(BaseAgent):
             llm_client: LLM istemcisi
             financial_agent: Finansal analiz ajanı
             document_agent: Belge işleme ajanı
+            context_builder: Verilirse dosya içeriği token bütçesine sığdırılır
         """
         super().__init__(
             name="Görev Planlayıcı",
@@ -26,6 +29,7 @@ class PlannerAgent(BaseAgent):
         )
         self.financial_agent = financial_agent
         self.document_agent = document_agent
+        self.context_builder = context_builder
 
     def _determine_task_type(self, input_data: Any) -> str:
         """
@@ -91,7 +95,13 @@ Lütfen görevi analiz et ve uygun ajanı seç."""
             prompt = input_data["prompt"]
             file_content = input_data["file_content"]
             # Dosya bir DataFrame ise stringe çevir
-            if hasattr(file_content, 'to_string'):
+            if self.context_builder is not None:
+                # Talimatla ilgili satırlar/cümleler önce olmak üzere bütçe kadar içerik gönderilir
+                if hasattr(file_content, 'to_string'):
+                    file_content_str = self.context_builder.fit_table(file_content, prompt)
+                else:
+                    file_content_str = self.context_builder.compress(str(file_content), prompt)
+            elif hasattr(file_content, 'to_string'):
                 file_content_str = file_content.to_string(index=False)
             else:
                 file_content_str = str(file_content)
@@ -10,7 +10,12 @@ from agents.document_agent import DocumentAgent
 from core.llm_client import LLMClient
 from rag.retriever import RAGRetriever
 from rag.vector_store import PineconeVectorStore
-from core.embeddings import EmbeddingModel
+from rag.retrieval_cache import RetrievalCache
+from rag.context_builder import ContextBuilder
+from core.model_registry import registry
+from core.embedding_cache import EmbeddingCache
+from core.embedding_batcher import EmbeddingBatcher
+from core.session_pool import SessionPool
 from utils.prompt_templates import PromptManager
 from utils.text_cleaner import TextCleaner
 from rag.chunker import TextChunker
@@ -26,15 +31,76 @@ app.secret_key = os.environ.get("SECRET_KEY", "finanlyst-secret")
 
 # --- Agent ve bağımlılıkları başlat ---
 llm_client = LLMClient()
-embedding_model = EmbeddingModel()
-# Her oturum için ayrı index ismi oluşturulacak
-retriever = None
+# Tekrarlanan metinlerin embedding'leri diskteki önbellekten okunur
+embedding_cache = EmbeddingCache(
+    os.environ.get("EMBEDDING_CACHE_PATH", "data/embedding_cache.sqlite"),
+    max_entries=int(os.environ.get("EMBEDDING_CACHE_SIZE", "100000"))
+)
+# Model süreç genelinde bir kez yüklenir (gunicorn --preload ile işçilerde paylaşılır);
+# istek iş parçacıklarının encode çağrıları tek partide birleştirilir
+embedding_model = EmbeddingBatcher(registry.get(
+    os.environ.get("EMBEDDING_MODEL"),
+    backend=os.environ.get("EMBEDDING_BACKEND", "torch"),
+    intra_op_threads=int(os.environ.get("EMBEDDING_THREADS", "0")) or None,
+    cache=embedding_cache
+))
+registry.freeze()
 chunker = TextChunker()
 cleaner = TextCleaner()
 prompt_manager = PromptManager()
+# LLM'e giden bağlam ve dosya içerikleri modelin tokenizer'ıyla sayılan bütçeye sığdırılır
+retrieval_context = ContextBuilder(
+    int(os.environ.get("CONTEXT_TOKEN_BUDGET", "1500")),
+    tokenizer_name=llm_client.model_name
+)
+document_context = ContextBuilder(
+    int(os.environ.get("DOCUMENT_TOKEN_BUDGET", "3000")),
+    tokenizer_name=llm_client.model_name
+)
 financial_agent = FinancialAgent(llm_client)
-document_agent = None
-planner_agent = None
+
+
+def build_session(session_id):
+    """Oturumun vektör deposunu, retriever'ını ve ajanlarını kurar."""
+    vector_store = PineconeVectorStore(
+        session_id=session_id,
+        index_name="finanlyst-index",
+        embedding_model=embedding_model
+    )
+    # Namespace'lerden önce varsayılan namespace'e yazılmış oturum vektörleri bir kez taşınır
+    if os.environ.get("MIGRATE_LEGACY_VECTORS") == "1":
+        vector_store.migrate_legacy_vectors()
+    # Oturumdaki tekrar soruların arama sonuçları depo değişene kadar önbellekten döner
+    retriever = RAGRetriever(
+        vector_store,
+        llm_client,
+        cache=RetrievalCache(int(os.environ.get("RETRIEVAL_CACHE_SIZE", "256"))),
+        context_builder=retrieval_context
+    )
+    document_agent = DocumentAgent(llm_client, retriever, chunker, cleaner, document_context)
+    return {
+        "vector_store": vector_store,
+        "retriever": retriever,
+        "document_agent": document_agent,
+        "planner_agent": PlannerAgent(llm_client, financial_agent, document_agent, document_context),
+    }
+
+
+# Oturum nesneleri istekler arasında paylaşılır; boşta kalan oturumlar TTL/LRU ile çıkarılır
+session_pool = SessionPool(
+    build_session,
+    max_sessions=int(os.environ.get("SESSION_POOL_SIZE", "256")),
+    ttl=float(os.environ.get("SESSION_TTL", "1800"))
+)
+
+
+def get_session_objects():
+    """İsteğin oturum kimliğini (gerekirse oluşturarak) ve oturum nesnelerini döndürür."""
+    session_id = session.get("session_id")
+    if not session_id:
+        session_id = str(uuid.uuid4())
+        session["session_id"] = session_id
+    return session_id, session_pool.get(session_id)
 
 HTML_TEMPLATE = """
 <!DOCTYPE html>
@@ -138,24 +204,19 @@ def format_result(result):
 
 @app.route("/", methods=["GET", "POST"])
 def index():
-    global retriever, document_agent, planner_agent
     result = None
     formatted_result = None
     loading = False
-    # Oturuma özel index ve agent başlat
-    index_name = "finanlyst-index"
-    session_id = session.get("session_id")
-    if not session_id:
-        session_id = str(uuid.uuid4())
-        session["session_id"] = session_id
-    vector_store = PineconeVectorStore(session_id=session_id, index_name=index_name)
-    retriever = RAGRetriever(vector_store, llm_client)
-    document_agent = DocumentAgent(llm_client, retriever, chunker, cleaner)
-    planner_agent = PlannerAgent(llm_client, financial_agent, document_agent)
+    # Oturuma özel index ve agent'lar havuzdan alınır
+    session_id, objects = get_session_objects()
+    planner_agent = objects["planner_agent"]
 
     if request.method == "POST":
         # Yeni sohbet başlat
         if request.form.get("reset_btn"):
+            # Oturumun vektörleri kendi namespace'iyle birlikte silinir
+            objects["vector_store"].drop_session()
+            session_pool.remove(session_id)
             session.clear()
             flash("Yeni bir sohbet başlatıldı. Önce doküman veya veri yükleyin.")
             return redirect(url_for("index"))
@@ -206,17 +267,9 @@ def index():
 
 @app.route("/api/chat", methods=["POST"])
 def api_chat():
-    global retriever, document_agent, planner_agent
-    session_id = session.get("session_id")
-    if not session_id:
-        session_id = str(uuid.uuid4())
-        session["session_id"] = session_id
-    # Oturuma özel agent başlat (gerekirse)
-    index_name = "finanlyst-index"
-    vector_store = PineconeVectorStore(session_id=session_id, index_name=index_name)
-    retriever = RAGRetriever(vector_store, llm_client)
-    document_agent = DocumentAgent(llm_client, retriever, chunker, cleaner)
-    planner_agent = PlannerAgent(llm_client, financial_agent, document_agent)
+    # Oturuma özel agent'lar havuzdan alınır (ilk istekte kurulur)
+    _, objects = get_session_objects()
+    planner_agent = objects["planner_agent"]
 
     text = request.form.get("message", "").strip()
     file = request.files.get("file")
@@ -255,5 +308,10 @@ def api_chat():
     except Exception as e:
         return jsonify({"reply": f"Hata: {str(e)}"})
 
+@app.route("/api/session-stats", methods=["GET"])
+def api_session_stats():
+    _, objects = get_session_objects()
+    return jsonify({**session_pool.stats(), "retrieval_cache": objects["retriever"].cache.stats()})
+
 if __name__ == "__main__":
     app.run(debug=True, port=5000)
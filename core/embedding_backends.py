@@ -0,0 +1,134 @@
+import os
+import time
+from typing import Any, Dict, List, Optional
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+# Dinamik int8 kuantizasyon profili ("arm64", "avx2", "avx512", "avx512_vnni")
+INT8_PROFILE = "avx2"
+
+
+def load_sentence_transformer(
+    model_name: str,
+    backend: str = "torch",
+    intra_op_threads: Optional[int] = None,
+    onnx_dir: str = "data/onnx_models",
+    int8_profile: str = INT8_PROFILE
+) -> SentenceTransformer:
+    """
+    Modeli istenen arka uçla yükler.
+
+    "onnx" modeli ilk yüklemede ONNX'e aktarır ve onnxruntime ile çalıştırır;
+    "onnx-int8" ayrıca ağırlıkları dinamik int8 kuantizasyonla küçültür ve
+    sonucu onnx_dir altında saklar (sonraki açılışlar diskten okur).
+
+    Args:
+        model_name: Model adı veya yerel yolu
+        backend: "torch", "onnx" veya "onnx-int8"
+        intra_op_threads: onnxruntime operatör içi iş parçacığı sayısı
+        onnx_dir: Kuantize modellerin saklanacağı dizin
+        int8_profile: int8 kuantizasyonun hedef CPU profili
+
+    Returns:
+        SentenceTransformer: Yüklenmiş model
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Geçersiz embedding arka ucu: {backend}")
+    if backend == "torch":
+        return SentenceTransformer(model_name)
+
+    try:
+        import onnxruntime as ort
+    except ImportError:
+        raise ImportError(
+            "ONNX arka ucu için onnxruntime ve optimum gerekli: "
+            "pip install -r requirements-onnx.txt"
+        )
+
+    def model_kwargs(**extra: Any) -> Dict[str, Any]:
+        options = ort.SessionOptions()
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        return {"provider": "CPUExecutionProvider", "session_options": options, **extra}
+
+    if backend == "onnx":
+        return SentenceTransformer(model_name, backend="onnx", model_kwargs=model_kwargs())
+
+    # Kuantize model bir kez üretilir ve yerel dizinden yüklenir
+    from sentence_transformers import export_dynamic_quantized_onnx_model
+
+    local_path = os.path.join(onnx_dir, model_name.replace("/", "__"))
+    file_name = f"onnx/model_qint8_{int8_profile}.onnx"
+    if not os.path.exists(os.path.join(local_path, file_name)):
+        exported = SentenceTransformer(model_name, backend="onnx", model_kwargs=model_kwargs())
+        exported.save(local_path)
+        export_dynamic_quantized_onnx_model(exported, int8_profile, local_path)
+
+    return SentenceTransformer(
+        local_path,
+        backend="onnx",
+        model_kwargs=model_kwargs(file_name=file_name)
+    )
+
+
+def parity_check(
+    reference: Any,
+    candidate: Any,
+    texts: List[str],
+    min_cosine: float = 0.99,
+    k: int = 5
+) -> Dict[str, float]:
+    """
+    Aday arka ucun embedding'lerini referans (torch) embedding'leriyle karşılaştırır.
+
+    Kosinüs benzerliğinin yanında metinler arası en yakın k komşu
+    kümelerinin örtüşmesi (erişim kalitesi) ve saniyedeki metin sayısı
+    (hız) ölçülür.
+
+    Args:
+        reference: Referans model (encode metodu olan nesne)
+        candidate: Karşılaştırılacak model
+        texts: Örnek metinler
+        min_cosine: Geçmek için gereken en düşük kosinüs benzerliği
+        k: Komşu örtüşmesi için komşu sayısı
+
+    Returns:
+        Dict[str, float]: min/ortalama kosinüs, top-k örtüşmesi, hızlar ve "passed"
+    """
+    timings = []
+    embeddings = []
+    for model in (reference, candidate):
+        start = time.perf_counter()
+        vectors = np.asarray(model.encode(texts), dtype=np.float32)
+        timings.append(time.perf_counter() - start)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        embeddings.append(vectors / np.maximum(norms, 1e-12))
+
+    cosine = (embeddings[0] * embeddings[1]).sum(axis=1)
+
+    # Her metnin diğer metinler arasındaki en yakın k komşusu iki uzayda ne kadar örtüşüyor
+    k = min(k, len(texts) - 1)
+    overlap = 1.0
+    if k > 0:
+        neighbours = []
+        for vectors in embeddings:
+            similarity = vectors @ vectors.T
+            np.fill_diagonal(similarity, -np.inf)
+            neighbours.append(np.argsort(-similarity, axis=1)[:, :k])
+        overlap = float(np.mean([
+            len(set(a) & set(b)) / k for a, b in zip(*neighbours)
+        ]))
+
+    reference_speed = len(texts) / max(timings[0], 1e-9)
+    candidate_speed = len(texts) / max(timings[1], 1e-9)
+    return {
+        "min_cosine": float(cosine.min()),
+        "mean_cosine": float(cosine.mean()),
+        "topk_overlap": overlap,
+        "reference_texts_per_s": reference_speed,
+        "candidate_texts_per_s": candidate_speed,
+        "speedup": candidate_speed / reference_speed,
+        "passed": float(cosine.min() >= min_cosine),
+    }
@@ -0,0 +1,238 @@
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Deque, List, Optional, Tuple, Union
+import numpy as np
+from core.embeddings import EmbeddingModel
+
+# Kapatma isteğini işçi iş parçacığına bildiren işaret
+_STOP = object()
+
+
+class _Request:
+    def __init__(self, texts: List[str], future: Future):
+        """
+        Kuyruktaki tek encode isteği.
+
+        max_batch_size'dan büyük istekler dilim dilim kodlanır; kodlanan
+        dilimler sırayla biriktirilir ve son dilimde birleştirilip Future'a yazılır.
+
+        Args:
+            texts: İsteğin metinleri
+            future: Sonucun yazılacağı Future
+        """
+        self.texts = texts
+        self.future = future
+        self.offset = 0
+        self.parts: List[np.ndarray] = []
+
+    @property
+    def remaining(self) -> int:
+        return len(self.texts) - self.offset
+
+
+class EmbeddingBatcher:
+    def __init__(
+        self,
+        model: EmbeddingModel,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0
+    ):
+        """
+        Eşzamanlı encode çağrılarını tek model çağrısında birleştiren zamanlayıcı.
+
+        İstek iş parçacıkları metinlerini kuyruğa bırakıp bir Future bekler;
+        tek işçi iş parçacığı ilk isteği aldıktan sonra max_wait_ms boyunca
+        (veya max_batch_size metne ulaşana kadar) gelen istekleri toplar, tek
+        bir dolgulu parti olarak kodlar ve sonuçları isteklere dağıtır.
+        max_batch_size'dan büyük istekler (toplu belge yüklemesi) dilimlere
+        bölünür: her partide önce kuyruktaki istekler alınır, kalan yer büyük
+        isteğin sıradaki dilimiyle doldurulur; böylece kısa sorgular büyük
+        bir isteğin bitmesini beklemez. EmbeddingModel ile aynı arayüzü sunar.
+
+        Args:
+            model: Asıl embedding modeli
+            max_batch_size: Bir partide kodlanacak en fazla metin sayısı
+            max_wait_ms: İlk istekten sonra diğer istekler için bekleme süresi
+        """
+        self.model = model
+        self.model_name = getattr(model, "model_name", None)
+        self.dimension = model.get_dimension()
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        # İstatistikler: model çağrısı ve kodlanan metin sayısı
+        self.batches = 0
+        self.encoded = 0
+
+        self._closed = False
+        # Fork sonrası yeniden başlatmayı tek iş parçacığına bırakır
+        self._restart_lock = threading.Lock()
+        self._start_worker()
+
+    def submit(self, texts: Union[str, List[str]]) -> Future:
+        """
+        Metinleri bir sonraki partiye ekler.
+
+        Args:
+            texts: Tek bir metin veya metin listesi
+
+        Returns:
+            Future: Sonucu np.ndarray embedding matrisi olan Future
+        """
+        if isinstance(texts, str):
+            texts = [texts]
+        future: Future = Future()
+        if not texts:
+            future.set_result(self.model.encode([]))
+            return future
+        if self._closed:
+            raise RuntimeError("EmbeddingBatcher kapatıldı")
+        if self._pid != os.getpid():
+            # Fork sonrası işçi iş parçacığı çocuk sürece geçmez; aynı anda gelen
+            # istekler kilit altında tek yeni kuyruk ve işçi görür
+            with self._restart_lock:
+                if self._pid != os.getpid():
+                    self._start_worker()
+        self._queue.put(_Request(list(texts), future))
+        return future
+
+    def encode(self, texts: Union[str, List[str]]) -> np.ndarray:
+        """
+        Metinleri vektörlere dönüştürür (sonuç hazır olana kadar bekler).
+
+        Args:
+            texts: Tek bir metin veya metin listesi
+
+        Returns:
+            np.ndarray: Embedding vektörleri
+        """
+        return self.submit(texts).result()
+
+    def get_dimension(self) -> int:
+        """Embedding vektörlerinin boyutunu döndürür."""
+        return self.dimension
+
+    @property
+    def average_batch_size(self) -> float:
+        return self.encoded / self.batches if self.batches else 0.0
+
+    def close(self) -> None:
+        """Bekleyen istekleri işler ve işçi iş parçacığını durdurur."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._worker.join()
+
+    def _start_worker(self) -> None:
+        """Kuyruğu ve işçi iş parçacığını (yeniden) oluşturur."""
+        self._queue: "queue.Queue" = queue.Queue()
+        self._pending: Optional[_Request] = None
+        # Dilim dilim kodlanan büyük istekler
+        self._backlog: Deque[_Request] = deque()
+        self._stopping = False
+        self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._worker.start()
+        # Süreç kimliği en son yazılır: eşleşen kimliği gören istek yeni kuyruğa yazar
+        self._pid = os.getpid()
+
+    def _run(self) -> None:
+        """İşçi döngüsü: istekleri toplar, kodlar ve Future'lara dağıtır."""
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            self._encode_batch(batch)
+
+    def _collect(self) -> Optional[List[Tuple[_Request, int, int]]]:
+        """
+        Kuyruktaki istekleri zaman penceresi ve boyut sınırı içinde toplar;
+        kalan yeri büyük isteklerin sıradaki dilimleriyle doldurur.
+
+        Returns:
+            Optional[List[Tuple[_Request, int, int]]]: (istek, başlangıç, bitiş)
+                dilimleri; kapatıldıysa ve iş kalmadıysa None
+        """
+        batch: List[Tuple[_Request, int, int]] = []
+        size = 0
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size and not self._stopping:
+            item = self._pending
+            self._pending = None
+            if item is None:
+                try:
+                    if not batch and not self._backlog:
+                        # Yapılacak iş yok: ilk isteği süresiz bekle
+                        item = self._queue.get()
+                        deadline = time.monotonic() + self.max_wait
+                    elif self._backlog:
+                        # Büyük istek bekliyor: yalnızca hazır istekleri al
+                        item = self._queue.get_nowait()
+                    else:
+                        item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+            if item is _STOP:
+                self._stopping = True
+                break
+            if len(item.texts) > self.max_batch_size:
+                self._backlog.append(item)
+                continue
+            if size + len(item.texts) > self.max_batch_size:
+                # Sığmayan istek bir sonraki tura kalır
+                self._pending = item
+                break
+            batch.append((item, 0, len(item.texts)))
+            size += len(item.texts)
+
+        # Kalan yer büyük isteğin sıradaki dilimiyle doldurulur; birden fazla
+        # büyük istek varsa sırayla ilerler
+        if self._backlog and size < self.max_batch_size:
+            request = self._backlog[0]
+            stop = request.offset + min(request.remaining, self.max_batch_size - size)
+            batch.append((request, request.offset, stop))
+            request.offset = stop
+            self._backlog.rotate(-1)
+            if not request.remaining:
+                self._backlog.remove(request)
+
+        if not batch and self._stopping:
+            return None
+        return batch
+
+    def _encode_batch(self, batch: List[Tuple[_Request, int, int]]) -> None:
+        """Partiyi tek model çağrısıyla kodlar ve sonuçları dağıtır."""
+        # İptal edilen (veya önceki dilimi hata veren) istekler elenir
+        active = []
+        for request, start, stop in batch:
+            if (start > 0 or request.future.set_running_or_notify_cancel()) and not request.future.done():
+                active.append((request, start, stop))
+            elif request in self._backlog:
+                self._backlog.remove(request)
+        batch = active
+        if not batch:
+            return
+
+        texts = [text for request, start, stop in batch for text in request.texts[start:stop]]
+        try:
+            embeddings = self.model.encode(texts)
+        except Exception as e:
+            for request, _, _ in batch:
+                request.future.set_exception(e)
+                if request in self._backlog:
+                    self._backlog.remove(request)
+            return
+
+        self.batches += 1
+        self.encoded += len(texts)
+        offset = 0
+        for request, start, stop in batch:
+            request.parts.append(embeddings[offset:offset + stop - start])
+            offset += stop - start
+            if stop == len(request.texts):
+                parts = request.parts
+                request.future.set_result(parts[0] if len(parts) == 1 else np.concatenate(parts))
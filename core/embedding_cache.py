@@ -0,0 +1,159 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from typing import Dict, List
+import numpy as np
+
+# SQLite'ın sorgu başına değişken sınırının (999) altında kalan parça boyu
+_QUERY_CHUNK = 500
+
+
+class EmbeddingCache:
+    def __init__(self, path: str = "data/embedding_cache.sqlite", max_entries: int = 100_000):
+        """
+        İçerik adresli, diskte kalıcı embedding önbelleği.
+
+        Anahtar (model adı, sha256(metin)) çiftidir; vektörler float32 bayt
+        olarak tek bir SQLite dosyasında tutulur. Kayıt sayısı max_entries'i
+        aşınca en uzun süredir kullanılmayan kayıtlar (LRU) silinir.
+
+        Args:
+            path: SQLite dosyasının yolu
+            max_entries: Saklanacak en fazla embedding sayısı
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._open()
+
+    def _open(self) -> None:
+        """SQLite bağlantısını açar ve tabloyu hazırlar."""
+        # Bağlantı iş parçacıkları arasında paylaşılır; erişim kilitle sıralanır
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, digest BLOB NOT NULL, vector BLOB NOT NULL, "
+            "last_used INTEGER NOT NULL, UNIQUE (model, digest))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+
+        # LRU sırası için artan sayaç (saat çözünürlüğüne bağlı kalmamak için)
+        self._tick, self._count = self._conn.execute(
+            "SELECT COALESCE(MAX(last_used), 0), COUNT(*) FROM embeddings"
+        ).fetchone()
+
+    def _check_fork(self) -> None:
+        """Fork ile açılan çocuk süreçte kilidi ve bağlantıyı yeniden oluşturur."""
+        if self._pid != os.getpid():
+            self._open()
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    @staticmethod
+    def digest(text: str) -> bytes:
+        """Metnin sha256 özeti."""
+        return hashlib.sha256(text.encode("utf-8")).digest()
+
+    def get_many(self, model_name: str, texts: List[str]) -> Dict[int, np.ndarray]:
+        """
+        Önbellekteki embedding'leri getirir ve kullanım zamanlarını günceller.
+
+        Args:
+            model_name: Embedding modelinin adı
+            texts: Aranan metinler
+
+        Returns:
+            Dict[int, np.ndarray]: Bulunan metinlerin sırası -> vektör
+        """
+        digests = [self.digest(text) for text in texts]
+        unique = list(dict.fromkeys(digests))
+        found: Dict[bytes, bytes] = {}
+
+        self._check_fork()
+        with self._lock:
+            for start in range(0, len(unique), _QUERY_CHUNK):
+                chunk = unique[start:start + _QUERY_CHUNK]
+                rows = self._conn.execute(
+                    "SELECT digest, vector FROM embeddings WHERE model = ? AND digest IN "
+                    f"({','.join('?' * len(chunk))})",
+                    [model_name, *chunk]
+                ).fetchall()
+                found.update(rows)
+
+            if found:
+                self._tick += 1
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND digest = ?",
+                    [(self._tick, model_name, digest) for digest in found]
+                )
+
+            result = {
+                i: np.frombuffer(found[digest], dtype=np.float32)
+                for i, digest in enumerate(digests)
+                if digest in found
+            }
+            self.hits += len(result)
+            self.misses += len(texts) - len(result)
+        return result
+
+    def put_many(self, model_name: str, texts: List[str], vectors: np.ndarray) -> None:
+        """
+        Embedding'leri önbelleğe yazar, gerekirse LRU kayıtlarını siler.
+
+        Args:
+            model_name: Embedding modelinin adı
+            texts: Metinler
+            vectors: Metinlerin embedding'leri (satır sırasıyla)
+        """
+        if not texts:
+            return
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+
+        self._check_fork()
+        with self._lock:
+            self._tick += 1
+            cursor = self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (model, digest, vector, last_used) VALUES (?, ?, ?, ?)",
+                [
+                    (model_name, self.digest(text), vector.tobytes(), self._tick)
+                    for text, vector in zip(texts, vectors)
+                ]
+            )
+            self._count += max(cursor.rowcount, 0)
+
+            if self._count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE rowid IN "
+                    "(SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+                    (self._count - self.max_entries,)
+                )
+                self._count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def clear(self) -> None:
+        """Tüm kayıtları siler."""
+        self._check_fork()
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._count = 0
+
+    def close(self) -> None:
+        """SQLite bağlantısını kapatır."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,230 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import numpy as np
+from core.embeddings import EmbeddingModel
+from core.embedding_cache import EmbeddingCache
+from core.model_registry import DEFAULT_EMBEDDING_MODEL
+
+# İşçi sürecin kendi model kopyası (süreç başına bir kez yüklenir)
+_worker_model: Optional[EmbeddingModel] = None
+
+
+def _init_worker(
+    model_name: str,
+    backend: str,
+    threads: int,
+    batch_token_budget: Optional[int]
+) -> None:
+    """İşçi süreçte iş parçacığı sayısını sabitler ve modeli yükler."""
+    global _worker_model
+    # Süreçler çekirdekleri paylaşır; her biri yalnızca kendi payını kullanır
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["MKL_NUM_THREADS"] = str(threads)
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+    _worker_model = EmbeddingModel(
+        model_name,
+        backend=backend,
+        intra_op_threads=threads,
+        batch_token_budget=batch_token_budget
+    )
+
+
+def _worker_dimension() -> int:
+    return _worker_model.get_dimension()
+
+
+def _encode_into(buffer_name: str, shape: Tuple[int, int], start: int, texts: List[str]) -> int:
+    """Metinleri kodlar ve sonucu ortak bellekteki çıktı matrisine yazar."""
+    buffer = shared_memory.SharedMemory(name=buffer_name)
+    try:
+        output = np.ndarray(shape, dtype=np.float32, buffer=buffer.buf)
+        output[start:start + len(texts)] = _worker_model.encode(texts)
+        del output
+    finally:
+        buffer.close()
+    return len(texts)
+
+
+class EmbeddingPool:
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        backend: str = "torch",
+        num_workers: Optional[int] = None,
+        threads_per_worker: int = 1,
+        shard_size: int = 256,
+        batch_token_budget: Optional[int] = 8192,
+        start_method: str = "spawn",
+        cache: Optional[EmbeddingCache] = None
+    ):
+        """
+        Toplu yükleme için çok süreçli embedding havuzu.
+
+        Metin listesi shard_size'lık parçalara bölünüp işçi süreçlere
+        dağıtılır; her işçinin kendi model kopyası ve sabit iş parçacığı
+        sayısı vardır. İşçiler sonuçları pickle ile geri göndermez, üst
+        sürecin açtığı ortak bellek (shared memory) matrisine doğrudan yazar.
+        Önbellek verilirse üst süreçte okunur ve yazılır; işçilere yalnızca
+        önbellekte olmayan metinler gider.
+
+        Args:
+            model_name: Kullanılacak model adı (None ise EMBEDDING_MODEL)
+            backend: "torch", "onnx" veya "onnx-int8"
+            num_workers: İşçi süreç sayısı (None ise çekirdek sayısı / threads_per_worker)
+            threads_per_worker: İşçi başına iş parçacığı sayısı
+            shard_size: Bir işçiye tek seferde gönderilen metin sayısı
+            batch_token_budget: İşçi modellerinin parti token bütçesi
+            start_method: multiprocessing başlatma yöntemi
+            cache: Kalıcı embedding önbelleği
+        """
+        self.model_name = model_name or DEFAULT_EMBEDDING_MODEL
+        self.cache = cache
+        # EmbeddingModel ile aynı önbellek anahtarı; tek süreçli kodlamayla kayıtlar paylaşılır
+        self.cache_key = self.model_name if backend == "torch" else f"{self.model_name}@{backend}"
+        self.shard_size = shard_size
+        self.num_workers = num_workers or max(1, (os.cpu_count() or 1) // threads_per_worker)
+        # İşçiler üst sürecin kaynak izleyicisini paylaşmalı; aksi halde fork ile açılan
+        # işçiler kendi izleyicilerini başlatır ve kapanışta ortak belleği silmeye çalışır
+        resource_tracker.ensure_running()
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.num_workers,
+            mp_context=multiprocessing.get_context(start_method),
+            initializer=_init_worker,
+            initargs=(self.model_name, backend, threads_per_worker, batch_token_budget)
+        )
+        self.dimension = self._executor.submit(_worker_dimension).result()
+
+    @classmethod
+    def from_model(cls, model: Any, **kwargs: Any) -> "EmbeddingPool":
+        """
+        Verilen modelin adı, arka ucu, iş parçacığı sayısı, parti bütçesi ve
+        önbelleğiyle havuz açar.
+
+        Args:
+            model: EmbeddingModel veya onu saran EmbeddingBatcher
+            **kwargs: Havuz ayarları (modelden gelenleri ezer)
+
+        Returns:
+            EmbeddingPool: Yeni havuz
+        """
+        if isinstance(getattr(model, "model", None), EmbeddingModel):
+            model = model.model
+        settings = {
+            "backend": getattr(model, "backend", "torch"),
+            "threads_per_worker": getattr(model, "intra_op_threads", None) or 1,
+            "batch_token_budget": getattr(model, "batch_token_budget", 8192),
+            "cache": getattr(model, "cache", None),
+        }
+        settings.update(kwargs)
+        return cls(getattr(model, "model_name", None), **settings)
+
+    def get_dimension(self) -> int:
+        """Embedding vektörlerinin boyutunu döndürür."""
+        return self.dimension
+
+    def iter_encode(self, texts: List[str]) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        Metinleri işçilerde kodlar; her parça bittikçe sonucunu verir.
+
+        Parçalar tamamlanma sırasıyla gelir; böylece kodlama sürerken biten
+        parçalar veritabanına yazılabilir. Tamamı önbellekte olan parçalar
+        işçilere gönderilmeden hemen verilir.
+
+        Args:
+            texts: Kodlanacak metinler
+
+        Returns:
+            Iterator[Tuple[int, np.ndarray]]: (ilk metnin sırası, embedding'ler)
+        """
+        if not texts:
+            return
+        cached = self.cache.get_many(self.cache_key, texts) if self.cache is not None else {}
+        misses = [i for i in range(len(texts)) if i not in cached]
+
+        # Parça başına önbellekte olmayan metinler (ortak bellekte art arda yazılır)
+        shards, offset = [], 0
+        for start in range(0, len(texts), self.shard_size):
+            rows = [i for i in range(start, min(start + self.shard_size, len(texts))) if i not in cached]
+            shards.append((start, offset, rows))
+            offset += len(rows)
+        for start, _, rows in shards:
+            if not rows:
+                yield start, self._assemble(start, texts, cached, rows, None)
+        if not misses:
+            return
+
+        shape = (len(misses), self.dimension)
+        buffer = shared_memory.SharedMemory(create=True, size=shape[0] * shape[1] * 4)
+        try:
+            output = np.ndarray(shape, dtype=np.float32, buffer=buffer.buf)
+            futures = {
+                self._executor.submit(
+                    _encode_into, buffer.name, shape, offset, [texts[i] for i in rows]
+                ): (start, offset, rows)
+                for start, offset, rows in shards if rows
+            }
+            try:
+                for future in as_completed(futures):
+                    count = future.result()
+                    start, offset, rows = futures[future]
+                    computed = output[offset:offset + count].copy()
+                    if self.cache is not None:
+                        self.cache.put_many(self.cache_key, [texts[i] for i in rows], computed)
+                    yield start, self._assemble(start, texts, cached, rows, computed)
+            finally:
+                # Yarıda bırakılırsa işçilerin yazması bitmeden bellek bırakılmaz
+                for future in futures:
+                    future.cancel()
+                for future in futures:
+                    if not future.cancelled():
+                        future.exception()
+                del output
+        finally:
+            buffer.close()
+            buffer.unlink()
+
+    def _assemble(
+        self,
+        start: int,
+        texts: List[str],
+        cached: Dict[int, np.ndarray],
+        rows: List[int],
+        computed: Optional[np.ndarray]
+    ) -> np.ndarray:
+        """Parçanın önbellekten gelen ve işçide kodlanan satırlarını birleştirir."""
+        stop = min(start + self.shard_size, len(texts))
+        embeddings = np.empty((stop - start, self.dimension), dtype=np.float32)
+        for i in range(start, stop):
+            if i in cached:
+                embeddings[i - start] = cached[i]
+        if rows:
+            embeddings[np.asarray(rows) - start] = computed
+        return embeddings
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Metinleri işçilerde kodlar ve özgün sırayla döndürür.
+
+        Args:
+            texts: Kodlanacak metinler
+
+        Returns:
+            np.ndarray: Embedding vektörleri
+        """
+        embeddings = np.empty((len(texts), self.dimension), dtype=np.float32)
+        for start, batch in self.iter_encode(texts):
+            embeddings[start:start + len(batch)] = batch
+        return embeddings
+
+    def close(self) -> None:
+        """İşçi süreçleri kapatır."""
+        self._executor.shutdown()
@@ -1,22 +1,47 @@
-from typing import List, Union
+import time
+from typing import Dict, List, Optional, Union
 import numpy as np
-from sentence_transformers import SentenceTransformer
+from core.embedding_cache import EmbeddingCache
+from core.embedding_backends import load_sentence_transformer
 
 class EmbeddingModel:
-    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
+    def __init__(
+        self,
+        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        cache: Optional[EmbeddingCache] = None,
+        backend: str = "torch",
+        intra_op_threads: Optional[int] = None,
+        batch_token_budget: Optional[int] = 8192
+    ):
         """
         Embedding modelini başlatır.
         
         Args:
             model_name: Kullanılacak model adı
+            cache: Kalıcı embedding önbelleği (None ise her metin yeniden hesaplanır)
+            backend: "torch", "onnx" veya "onnx-int8" (CPU için onnxruntime)
+            intra_op_threads: ONNX arka ucunda operatör içi iş parçacığı sayısı
+            batch_token_budget: Bir partideki dolgulu token sayısının üst sınırı
+                (None ise metinler modele tek çağrıda gönderilir)
         """
-        self.model = SentenceTransformer(model_name)
+        self.model_name = model_name
+        self.backend = backend
+        # Kuantize arka ucun vektörleri torch'tan biraz farklıdır; önbellekte ayrı tutulur
+        self.cache_key = model_name if backend == "torch" else f"{model_name}@{backend}"
+        self.cache = cache
+        self.intra_op_threads = intra_op_threads
+        self.model = load_sentence_transformer(model_name, backend, intra_op_threads)
         self.dimension = self.model.get_sentence_embedding_dimension()
+        self.batch_token_budget = batch_token_budget
+        self.max_seq_length = getattr(self.model, "max_seq_length", None) or 512
 
     def encode(self, texts: Union[str, List[str]]) -> np.ndarray:
         """
         Metinleri vektörlere dönüştürür.
         
+        Önbellek varsa yalnızca önbellekte bulunmayan (ve partide tekrar
+        etmeyen) metinler modele gönderilir.
+        
         Args:
             texts: Tek bir metin veya metin listesi
             
@@ -26,15 +51,127 @@ class EmbeddingModel:
         if isinstance(texts, str):
             texts = [texts]
         
+        if self.cache is None or not texts:
+            return self._encode(texts)
+        
+        cached = self.cache.get_many(self.cache_key, texts)
+        misses = list(dict.fromkeys(text for i, text in enumerate(texts) if i not in cached))
+        
+        computed = {}
+        if misses:
+            embeddings = self._encode(misses)
+            self.cache.put_many(self.cache_key, misses, embeddings)
+            computed = dict(zip(misses, embeddings))
+        
+        return np.stack([
+            cached[i] if i in cached else computed[text]
+            for i, text in enumerate(texts)
+        ]).astype(np.float32, copy=False)
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Metinleri modelle vektörlere dönüştürür.
+        
+        Metinler token uzunluğuna göre sıralanıp dolgulu boyutu (parti
+        uzunluğu x en uzun metin) batch_token_budget'ı aşmayan partilere
+        bölünür; kısa metinler büyük, uzun metinler küçük partilerde
+        kodlanır ve sonuç özgün sıraya geri yazılır.
+        """
+        if self.batch_token_budget is None or len(texts) <= 1:
+            return self._encode_batch(texts)
+        
+        embeddings = np.empty((len(texts), self.dimension), dtype=np.float32)
+        for batch in self._plan_batches(self._token_lengths(texts)):
+            embeddings[batch] = self._encode_batch([texts[i] for i in batch])
+        
+        return embeddings
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        """Metinleri tek model çağrısıyla vektörlere dönüştürür."""
         # Metinleri vektörlere dönüştür
         embeddings = self.model.encode(
             texts,
+            batch_size=max(len(texts), 1),
             convert_to_numpy=True,
             normalize_embeddings=True
         )
         
         return embeddings
 
+    def _token_lengths(self, texts: List[str]) -> np.ndarray:
+        """Metinlerin (kesilmiş) token uzunlukları."""
+        tokenizer = getattr(self.model, "tokenizer", None)
+        if tokenizer is None:
+            # Tokenizer'ı olmayan modellerde kelime sayısı yaklaşık ölçü olarak kullanılır
+            lengths = [len(text.split()) + 2 for text in texts]
+        else:
+            input_ids = tokenizer(texts, truncation=True, max_length=self.max_seq_length)["input_ids"]
+            lengths = [len(ids) for ids in input_ids]
+        return np.minimum(np.asarray(lengths, dtype=np.int64), self.max_seq_length)
+
+    def _plan_batches(self, lengths: np.ndarray) -> List[np.ndarray]:
+        """
+        Uzunluğa göre sıralı, token bütçesine sığan partiler oluşturur.
+        
+        Args:
+            lengths: Metinlerin token uzunlukları
+            
+        Returns:
+            List[np.ndarray]: Her parti için özgün metin sıraları
+        """
+        order = np.argsort(lengths, kind="stable")
+        batches = []
+        start = 0
+        for end in range(1, len(order) + 1):
+            # Sıralı olduğundan partinin en uzun metni son elemandır
+            if end < len(order) and (end - start + 1) * lengths[order[end]] <= self.batch_token_budget:
+                continue
+            batches.append(order[start:end])
+            start = end
+        return batches
+
+    def benchmark(self, texts: List[str], batch_size: int = 32) -> Dict[str, float]:
+        """
+        Uzunluğa göre gruplanmış kodlamayı sabit boyutlu partilerle karşılaştırır.
+        
+        Önbellek kullanılmaz; gerçek token sayısı iki yöntemin süresine
+        bölünerek saniyedeki token sayısı hesaplanır. Dolgu oranı, dolgulu
+        token sayısının gerçek token sayısına göre fazlasıdır.
+        
+        Args:
+            texts: Ölçümde kullanılacak metinler (ör. belgelerin parçaları)
+            batch_size: Karşılaştırılan sabit parti boyutu
+            
+        Returns:
+            Dict[str, float]: Token sayısı, iki yöntemin token/s değeri ve dolgu oranları
+        """
+        lengths = self._token_lengths(texts)
+        tokens = int(lengths.sum())
+        
+        # Eski yöntem: sabit boyutlu, belge sırasındaki partiler
+        fixed = [np.arange(i, min(i + batch_size, len(texts))) for i in range(0, len(texts), batch_size)]
+        bucketed = self._plan_batches(lengths)
+        
+        timings = []
+        for batches in (fixed, bucketed):
+            start = time.perf_counter()
+            for batch in batches:
+                self._encode_batch([texts[i] for i in batch])
+            timings.append(time.perf_counter() - start)
+        
+        def padding(batches: List[np.ndarray]) -> float:
+            padded = sum(len(batch) * int(lengths[batch].max()) for batch in batches)
+            return padded / max(tokens, 1) - 1.0
+        
+        return {
+            "tokens": float(tokens),
+            "fixed_tokens_per_s": tokens / max(timings[0], 1e-9),
+            "bucketed_tokens_per_s": tokens / max(timings[1], 1e-9),
+            "fixed_padding_ratio": padding(fixed),
+            "bucketed_padding_ratio": padding(bucketed),
+            "speedup": timings[0] / max(timings[1], 1e-9),
+        }
+
     def get_dimension(self) -> int:
         """
         Embedding vektörlerinin boyutunu döndürür.
@@ -0,0 +1,127 @@
+import gc
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+from core.embeddings import EmbeddingModel
+from core.embedding_cache import EmbeddingCache
+
+DEFAULT_EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+
+
+class EmbeddingRegistry:
+    def __init__(self):
+        """
+        Süreç genelinde paylaşılan embedding modelleri.
+
+        Her (model adı, arka uç) çifti ilk istendiğinde bir kez yüklenir ve
+        VectorStore, PineconeVectorStore ve ajanlar aynı örneği kullanır.
+        Sunucu fork ile işçi süreç açıyorsa modeller fork öncesinde preload
+        ile yüklenebilir; böylece ağırlık sayfaları copy-on-write paylaşılır.
+        """
+        self._models: Dict[Tuple[str, str], EmbeddingModel] = {}
+        self._lock = threading.Lock()
+        self._loading: Dict[Tuple[str, str], threading.Lock] = {}
+
+    def get(
+        self,
+        model_name: Optional[str] = None,
+        backend: str = "torch",
+        intra_op_threads: Optional[int] = None,
+        cache: Optional[EmbeddingCache] = None
+    ) -> EmbeddingModel:
+        """
+        Modeli döndürür; henüz yüklenmediyse yükler.
+
+        Yükleme model başına kilitlenir: aynı modeli isteyen iş parçacıkları
+        tek yüklemeyi bekler, farklı modeller birbirini beklemez. Paylaşılan
+        örneğin önbelleği ve iş parçacığı sayısı ilk yüklemede belirlenir;
+        None verilen ayar yüklü modelinkini kabul eder, farklı bir değer
+        ValueError verir.
+
+        Args:
+            model_name: Model adı (None ise EMBEDDING_MODEL)
+            backend: "torch", "onnx" veya "onnx-int8"
+            intra_op_threads: ONNX arka ucunda operatör içi iş parçacığı sayısı
+            cache: Modele bağlanacak embedding önbelleği
+
+        Returns:
+            EmbeddingModel: Paylaşılan model
+        """
+        key = (model_name or DEFAULT_EMBEDDING_MODEL, backend)
+        model = self._models.get(key)
+        if model is not None:
+            return self._check_config(model, intra_op_threads, cache)
+
+        with self._lock:
+            loading = self._loading.setdefault(key, threading.Lock())
+        with loading:
+            model = self._models.get(key)
+            if model is None:
+                model = EmbeddingModel(
+                    key[0],
+                    cache=cache,
+                    backend=backend,
+                    intra_op_threads=intra_op_threads
+                )
+                self._models[key] = model
+        return self._check_config(model, intra_op_threads, cache)
+
+    def preload(self, model_names: Optional[List[str]] = None, backend: str = "torch") -> None:
+        """
+        Modelleri fork öncesinde yükler ve yüklü nesneleri çöp toplayıcıdan çıkarır.
+
+        gc.freeze sonrası çöp toplayıcı bu nesnelere dokunmaz; işçi süreçlerde
+        referans sayımı dışında sayfa kopyalanmaz.
+
+        Args:
+            model_names: Yüklenecek modeller (None ise EMBEDDING_MODEL)
+            backend: Arka uç
+        """
+        for model_name in model_names or [DEFAULT_EMBEDDING_MODEL]:
+            self.get(model_name, backend)
+        self.freeze()
+
+    def freeze(self) -> None:
+        """Yüklü modelleri çöp toplayıcıdan çıkarır (fork öncesinde çağrılır)."""
+        gc.collect()
+        gc.freeze()
+
+    def _check_config(
+        self,
+        model: EmbeddingModel,
+        intra_op_threads: Optional[int],
+        cache: Optional[EmbeddingCache]
+    ) -> EmbeddingModel:
+        """İstenen ayar yüklü modelinkiyle çelişiyorsa ValueError verir."""
+        if intra_op_threads is not None and intra_op_threads != model.intra_op_threads:
+            raise ValueError(
+                f"{model.model_name} ({model.backend}) {model.intra_op_threads} iş parçacığıyla "
+                f"yüklü; {intra_op_threads} istendi"
+            )
+        if cache is not None and cache is not model.cache:
+            raise ValueError(f"{model.model_name} ({model.backend}) farklı bir embedding önbelleğiyle yüklü")
+        return model
+
+    def loaded(self) -> List[Tuple[str, str]]:
+        """Yüklü (model adı, arka uç) çiftleri."""
+        return list(self._models)
+
+    def clear(self) -> None:
+        """Yüklü modelleri bırakır (testler için)."""
+        with self._lock:
+            self._models.clear()
+            self._loading.clear()
+
+
+# Süreç genelindeki varsayılan kayıt
+registry = EmbeddingRegistry()
+
+
+def get_embedding_model(
+    model_name: Optional[str] = None,
+    backend: str = "torch",
+    intra_op_threads: Optional[int] = None,
+    cache: Optional[EmbeddingCache] = None
+) -> EmbeddingModel:
+    """Varsayılan kayıttan paylaşılan embedding modelini döndürür."""
+    return registry.get(model_name, backend, intra_op_threads, cache)
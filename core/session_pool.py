@@ -0,0 +1,158 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class SessionPool:
+    def __init__(
+        self,
+        factory: Callable[[str], Any],
+        max_sessions: int = 256,
+        ttl: float = 1800.0,
+        on_evict: Optional[Callable[[str, Any], None]] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Oturum başına bir kez kurulan nesneleri (vektör deposu, retriever,
+        ajanlar) istekler arasında paylaşan iş parçacığı güvenli havuz.
+
+        ttl saniyeden uzun süredir kullanılmayan oturumlar ve sayı
+        max_sessions'ı aşınca en uzun süredir kullanılmayan (LRU) oturumlar
+        havuzdan çıkarılır.
+
+        Args:
+            factory: Oturum kimliğinden oturum nesnesini kuran fonksiyon
+            max_sessions: Havuzda tutulacak en fazla oturum sayısı
+            ttl: Boşta kalan oturumun saklanma süresi (saniye)
+            on_evict: Havuzdan çıkarılan oturum için (kimlik, nesne) ile çağrılır
+            clock: Zaman kaynağı (testler için)
+        """
+        self.factory = factory
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self.clock = clock
+
+        # İstatistikler
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # Oturum kimliği -> nesne (sıra LRU sırasıdır) ve son kullanım zamanları
+        self._sessions: "OrderedDict[str, Any]" = OrderedDict()
+        self._last_used: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._building: Dict[str, threading.Lock] = {}
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def get(self, session_id: str) -> Any:
+        """
+        Oturumun nesnesini döndürür; yoksa (veya süresi dolmuşsa) kurar.
+
+        Kurulum oturum başına kilitlenir: aynı oturumun eşzamanlı istekleri
+        tek kurulumu bekler, farklı oturumlar birbirini beklemez.
+
+        Args:
+            session_id: Oturum kimliği
+
+        Returns:
+            Any: Oturum nesnesi
+        """
+        with self._lock:
+            evicted = self._evict_expired()
+            value = self._lookup(session_id)
+            if value is None:
+                building = self._building.setdefault(session_id, threading.Lock())
+        self._notify(evicted)
+        if value is not None:
+            return value
+
+        with building:
+            with self._lock:
+                value = self._lookup(session_id)
+                if value is not None:
+                    return value
+                self.misses += 1
+            value = self.factory(session_id)
+            with self._lock:
+                self._sessions[session_id] = value
+                self._touch(session_id)
+                self._building.pop(session_id, None)
+                evicted = self._evict_overflow()
+        self._notify(evicted)
+        return value
+
+    def remove(self, session_id: str) -> Optional[Any]:
+        """
+        Oturumu havuzdan çıkarır (on_evict çağrılmaz).
+
+        Args:
+            session_id: Oturum kimliği
+
+        Returns:
+            Optional[Any]: Çıkarılan oturum nesnesi
+        """
+        with self._lock:
+            self._last_used.pop(session_id, None)
+            return self._sessions.pop(session_id, None)
+
+    def stats(self) -> Dict[str, float]:
+        """Havuz boyutu, isabet/ıska sayıları ve isabet oranı."""
+        return {
+            "sessions": len(self._sessions),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hit_rate,
+        }
+
+    def _lookup(self, session_id: str) -> Optional[Any]:
+        """Oturum havuzdaysa isabet sayar ve nesnesini döndürür."""
+        if session_id not in self._sessions:
+            return None
+        self.hits += 1
+        return self._touch(session_id)
+
+    def _touch(self, session_id: str) -> Any:
+        """Oturumu LRU sırasının sonuna taşır ve kullanım zamanını günceller."""
+        self._sessions.move_to_end(session_id)
+        self._last_used[session_id] = self.clock()
+        return self._sessions[session_id]
+
+    def _evict_expired(self) -> List[Tuple[str, Any]]:
+        """Süresi dolan oturumları LRU sırasının başından çıkarır."""
+        now = self.clock()
+        expired = []
+        for session_id in self._sessions:
+            if now - self._last_used[session_id] <= self.ttl:
+                break
+            expired.append(session_id)
+        return [(session_id, self._pop(session_id)) for session_id in expired]
+
+    def _evict_overflow(self) -> List[Tuple[str, Any]]:
+        """Havuz boyutu aşıldıysa en uzun süredir kullanılmayan oturumları çıkarır."""
+        evicted = []
+        while len(self._sessions) > self.max_sessions:
+            session_id = next(iter(self._sessions))
+            evicted.append((session_id, self._pop(session_id)))
+        return evicted
+
+    def _pop(self, session_id: str) -> Any:
+        self.evictions += 1
+        self._last_used.pop(session_id, None)
+        return self._sessions.pop(session_id)
+
+    def _notify(self, evicted: List[Tuple[str, Any]]) -> None:
+        """on_evict'i kilit dışında çağırır."""
+        if self.on_evict is None:
+            return
+        for session_id, value in evicted:
+            self.on_evict(session_id, value)
@@ -0,0 +1,203 @@
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Any, List, Optional, Set
+from rag.lexical_index import tokenize
+
+# Cümle sonu noktalamasından sonraki boşluk veya satır sonu; "1.250,50" gibi sayılar bölünmez
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?…])\s+|\n+")
+
+
+def split_sentences(text: str) -> List[str]:
+    """Metni cümlelere ayırır."""
+    return [sentence.strip() for sentence in _SENTENCE_BOUNDARY.split(text) if sentence.strip()]
+
+
+@lru_cache(maxsize=None)
+def load_tokenizer(model_name: str) -> Optional[Any]:
+    """
+    LLM'in tokenizer'ını süreç başına bir kez yükler.
+
+    Model erişime kapalıysa veya çevrimdışıysa None döner ve sayım yaklaşık yapılır.
+    """
+    try:
+        from transformers import AutoTokenizer
+        return AutoTokenizer.from_pretrained(model_name)
+    except Exception:
+        return None
+
+
+class ContextBuilder:
+    def __init__(
+        self,
+        token_budget: int = 1500,
+        tokenizer_name: Optional[str] = None,
+        dedup_threshold: float = 0.8,
+        prefix: str = "İlgili bilgi: "
+    ):
+        """
+        LLM'e gidecek bağlamı token bütçesi içinde kurar.
+
+        Parçalardan yalnızca sorguyla terim paylaşan cümleler alınır (hiç
+        paylaşmayan parçanın tüm cümleleri aday kalır), örtüşen parçalardan
+        gelen aynı veya çok benzer cümleler bir kez yazılır ve bütçe dolunca
+        kalan cümleler atlanır. Token'lar LLM'in tokenizer'ı ile sayılır.
+
+        Args:
+            token_budget: Varsayılan token bütçesi
+            tokenizer_name: Token sayımında kullanılacak LLM tokenizer'ı (None ise
+                ya da yüklenemezse karakter sayısından yaklaşık hesaplanır)
+            dedup_threshold: Terim kümelerinin Jaccard benzerliği bu değere ulaşan
+                cümle tekrar sayılır
+            prefix: Her parçanın bağlamdaki ön eki
+        """
+        self.token_budget = token_budget
+        self.tokenizer = load_tokenizer(tokenizer_name) if tokenizer_name else None
+        self.dedup_threshold = dedup_threshold
+        self.prefix = prefix
+
+    def count_tokens(self, texts: List[str]) -> List[int]:
+        """
+        Metinlerin token sayılarını tek tokenizer çağrısıyla hesaplar.
+
+        Args:
+            texts: Metinler
+
+        Returns:
+            List[int]: Metin başına token sayısı
+        """
+        if not texts:
+            return []
+        if self.tokenizer is None:
+            # Türkçe metinde token başına ortalama 3-4 karakter; bütçe aşılmasın diye kısa tarafta
+            return [math.ceil(len(text) / 3) for text in texts]
+        return [len(ids) for ids in self.tokenizer(texts, add_special_tokens=False)["input_ids"]]
+
+    def build(self, query: str, texts: List[str], budget: Optional[int] = None) -> str:
+        """
+        Sıralı arama sonuçlarından sorguyla ilgili cümleleri bütçe içinde birleştirir.
+
+        Args:
+            query: Kullanıcı sorusu
+            texts: En alakalıdan başlayarak parça metinleri
+            budget: Token bütçesi (None ise token_budget)
+
+        Returns:
+            str: Bağlam metni
+        """
+        budget = budget or self.token_budget
+        query_terms = set(tokenize(query))
+        prefix_tokens = self.count_tokens([self.prefix])[0]
+        seen: List[Set[str]] = []
+        parts = []
+        used = 0
+
+        for text in texts:
+            sentences = split_sentences(text)
+            terms = [set(tokenize(sentence)) for sentence in sentences]
+            relevant = [i for i, sentence_terms in enumerate(terms) if sentence_terms & query_terms]
+            candidates = [
+                i for i in (relevant or range(len(sentences)))
+                if not self._is_duplicate(terms[i], seen)
+            ]
+
+            chosen = []
+            for i, tokens in zip(candidates, self.count_tokens([sentences[i] for i in candidates])):
+                cost = tokens + (0 if chosen else prefix_tokens)
+                if used + cost > budget:
+                    continue
+                chosen.append(i)
+                seen.append(terms[i])
+                used += cost
+            if chosen:
+                parts.append(self.prefix + " ".join(sentences[i] for i in chosen))
+
+        return "\n\n".join(parts)
+
+    def compress(self, text: str, query: Optional[str] = None, budget: Optional[int] = None) -> str:
+        """
+        Bütçeyi aşan belgeden en bilgi yoğun cümleleri özgün sırasıyla seçer.
+
+        Cümleler önce sorgu terimleriyle örtüşmeye, sonra belgede sık geçen
+        terimleri taşımasına göre puanlanır; tekrar eden cümleler atlanır.
+
+        Args:
+            text: Belge metni
+            query: Varsa kullanıcı talimatı
+            budget: Token bütçesi (None ise token_budget)
+
+        Returns:
+            str: Bütçeye sığan metin (sığıyorsa metnin kendisi)
+        """
+        budget = budget or self.token_budget
+        if self.count_tokens([text])[0] <= budget:
+            return text
+
+        sentences = split_sentences(text)
+        terms = [set(tokenize(sentence)) for sentence in sentences]
+        frequencies = Counter(term for sentence_terms in terms for term in sentence_terms)
+        query_terms = set(tokenize(query)) if query else set()
+
+        def score(i: int) -> tuple:
+            centrality = sum(frequencies[term] for term in terms[i]) / math.sqrt(len(terms[i]) + 1)
+            return len(terms[i] & query_terms), centrality
+
+        seen: List[Set[str]] = []
+        chosen = []
+        used = 0
+        counts = self.count_tokens(sentences)
+        for i in sorted(range(len(sentences)), key=score, reverse=True):
+            if used + counts[i] > budget or self._is_duplicate(terms[i], seen):
+                continue
+            chosen.append(i)
+            seen.append(terms[i])
+            used += counts[i]
+        return " ".join(sentences[i] for i in sorted(chosen))
+
+    def fit_table(self, frame: Any, query: Optional[str] = None, budget: Optional[int] = None) -> str:
+        """
+        DataFrame'i bütçeye sığan satırlarla metne çevirir.
+
+        Talimatla terim paylaşan satırlar önce, diğerleri tablo sırasıyla
+        eklenir; satırlar özgün sırada yazılır ve atlanan satır sayısı belirtilir.
+
+        Args:
+            frame: pandas DataFrame
+            query: Varsa kullanıcı talimatı
+            budget: Token bütçesi (None ise token_budget)
+
+        Returns:
+            str: Tablo metni
+        """
+        budget = budget or self.token_budget
+        table = frame.to_string(index=False)
+        if self.count_tokens([table])[0] <= budget:
+            return table
+
+        header, *rows = table.split("\n")
+        query_terms = set(tokenize(query)) if query else set()
+        # Not satırı en fazla bu kadar uzun olur
+        note = f"... ({len(rows)} satır gösterilmedi)"
+        header_tokens, note_tokens, *counts = self.count_tokens([header, note] + rows)
+        used = header_tokens + note_tokens
+        order = sorted(range(len(rows)), key=lambda i: not (set(tokenize(rows[i])) & query_terms))
+
+        chosen = []
+        for i in order:
+            if used + counts[i] > budget:
+                continue
+            chosen.append(i)
+            used += counts[i]
+        omitted = len(rows) - len(chosen)
+        lines = [header] + [rows[i] for i in sorted(chosen)]
+        return "\n".join(lines + [f"... ({omitted} satır gösterilmedi)"])
+
+    def _is_duplicate(self, terms: Set[str], seen: List[Set[str]]) -> bool:
+        """Cümlenin terim kümesi seçilmiş bir cümleninkine yeterince benziyorsa True."""
+        if not terms:
+            return False
+        return any(
+            len(terms & other) / len(terms | other) >= self.dedup_threshold
+            for other in seen
+        )
@@ -0,0 +1,36 @@
+from collections import defaultdict
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[Hashable]],
+    k: int = 60,
+    limit: Optional[int] = None
+) -> List[Tuple[Hashable, float]]:
+    """
+    Birden fazla sıralamayı karşılıklı sıra birleştirme (RRF) ile birleştirir.
+
+    Her öğenin puanı, yer aldığı her sıralamadaki 1 / (k + sıra) toplamıdır;
+    puanlar farklı ölçeklerde olsa da (L2 mesafesi, BM25) yalnızca sıralar
+    kullanıldığından birleştirme ölçekten bağımsızdır.
+
+    Args:
+        rankings: En iyiden kötüye sıralı öğe listeleri
+        k: Üst sıraların ağırlığını yumuşatan sabit
+        limit: Döndürülecek en fazla öğe sayısı
+
+    Returns:
+        List[Tuple[Hashable, float]]: (öğe, RRF puanı), puana göre azalan
+    """
+    scores: Dict[Hashable, float] = defaultdict(float)
+    for ranking in rankings:
+        seen = set()
+        for rank, item in enumerate(ranking, start=1):
+            # Aynı listede tekrarlanan öğe yalnızca ilk sırasıyla sayılır
+            if item in seen:
+                continue
+            seen.add(item)
+            scores[item] += 1.0 / (k + rank)
+
+    fused = sorted(scores.items(), key=lambda pair: -pair[1])
+    return fused[:limit] if limit is not None else fused
@@ -0,0 +1,138 @@
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+
+
+class ChunkIdMap:
+    def __init__(self):
+        """
+        Index satırları ile kalıcı parça kimlikleri arasındaki eşleme ve
+        silinmiş satırlar için mezar taşı (tombstone) maskesi.
+
+        FAISS index'i satır numaralarıyla çalışır; parça kimlikleri
+        sıkıştırmada satırlar yeniden numaralansa da değişmez.
+        """
+        self._ids = np.zeros(16, dtype=np.int64)
+        self._deleted = np.zeros(16, dtype=bool)
+        self._rows = 0
+        self._row_of: Dict[int, int] = {}
+        self.deleted_count = 0
+        self.version = 0
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def __contains__(self, chunk_id: int) -> bool:
+        return int(chunk_id) in self._row_of
+
+    @property
+    def ids(self) -> np.ndarray:
+        """Satır -> parça kimliği dizisi."""
+        return self._ids[:self._rows]
+
+    @property
+    def deleted(self) -> np.ndarray:
+        """Silinmiş satırlar için True olan bool dizi."""
+        return self._deleted[:self._rows]
+
+    @property
+    def deleted_ratio(self) -> float:
+        return self.deleted_count / self._rows if self._rows else 0.0
+
+    def append(self, ids: Iterable[int]) -> List[int]:
+        """
+        Yeni satırların parça kimliklerini ekler.
+
+        Aynı kimliğe sahip canlı bir satır varsa yeni satır onun yerini alır
+        ve eski satır silinmiş sayılır (upsert).
+
+        Args:
+            ids: Eklenen satırların parça kimlikleri (satır sırasıyla)
+
+        Returns:
+            List[int]: Yerine yenisi gelen eski satırlar
+        """
+        ids = np.asarray(list(ids), dtype=np.int64)
+        needed = self._rows + len(ids)
+        if needed > len(self._ids):
+            capacity = max(needed, 2 * len(self._ids))
+            self._ids = np.concatenate([self._ids, np.zeros(capacity - len(self._ids), dtype=np.int64)])
+            self._deleted = np.concatenate([self._deleted, np.zeros(capacity - len(self._deleted), dtype=bool)])
+
+        self._ids[self._rows:needed] = ids
+        superseded = []
+        for offset, chunk_id in enumerate(ids.tolist()):
+            previous = self._row_of.get(chunk_id)
+            if previous is not None:
+                superseded.append(previous)
+            self._row_of[chunk_id] = self._rows + offset
+        self._rows = needed
+        self._mark_deleted(superseded)
+        return superseded
+
+    def row(self, chunk_id: int) -> Optional[int]:
+        """Parça kimliğinin canlı satırını döndürür (yoksa None)."""
+        return self._row_of.get(int(chunk_id))
+
+    def delete(self, ids: Iterable[int]) -> List[int]:
+        """
+        Parçaları O(1) olarak mezar taşıyla işaretler.
+
+        Args:
+            ids: Silinecek parça kimlikleri
+
+        Returns:
+            List[int]: Gerçekten silinen (canlı olan) kimlikler
+        """
+        removed = []
+        rows = []
+        for chunk_id in ids:
+            row = self._row_of.pop(int(chunk_id), None)
+            if row is None:
+                continue
+            rows.append(row)
+            removed.append(int(chunk_id))
+        self._mark_deleted(rows)
+        return removed
+
+    def delete_rows(self, rows: Iterable[int]) -> None:
+        """
+        Satır numarasıyla mezar taşı uygular (diskteki mezar taşı kaydından yüklemede).
+
+        Args:
+            rows: Silinmiş satır numaraları
+        """
+        dead = []
+        for row in rows:
+            row = int(row)
+            if not 0 <= row < self._rows or self._deleted[row]:
+                continue
+            chunk_id = int(self._ids[row])
+            if self._row_of.get(chunk_id) == row:
+                del self._row_of[chunk_id]
+            dead.append(row)
+        self._mark_deleted(dead)
+
+    def _mark_deleted(self, rows: List[int]) -> None:
+        rows = [row for row in rows if not self._deleted[row]]
+        if not rows:
+            return
+        self._deleted[rows] = True
+        self.deleted_count += len(rows)
+        self.version += 1
+
+    def live_mask(self, rows: Optional[int] = None) -> np.ndarray:
+        """
+        Canlı satırlar için True olan maske.
+
+        Args:
+            rows: Maske uzunluğu (eşlemede olmayan satırlar canlı değildir)
+        """
+        rows = self._rows if rows is None else rows
+        mask = np.zeros(rows, dtype=bool)
+        known = min(rows, self._rows)
+        mask[:known] = ~self._deleted[:known]
+        return mask
+
+    def deleted_rows(self) -> np.ndarray:
+        """Silinmiş satır numaraları."""
+        return np.flatnonzero(self.deleted)
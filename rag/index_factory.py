@@ -0,0 +1,187 @@
+import math
+from typing import List, Optional, Tuple
+import numpy as np
+import faiss
+
+INDEX_MODES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+
+# Vektör kodlama biçimleri ve 384 boyut için vektör başına bayt:
+# float32 1536, fp16 768 (2x), sq8 384 (4x), pq 48 (32x)
+STORAGE_MODES = ("float32", "fp16", "sq8", "pq")
+
+# (üst sınır, mod) çiftleri: vektör sayısı sınırın altındaysa o mod seçilir
+AUTO_THRESHOLDS: List[Tuple[float, str]] = [
+    (50_000, "flat"),
+    (1_000_000, "hnsw"),
+    (float("inf"), "ivf_pq"),
+]
+
+# IVF kümeleri ve PQ kod kitapları için gereken asgari eğitim verisi
+MIN_TRAIN_ROWS = 1_000
+MAX_TRAIN_ROWS = 100_000
+HNSW_M = 32
+
+
+def choose_index_mode(
+    n_vectors: int,
+    thresholds: Optional[List[Tuple[float, str]]] = None
+) -> str:
+    """
+    Vektör sayısına göre index modunu seçer.
+
+    Args:
+        n_vectors: Index'teki vektör sayısı
+        thresholds: (üst sınır, mod) çiftleri; None ise AUTO_THRESHOLDS
+
+    Returns:
+        str: Index modu
+    """
+    for limit, mode in thresholds or AUTO_THRESHOLDS:
+        if n_vectors < limit:
+            return mode
+    return "flat"
+
+
+def effective_mode(mode: str, n_vectors: int) -> str:
+    """
+    Eğitim verisi yetersizse IVF modlarını flat'e düşürür.
+
+    Args:
+        mode: İstenen mod
+        n_vectors: Index'teki vektör sayısı
+
+    Returns:
+        str: Gerçekte kurulacak mod
+    """
+    if mode not in INDEX_MODES:
+        raise ValueError(f"Geçersiz index modu: {mode}")
+    if mode.startswith("ivf") and n_vectors < MIN_TRAIN_ROWS:
+        return "flat"
+    return mode
+
+
+def effective_storage(storage: str, mode: str, n_vectors: int) -> str:
+    """
+    Index modu ve eğitim verisine göre uygulanabilir kodlamayı döndürür.
+
+    Args:
+        storage: İstenen kodlama
+        mode: Kurulacak index modu
+        n_vectors: Index'teki vektör sayısı
+
+    Returns:
+        str: Gerçekte kullanılacak kodlama
+    """
+    if storage not in STORAGE_MODES:
+        raise ValueError(f"Geçersiz kodlama: {storage}")
+    if mode == "ivf_pq":
+        return "pq"
+    # Eğitilen kodlamalar için veri yetersizse tam hassasiyette kal
+    if storage in ("sq8", "pq") and n_vectors < MIN_TRAIN_ROWS:
+        return "float32"
+    return storage
+
+
+def _pq_subquantizers(dimension: int) -> int:
+    """Boyutu tam bölen ve alt vektör başına ~8 boyut bırakan PQ m değeri."""
+    m = max(1, dimension // 8)
+    while dimension % m:
+        m -= 1
+    return m
+
+
+def factory_string(
+    mode: str,
+    dimension: int,
+    n_vectors: int,
+    storage: str = "float32"
+) -> str:
+    """
+    Mod ve kodlama için faiss.index_factory tanımını üretir.
+
+    Args:
+        mode: Index modu
+        dimension: Vektör boyutu
+        n_vectors: Eğitimde kullanılacak vektör sayısı
+        storage: Vektör kodlaması
+
+    Returns:
+        str: Factory tanımı (örn. "IVF1024,SQ8")
+    """
+    storage = effective_storage(storage, mode, n_vectors)
+    codec = {
+        "float32": "Flat",
+        "fp16": "SQfp16",
+        "sq8": "SQ8",
+        "pq": f"PQ{_pq_subquantizers(dimension)}"
+    }[storage]
+
+    if mode == "flat":
+        return codec
+    if mode == "hnsw":
+        return f"HNSW{HNSW_M}" if storage == "float32" else f"HNSW{HNSW_M},{codec}"
+
+    # Yaygın sezgisel: nlist ~ 4 * sqrt(N), küme başına en az 39 eğitim noktası
+    nlist = int(4 * math.sqrt(n_vectors))
+    nlist = max(1, min(nlist, n_vectors // 39, 65536))
+    return f"IVF{nlist},{codec}"
+
+
+def build_index(
+    mode: str,
+    dimension: int,
+    vectors: np.ndarray,
+    storage: str = "float32"
+) -> faiss.Index:
+    """
+    İstenen mod ve kodlamada index kurar, gerekiyorsa eğitir ve vektörleri ekler.
+
+    Args:
+        mode: Index modu
+        dimension: Vektör boyutu
+        vectors: Index'e eklenecek vektörler
+        storage: Vektör kodlaması
+
+    Returns:
+        faiss.Index: Kurulmuş index
+    """
+    mode = effective_mode(mode, len(vectors))
+    index = faiss.index_factory(
+        dimension,
+        factory_string(mode, dimension, len(vectors), storage)
+    )
+
+    if not index.is_trained:
+        # Eğitim için eşit aralıklı bir örnek yeterli
+        step = max(1, len(vectors) // MAX_TRAIN_ROWS)
+        index.train(np.ascontiguousarray(vectors[::step], dtype=np.float32))
+
+    if len(vectors):
+        index.add(np.ascontiguousarray(vectors, dtype=np.float32))
+    return index
+
+
+def apply_search_params(
+    index: faiss.Index,
+    nprobe: Optional[int] = None,
+    ef_search: Optional[int] = None
+) -> None:
+    """
+    Index'e uygun arama parametrelerini ayarlar (desteklenmeyenler yok sayılır).
+
+    Args:
+        index: FAISS index'i
+        nprobe: IVF modlarında taranacak küme sayısı
+        ef_search: HNSW arama kuyruğu genişliği
+    """
+    params = faiss.ParameterSpace()
+    if nprobe is not None:
+        try:
+            params.set_index_parameter(index, "nprobe", nprobe)
+        except RuntimeError:
+            pass
+    if ef_search is not None:
+        try:
+            params.set_index_parameter(index, "efSearch", ef_search)
+        except RuntimeError:
+            pass
@@ -0,0 +1,152 @@
+import math
+import re
+import threading
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+# Sayılar (1.250,50 / 102.01) tek parça, diğerleri harf-rakam dizisi olarak alınır
+_TOKEN_PATTERN = re.compile(r"\d+(?:[.,]\d+)*|\w+")
+# Özel isim ve sayılardan sonra kesme işaretiyle gelen ekler (THYAO'nun, 2023'te)
+_SUFFIX_PATTERN = re.compile(r"['’]\w+")
+
+# Her belgede geçen ve sıralamaya katkısı olmayan sık kelimeler
+STOPWORDS = frozenset({
+    "acaba", "ama", "ancak", "bir", "biri", "birkaç", "bu", "da", "daha", "de", "değil",
+    "diye", "en", "gibi", "hem", "her", "için", "ile", "ise", "kadar", "ki", "mi", "mu",
+    "mı", "mü", "nasıl", "ne", "neden", "o", "olan", "olarak", "veya", "ve", "ya", "şu",
+})
+
+
+def turkish_lower(text: str) -> str:
+    """Türkçe büyük/küçük harf kurallarıyla küçük harfe çevirir (I -> ı, İ -> i)."""
+    return text.replace("I", "ı").replace("İ", "i").lower()
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Metni BM25 için terimlere ayırır.
+
+    Türkçe küçük harfe çevirir, kesme işaretinden sonraki ekleri atar,
+    sayıları ondalık/binlik ayraçlarıyla tek terim olarak tutar ve sık
+    kelimeleri çıkarır; hisse kodları ve hesap kodları aynen korunur.
+    Noktasız ı, i'ye katlanır: büyük harfle yazılmış kısaltmalar (IFRS,
+    ISCTR) küçük harfli ve ASCII yazımlarıyla aynı terime düşer.
+
+    Args:
+        text: Metin
+
+    Returns:
+        List[str]: Terimler
+    """
+    text = _SUFFIX_PATTERN.sub("", turkish_lower(text)).replace("ı", "i")
+    return [
+        token for token in _TOKEN_PATTERN.findall(text)
+        if token not in STOPWORDS
+    ]
+
+
+class LexicalIndex:
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        """
+        BM25 puanlamalı ters index.
+
+        Her terimin posting listesi satır numarası ve terim frekansı için iki
+        sıkışık tamsayı dizisinde (array) tutulur. Satır numaraları
+        VectorStore satırlarıyla aynıdır; satırlar yalnızca sona eklenir.
+
+        Args:
+            k1: Terim frekansı doygunluk katsayısı
+            b: Belge uzunluğu normalizasyon katsayısı
+        """
+        self.k1 = k1
+        self.b = b
+        self._terms: Dict[str, int] = {}
+        self._postings: List[array] = []
+        self._frequencies: List[array] = []
+        self._lengths = array("i")
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    @property
+    def vocabulary_size(self) -> int:
+        return len(self._terms)
+
+    def add(self, texts: Iterable[str]) -> None:
+        """Metinleri sıradaki satırlar olarak ekler."""
+        self.add_tokens([tokenize(text) for text in texts])
+
+    def add_tokens(self, documents: List[List[str]]) -> None:
+        """
+        Önceden ayrılmış terim listelerini sıradaki satırlar olarak ekler.
+
+        Args:
+            documents: Satır başına terim listesi
+        """
+        with self._lock:
+            for tokens in documents:
+                row = len(self._lengths)
+                self._lengths.append(len(tokens))
+                for term, frequency in Counter(tokens).items():
+                    term_id = self._terms.get(term)
+                    if term_id is None:
+                        term_id = self._terms[term] = len(self._postings)
+                        self._postings.append(array("i"))
+                        self._frequencies.append(array("i"))
+                    self._postings[term_id].append(row)
+                    self._frequencies[term_id].append(frequency)
+
+    def search(
+        self,
+        query: str,
+        k: int,
+        rows: Optional[int] = None,
+        mask: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Sorguya BM25 puanı en yüksek satırları döndürür.
+
+        Args:
+            query: Sorgu metni
+            k: Döndürülecek en fazla satır sayısı
+            rows: Yalnızca ilk `rows` satır aranır (anlık görüntü sınırı)
+            mask: Aranabilir satırlar için True olan maske
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (satırlar, puanlar), puana göre azalan
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            rows = len(self._lengths) if rows is None else min(rows, len(self._lengths))
+            lengths = np.array(self._lengths[:rows], dtype=np.float32)
+            postings = [
+                (np.array(self._postings[term_id]), np.array(self._frequencies[term_id]))
+                for term_id in (self._terms.get(term) for term in terms)
+                if term_id is not None
+            ]
+
+        scores = np.zeros(rows, dtype=np.float32)
+        if not rows or not postings:
+            return np.empty(0, dtype=np.int64), scores[:0]
+
+        average_length = max(float(lengths.mean()), 1.0)
+        norms = self.k1 * (1.0 - self.b + self.b * lengths / average_length)
+        for term_rows, frequencies in postings:
+            # Anlık görüntüden sonra eklenen satırlar dikkate alınmaz
+            visible = term_rows < rows
+            term_rows, frequencies = term_rows[visible], frequencies[visible].astype(np.float32)
+            if not len(term_rows):
+                continue
+            idf = math.log(1.0 + (rows - len(term_rows) + 0.5) / (len(term_rows) + 0.5))
+            scores[term_rows] += idf * frequencies * (self.k1 + 1.0) / (frequencies + norms[term_rows])
+
+        if mask is not None:
+            scores[~mask[:rows]] = 0.0
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        order = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return order, scores[order]
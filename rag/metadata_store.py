@@ -0,0 +1,244 @@
+from typing import Any, Dict, List, Optional
+import numpy as np
+
+FILTER_OPERATORS = ("$eq", "$ne", "$in", "$nin", "$gt", "$gte", "$lt", "$lte")
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float))
+
+
+def _column_kind(values: List[Any]) -> str:
+    """Alanın ilk partisindeki değerlere göre sütun türü; karışık türler metin sütunu olur."""
+    present = [value for value in values if value is not None]
+    numeric = bool(present) and not isinstance(present[0], bool) and all(_is_number(value) for value in present)
+    return "num" if numeric else "str"
+
+
+class _Column:
+    def __init__(self, kind: str, rows: int = 0):
+        """
+        Tek bir metadata alanının sütun düzeninde saklanması.
+
+        Metin alanları sözlük kodlamasıyla (int32 kod, eksik değer -1),
+        sayısal alanlar float64 olarak (eksik değer NaN) tutulur.
+
+        Args:
+            kind: "str" veya "num"
+            rows: Başlangıçta eksik değerle doldurulacak satır sayısı
+        """
+        self.kind = kind
+        self.vocab: Dict[str, int] = {}
+        self.values: List[str] = []
+        self._missing = -1 if kind == "str" else np.nan
+        self._dtype = np.int32 if kind == "str" else np.float64
+        self._data = np.full(max(rows, 16), self._missing, dtype=self._dtype)
+        self._size = rows
+
+    @property
+    def data(self) -> np.ndarray:
+        return self._data[:self._size]
+
+    def append(self, values: List[Any]) -> None:
+        """Değerleri sütunun sonuna ekler (None eksik değerdir)."""
+        needed = self._size + len(values)
+        if needed > len(self._data):
+            grown = np.full(max(needed, 2 * len(self._data)), self._missing, dtype=self._dtype)
+            grown[:self._size] = self.data
+            self._data = grown
+
+        encoded = [self._encode(value) for value in values]
+        self._data[self._size:needed] = encoded
+        self._size = needed
+
+    def decode(self, row: int) -> Any:
+        """Satırdaki değeri orijinal tipine çevirir."""
+        value = self._data[row]
+        if self.kind == "str":
+            return self.values[value] if value >= 0 else None
+        if np.isnan(value):
+            return None
+        return int(value) if float(value).is_integer() else float(value)
+
+    def as_str(self) -> "_Column":
+        """Aynı değerleri taşıyan metin sütunu (sayılar metin olarak saklanır)."""
+        column = _Column("str")
+        column.append([self.decode(row) for row in range(self._size)])
+        return column
+
+    def _encode(self, value: Any) -> Any:
+        if value is None:
+            return self._missing
+        if self.kind == "num":
+            if not _is_number(value):
+                raise ValueError(f"Sayısal metadata alanına metin verilemez: {value!r}")
+            return float(value)
+        value = str(value)
+        if value not in self.vocab:
+            self.vocab[value] = len(self.values)
+            self.values.append(value)
+        return self.vocab[value]
+
+
+class MetadataStore:
+    def __init__(self):
+        """
+        Parça metadata'sını (doc_id, session_id, page, uploaded_at...) sütun
+        düzeninde tutar ve filtreleri satır maskelerine derler.
+        """
+        self._columns: Dict[str, _Column] = {}
+        self._rows = 0
+
+    def __len__(self) -> int:
+        return self._rows
+
+    @property
+    def fields(self) -> List[str]:
+        return list(self._columns)
+
+    def extend(self, metadatas: Optional[List[Optional[Dict[str, Any]]]], rows: int) -> None:
+        """
+        Yeni satırların metadata'sını ekler.
+
+        Args:
+            metadatas: Satır başına metadata sözlükleri (None ise hepsi boş)
+            rows: Eklenen satır sayısı
+        """
+        self.extend_columns(self.to_columns(metadatas, rows), rows)
+
+    def extend_columns(self, columns: Optional[Dict[str, List[Any]]], rows: int) -> None:
+        """
+        Sütun düzenindeki metadata'yı ekler (diskten yüklemede kullanılır).
+
+        Args:
+            columns: Alan adı -> satır değerleri
+            rows: Eklenen satır sayısı
+        """
+        columns = columns or {}
+        for name, values in columns.items():
+            column = self._columns.get(name)
+            if column is None:
+                column = self._columns[name] = _Column(_column_kind(values), self._rows)
+            elif column.kind == "num" and not all(_is_number(v) for v in values if v is not None):
+                # Eski kayıtlarda sayısal alana metin yazılmış olabilir; yükleme hiçbir zaman
+                # hata vermez, sütun metne çevrilip tek atamayla yerine konur
+                column = self._columns[name] = column.as_str()
+            column.append(values)
+
+        # Bu partide olmayan alanları eksik değerle doldur
+        for name, column in self._columns.items():
+            if name not in columns:
+                column.append([None] * rows)
+        self._rows += rows
+
+    def validate(self, columns: Optional[Dict[str, List[Any]]]) -> None:
+        """
+        Yeni partinin metadata'sını mevcut sütun türlerine göre denetler.
+
+        Sayısal bir alana metin verilirse hata verir; yazma yolu bunu diske
+        bir şey yazmadan önce çağırır.
+
+        Args:
+            columns: Alan adı -> satır değerleri
+        """
+        for name, values in (columns or {}).items():
+            column = self._columns.get(name)
+            if column is None or column.kind != "num":
+                continue
+            for value in values:
+                if value is not None and not _is_number(value):
+                    raise ValueError(f"Sayısal metadata alanına metin verilemez: {name}={value!r}")
+
+    def get(self, row: int) -> Dict[str, Any]:
+        """Satırın metadata sözlüğünü döndürür."""
+        result = {}
+        # Yazar yeni alan ekliyor olabilir; sözlüğün kopyası üzerinde dolaş
+        for name, column in list(self._columns.items()):
+            value = column.decode(row)
+            if value is not None:
+                result[name] = value
+        return result
+
+    def mask(self, filter: Dict[str, Any], rows: Optional[int] = None) -> np.ndarray:
+        """
+        Filtreyi satır maskesine derler.
+
+        Filtre Pinecone sözdizimine benzer: {"doc_id": "abc"} veya
+        {"page": {"$gte": 3}, "session_id": {"$in": ["a", "b"]}}; alanlar VE
+        ile birleştirilir.
+
+        Args:
+            filter: Filtre sözlüğü
+            rows: Maske uzunluğu (None ise tüm satırlar)
+
+        Returns:
+            np.ndarray: Filtreye uyan satırlar için True olan bool dizi
+        """
+        rows = self._rows if rows is None else rows
+        # Henüz metadata'sı görünmeyen satırlar filtreye uymaz
+        result = np.zeros(rows, dtype=bool)
+        result[:min(rows, self._rows)] = True
+        for name, condition in filter.items():
+            if not isinstance(condition, dict):
+                condition = {"$eq": condition}
+            column = self._columns.get(name)
+            for op, value in condition.items():
+                if op not in FILTER_OPERATORS:
+                    raise ValueError(f"Desteklenmeyen filtre operatörü: {op}")
+                if column is None:
+                    # Hiç görülmemiş alan: yalnızca olumsuz operatörler eşleşir
+                    result &= op in ("$ne", "$nin")
+                    continue
+                matched = self._compare(column, op, value)[:rows]
+                result[:len(matched)] &= matched
+        return result
+
+    def _compare(self, column: _Column, op: str, value: Any) -> np.ndarray:
+        data = column.data
+        if op in ("$in", "$nin"):
+            matched = np.zeros(len(data), dtype=bool)
+            for item in value:
+                matched |= self._compare(column, "$eq", item)
+            return matched if op == "$in" else ~matched
+
+        if column.kind == "str":
+            if op in ("$eq", "$ne"):
+                code = column.vocab.get(str(value), -2)
+                return data == code if op == "$eq" else data != code
+            raise ValueError(f"{op} yalnızca sayısal alanlarda kullanılabilir")
+
+        value = float(value)
+        return {
+            "$eq": lambda: data == value,
+            "$ne": lambda: data != value,
+            "$gt": lambda: data > value,
+            "$gte": lambda: data >= value,
+            "$lt": lambda: data < value,
+            "$lte": lambda: data <= value,
+        }[op]()
+
+    @staticmethod
+    def to_columns(
+        metadatas: Optional[List[Optional[Dict[str, Any]]]],
+        rows: int
+    ) -> Dict[str, List[Any]]:
+        """
+        Satır sözlüklerini sütun düzenine çevirir.
+
+        Args:
+            metadatas: Satır başına metadata sözlükleri
+            rows: Satır sayısı
+
+        Returns:
+            Dict[str, List[Any]]: Alan adı -> satır değerleri (eksikler None)
+        """
+        if not metadatas:
+            return {}
+        if len(metadatas) != rows:
+            raise ValueError("Metadata ve metin sayısı eşleşmiyor")
+
+        columns: Dict[str, List[Any]] = {}
+        for i, meta in enumerate(metadatas):
+            for name, value in (meta or {}).items():
+                columns.setdefault(name, [None] * rows)[i] = value
+        return columns
@@ -0,0 +1,50 @@
+from typing import List
+import numpy as np
+
+
+def maximal_marginal_relevance(
+    query_vector: np.ndarray,
+    candidate_vectors: np.ndarray,
+    k: int,
+    lambda_mult: float = 0.5
+) -> List[int]:
+    """
+    Sorguya yakın ama birbirine benzemeyen adayları seçer (MMR).
+
+    Her adımda lambda_mult * sorgu benzerliği - (1 - lambda_mult) * seçilenlere
+    en yüksek benzerlik puanı en büyük aday seçilir. Adaylar arası kosinüs
+    benzerlikleri tek matris çarpımıyla bir kez hesaplanır; her adımda
+    yalnızca seçilen adayın satırıyla en yüksek benzerlik güncellenir.
+
+    Args:
+        query_vector: Sorgu vektörü
+        candidate_vectors: (n, d) aday vektörleri
+        k: Seçilecek aday sayısı
+        lambda_mult: 1 ise yalnızca alaka, 0 ise yalnızca çeşitlilik
+
+    Returns:
+        List[int]: Seçilen adayların sıraları, seçilme sırasıyla
+    """
+    candidates = np.asarray(candidate_vectors, dtype=np.float32)
+    k = min(k, len(candidates))
+    if k <= 0:
+        return []
+
+    candidates = candidates / np.maximum(np.linalg.norm(candidates, axis=1, keepdims=True), 1e-12)
+    query = np.asarray(query_vector, dtype=np.float32).ravel()
+    query = query / max(float(np.linalg.norm(query)), 1e-12)
+    relevance = candidates @ query
+    similarity = candidates @ candidates.T
+
+    selected = [int(np.argmax(relevance))]
+    max_similarity = similarity[selected[0]].copy()
+    available = np.ones(len(candidates), dtype=bool)
+    available[selected[0]] = False
+    while len(selected) < k:
+        scores = lambda_mult * relevance - (1.0 - lambda_mult) * max_similarity
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(max_similarity, similarity[best], out=max_similarity)
+    return selected
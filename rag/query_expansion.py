@@ -0,0 +1,179 @@
+import re
+from typing import Dict, List, Sequence, Tuple
+from rag.lexical_index import turkish_lower
+
+# Aynı kavramın raporlarda geçen farklı adları (küçük harfle)
+SYNONYMS: Tuple[Tuple[str, ...], ...] = (
+    ("net kâr", "net dönem kârı", "dönem net kârı"),
+    ("ciro", "hasılat", "net satışlar", "satış gelirleri"),
+    ("favök", "ebitda"),
+    ("brüt kâr", "brüt kâr marjı"),
+    ("faaliyet kârı", "esas faaliyet kârı"),
+    ("borç", "yükümlülük", "finansal borçlar"),
+    ("özkaynak", "öz sermaye"),
+    ("nakit akışı", "nakit akımı"),
+    ("temettü", "kâr payı"),
+    ("zarar", "dönem zararı"),
+)
+
+# Yaygın çekim ekleri, uzundan kısaya (hafif kök bulma için)
+_SUFFIXES = (
+    "larının", "lerinin", "larını", "lerini", "ların", "lerin", "ları", "leri",
+    "ndaki", "ndeki", "daki", "deki", "taki", "teki", "ının", "inin", "unun", "ünün",
+    "dan", "den", "tan", "ten", "nın", "nin", "nun", "nün", "lar", "ler",
+    "da", "de", "ta", "te", "ın", "in", "un", "ün", "ı", "i", "u", "ü",
+)
+_WORD_PATTERN = re.compile(r"\d+(?:[.,]\d+)*|\w+")
+# Türkçe biçimli sayı (1.250.000,50) ve yüzde (%12 / yüzde 12)
+_TURKISH_NUMBER = re.compile(r"\b\d{1,3}(?:\.\d{3})+(?:,\d+)?\b|\b\d+,\d+\b")
+_PERCENT_SIGN = re.compile(r"%\s*(\d+(?:[.,]\d+)?)")
+_PERCENT_WORD = re.compile(r"\byüzde\s+(\d+(?:[.,]\d+)?)")
+_CIRCUMFLEX = str.maketrans("âîû", "aiu")
+
+
+def stem(word: str, min_length: int = 4) -> str:
+    """Kelimenin sonundaki yaygın çekim ekini atar (sözlüksüz, hafif kök bulma)."""
+    if any(char.isdigit() for char in word):
+        return word
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= min_length:
+            return word[:-len(suffix)]
+    return word
+
+
+def normalize_numbers(text: str) -> str:
+    """Türkçe biçimli sayıları düz biçime (1.250,5 -> 1250.5), yüzde işaretini kelimeye çevirir."""
+    text = _TURKISH_NUMBER.sub(lambda match: match.group().replace(".", "").replace(",", "."), text)
+    return _PERCENT_SIGN.sub(r"yüzde \1", text)
+
+
+class QueryExpander:
+    def __init__(
+        self,
+        max_variants: int = 4,
+        synonyms: Sequence[Tuple[str, ...]] = SYNONYMS,
+        use_stemming: bool = True,
+        use_numbers: bool = True
+    ):
+        """
+        Sorgunun yerel kurallarla farklı yazımlarını üretir (model çağrısı yok).
+
+        Eş anlamlı finans terimleri birbirinin yerine yazılır, kelimeler
+        hafif kök bulma ile eklerinden ayrılır, sayı ve yüzde yazımları
+        normalize edilir ve şapkalı harfler (kâr/kar) sadeleştirilir.
+
+        Args:
+            max_variants: Özgün sorgu dahil en fazla sorgu sayısı
+            synonyms: Eş anlamlı terim grupları (küçük harfle)
+            use_stemming: Kök bulma varyantı üretilsin mi
+            use_numbers: Sayı normalizasyonu varyantı üretilsin mi
+        """
+        self.max_variants = max_variants
+        self.use_stemming = use_stemming
+        self.use_numbers = use_numbers
+        # Uzun terimler önce denenir ("net kâr" "kâr"dan önce)
+        self._synonyms: Dict[str, Tuple[str, ...]] = {
+            term: group for group in synonyms for term in group
+        }
+        self._terms = sorted(self._synonyms, key=len, reverse=True)
+
+    def expand(self, question: str) -> List[str]:
+        """
+        Sorgu varyantlarını döndürür.
+
+        Args:
+            question: Kullanıcı sorusu
+
+        Returns:
+            List[str]: Önce özgün sorgu olmak üzere tekrarsız varyantlar
+        """
+        text = " ".join(turkish_lower(question).split())
+        synonyms: List[str] = []
+        for term in self._terms:
+            # Terim ekiyle birlikte yalın eş anlamlısıyla değiştirilir ("borçları" -> "yükümlülük")
+            pattern = re.compile(rf"\b{re.escape(term)}\w*")
+            if pattern.search(text):
+                synonyms = [pattern.sub(other, text) for other in self._synonyms[term] if other != term]
+                break
+
+        # Sınırlı sayıda varyantta her kural en az bir kez temsil edilir
+        variants = [question] + synonyms[:1]
+        if self.use_numbers:
+            variants.append(_PERCENT_WORD.sub(r"%\1", text) if "yüzde" in text else normalize_numbers(text))
+        if self.use_stemming:
+            variants.append(" ".join(stem(word) for word in _WORD_PATTERN.findall(normalize_numbers(text))))
+        variants.extend(synonyms[1:])
+        variants.append(text.translate(_CIRCUMFLEX))
+
+        # Yalnızca büyük/küçük harf, boşluk veya noktalamayla ayrılan varyantlar aynı sorgudur
+        seen = set()
+        result = []
+        for variant in variants:
+            key = " ".join(_WORD_PATTERN.findall(turkish_lower(variant)))
+            if key and key not in seen:
+                seen.add(key)
+                result.append(variant)
+        return result[:self.max_variants] or [question]
+
+    def expand_batch(self, questions: List[str]) -> List[List[str]]:
+        """Her soru için varyantları döndürür."""
+        return [self.expand(question) for question in questions]
+
+
+class LLMQueryExpander:
+    def __init__(self, llm_client, num_variants: int = 3, max_tokens_per_question: int = 96):
+        """
+        Sorgu varyantlarını tüm sorular için tek LLM çağrısıyla üretir.
+
+        Yanıt ayrıştırılamazsa veya çağrı başarısız olursa yalnızca özgün
+        sorgular kullanılır; arama hiçbir zaman LLM hatasıyla durmaz.
+
+        Args:
+            llm_client: LLM istemcisi
+            num_variants: Soru başına istenecek varyant sayısı
+            max_tokens_per_question: Soru başına yanıt token sınırı
+        """
+        self.llm_client = llm_client
+        self.num_variants = num_variants
+        self.max_tokens_per_question = max_tokens_per_question
+
+    def expand(self, question: str) -> List[str]:
+        return self.expand_batch([question])[0]
+
+    def expand_batch(self, questions: List[str]) -> List[List[str]]:
+        """
+        Her soru için özgün sorgu ve LLM'in ürettiği varyantları döndürür.
+
+        Args:
+            questions: Kullanıcı soruları
+
+        Returns:
+            List[List[str]]: Önce özgün sorgu olmak üzere varyantlar
+        """
+        variants = [[question] for question in questions]
+        if not questions:
+            return variants
+
+        numbered = "\n".join(f"{i}: {question}" for i, question in enumerate(questions, start=1))
+        prompt = f"""Aşağıdaki her soru için aynı bilgiyi farklı kelimelerle arayan {self.num_variants} kısa arama sorgusu yaz.
+Her satırı sorunun numarasıyla başlat (ör. "1: ..."). Başka hiçbir şey yazma.
+
+{numbered}"""
+        try:
+            response = self.llm_client.generate(
+                prompt,
+                max_tokens=self.max_tokens_per_question * len(questions)
+            )
+        except Exception:
+            return variants
+
+        for line in response.splitlines():
+            match = re.match(r"\s*(\d+)\s*[:.)-]\s*(.+)", line)
+            if not match:
+                continue
+            i = int(match.group(1)) - 1
+            variant = match.group(2).strip().strip('"')
+            if 0 <= i < len(questions) and variant and variant not in variants[i] \
+                    and len(variants[i]) <= self.num_variants:
+                variants[i].append(variant)
+        return variants
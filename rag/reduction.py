@@ -0,0 +1,183 @@
+import copy
+import os
+from typing import Any, Dict, List, Optional
+import numpy as np
+
+REDUCTION_METHODS = ("pca", "truncate")
+
+
+class DimensionReducer:
+    def __init__(self, dim: int, method: str = "pca", sample_size: int = 20_000):
+        """
+        Embedding'leri index'e yazmadan önce daha düşük boyuta indirger.
+
+        "pca" ilk örnek üzerinde temel bileşenleri öğrenir ve vektörleri en
+        çok varyansı taşıyan dim bileşene izdüşürür. "truncate" Matryoshka
+        eğitimli modeller için ilk dim boyutu tutar (eğitim gerekmez).
+        Her iki yöntemde sonuç yeniden birim uzunluğa getirilir; böylece L2
+        sıralaması kosinüs benzerliğiyle aynı kalır.
+
+        Args:
+            dim: Hedef boyut
+            method: "pca" veya "truncate"
+            sample_size: PCA eğitiminde kullanılacak en fazla vektör sayısı
+        """
+        if method not in REDUCTION_METHODS:
+            raise ValueError(f"Geçersiz boyut indirgeme yöntemi: {method}")
+        self.dim = dim
+        self.method = method
+        self.sample_size = sample_size
+        self.mean: Optional[np.ndarray] = None
+        self.components: Optional[np.ndarray] = None
+        # Tutulan boyutların toplam varyanstaki payı (fit sonrası bilinir)
+        self.explained_variance: Optional[float] = None
+
+    @property
+    def fitted(self) -> bool:
+        return self.method == "truncate" or self.components is not None
+
+    def fit(self, vectors: np.ndarray) -> "DimensionReducer":
+        """
+        PCA izdüşümünü örnek vektörler üzerinde öğrenir.
+
+        "truncate" yönteminde yalnızca ilk dim boyutun varyans payı hesaplanır.
+
+        Args:
+            vectors: Tam boyutlu örnek embedding'ler (en az dim satır)
+
+        Returns:
+            DimensionReducer: Kendisi
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.dim > vectors.shape[1]:
+            raise ValueError(f"Hedef boyut ({self.dim}) embedding boyutundan ({vectors.shape[1]}) büyük")
+        if self.method == "truncate":
+            variance = vectors.var(axis=0)
+            self.explained_variance = float(variance[:self.dim].sum() / max(variance.sum(), 1e-12))
+            return self
+        if len(vectors) < self.dim:
+            raise ValueError(f"PCA için en az {self.dim} örnek vektör gerekli, {len(vectors)} verildi")
+
+        if len(vectors) > self.sample_size:
+            sample = np.random.default_rng(0).choice(len(vectors), self.sample_size, replace=False)
+            vectors = vectors[sample]
+
+        self.mean = vectors.mean(axis=0)
+        _, singular_values, vt = np.linalg.svd(vectors - self.mean, full_matrices=False)
+        self.components = np.ascontiguousarray(vt[:self.dim], dtype=np.float32)
+        variance = singular_values ** 2
+        self.explained_variance = float(variance[:self.dim].sum() / max(variance.sum(), 1e-12))
+        return self
+
+    def transform(self, vectors: np.ndarray) -> np.ndarray:
+        """
+        Vektörleri hedef boyuta indirger ve birim uzunluğa getirir.
+
+        Args:
+            vectors: Tam boyutlu embedding'ler
+
+        Returns:
+            np.ndarray: (n, dim) boyutlu float32 vektörler
+        """
+        if not self.fitted:
+            raise RuntimeError("PCA izdüşümü henüz eğitilmedi")
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.method == "truncate":
+            reduced = vectors[:, :self.dim]
+        else:
+            reduced = (vectors - self.mean) @ self.components.T
+        norms = np.linalg.norm(reduced, axis=1, keepdims=True)
+        return np.ascontiguousarray(reduced / np.maximum(norms, 1e-12), dtype=np.float32)
+
+    def save(self, path: str) -> None:
+        """İzdüşümü atomik olarak (geçici dosya + os.replace) kaydeder."""
+        arrays: Dict[str, Any] = {
+            "dim": np.int64(self.dim),
+            "method": np.array(self.method),
+        }
+        if self.explained_variance is not None:
+            arrays["explained_variance"] = np.float64(self.explained_variance)
+        if self.components is not None:
+            arrays["mean"] = self.mean
+            arrays["components"] = self.components
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **arrays)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "DimensionReducer":
+        """Kaydedilmiş izdüşümü okur."""
+        with np.load(path) as data:
+            reducer = cls(int(data["dim"]), str(data["method"]))
+            if "explained_variance" in data:
+                reducer.explained_variance = float(data["explained_variance"])
+            if "components" in data:
+                reducer.mean = data["mean"]
+                reducer.components = data["components"]
+        return reducer
+
+
+def reduction_report(
+    model: Any,
+    reducer: DimensionReducer,
+    corpus: List[str],
+    queries: List[str],
+    k: int = 10
+) -> Dict[str, float]:
+    """
+    Boyut indirgemenin erişim kalitesine etkisini ölçer.
+
+    Örnek derlem ve sorgular tam boyutta kodlanır; tam boyutlu kesin
+    arama ile indirgenmiş vektörlerdeki kesin arama sonuçlarının recall@k
+    değeri, vektör başına bellek ve arama işlem sayısı karşılaştırılır.
+    Verilen indirgeyici hiçbir zaman değiştirilmez: eğitilmemiş PCA'nın
+    kopyası derlem üzerinde eğitilir, varyans payı bilinmiyorsa mevcut
+    izdüşümle derlem üzerinde hesaplanır.
+
+    Args:
+        model: Embedding modeli (encode metodu olan nesne)
+        reducer: Değerlendirilecek indirgeyici
+        corpus: Örnek parça metinleri
+        queries: Örnek sorgular
+        k: Karşılaştırılacak sonuç sayısı
+
+    Returns:
+        Dict[str, float]: recall@k, boyutlar, bellek oranı ve açıklanan varyans
+    """
+    documents = np.asarray(model.encode(corpus), dtype=np.float32)
+    query_vectors = np.asarray(model.encode(queries), dtype=np.float32)
+    if not reducer.fitted:
+        reducer = copy.deepcopy(reducer).fit(documents)
+    explained_variance = reducer.explained_variance
+    if explained_variance is None:
+        # Depoya bağlı izdüşüm yeniden eğitilmez; tutulan varyans payı doğrudan ölçülür
+        centered = documents - documents.mean(axis=0)
+        if reducer.method == "truncate":
+            kept = centered[:, :reducer.dim]
+        else:
+            kept = (documents - reducer.mean) @ reducer.components.T
+        explained_variance = float(kept.var(axis=0).sum() / max(centered.var(axis=0).sum(), 1e-12))
+
+    k = min(k, len(corpus))
+    neighbours = []
+    for docs, qs in (
+        (documents, query_vectors),
+        (reducer.transform(documents), reducer.transform(query_vectors)),
+    ):
+        similarity = qs @ docs.T
+        neighbours.append(np.argsort(-similarity, axis=1)[:, :k])
+
+    recall = float(np.mean([
+        len(set(full) & set(reduced)) / k for full, reduced in zip(*neighbours)
+    ]))
+    return {
+        "recall_at_k": recall,
+        "full_dim": float(documents.shape[1]),
+        "reduced_dim": float(reducer.dim),
+        # Düz index'te bellek ve mesafe hesabı boyutla doğru orantılıdır
+        "memory_ratio": reducer.dim / documents.shape[1],
+        "explained_variance": explained_variance,
+    }
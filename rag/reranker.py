@@ -0,0 +1,81 @@
+import os
+import time
+from typing import List, Optional
+import numpy as np
+from sentence_transformers import CrossEncoder
+
+# Türkçe dahil çok dilli, CPU'da hızlı küçük cross-encoder
+DEFAULT_RERANKER_MODEL = os.getenv("RERANKER_MODEL", "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1")
+
+
+class CrossEncoderReranker:
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        batch_size: int = 16,
+        time_budget_ms: float = 150.0,
+        max_length: int = 256
+    ):
+        """
+        Aday parçaları sorguyla birlikte cross-encoder ile puanlayıp yeniden sıralar.
+
+        Adaylar yoğun arama sırasıyla batch_size'lık partiler halinde
+        puanlanır. Sorgu başına time_budget_ms süre tanınır: bir sonraki
+        partinin ölçülen parti süresine göre bütçeyi aşacağı görülürse
+        puanlama durur; puanlanan adaylar puana göre, kalanlar yoğun arama
+        sırasıyla arkalarına eklenir. Model hata verirse yoğun sıra aynen
+        kullanılır.
+
+        Args:
+            model_name: Cross-encoder model adı (None ise RERANKER_MODEL)
+            batch_size: Tek model çağrısında puanlanan (sorgu, parça) çifti sayısı
+            time_budget_ms: Sorgu başına puanlama süresi üst sınırı (ms)
+            max_length: Çift başına en fazla token sayısı
+        """
+        self.model_name = model_name or DEFAULT_RERANKER_MODEL
+        self.batch_size = batch_size
+        self.time_budget = time_budget_ms / 1000.0
+        self.model = CrossEncoder(self.model_name, max_length=max_length)
+
+        # İstatistikler: çağrı, bütçe aşımı (kısmi puanlama) ve hata sayısı
+        self.calls = 0
+        self.budget_exceeded = 0
+        self.failures = 0
+
+    def rerank(self, query: str, results: List[tuple], top_n: int) -> List[tuple]:
+        """
+        Sonuçları cross-encoder puanına göre sıralar ve en iyi top_n'i döndürür.
+
+        Args:
+            query: Kullanıcı sorusu
+            results: Yoğun arama sırasıyla (metin, puan) çiftleri
+            top_n: Döndürülecek sonuç sayısı
+
+        Returns:
+            List[tuple]: Yeniden sıralanmış (metin, puan) çiftleri; puanlar
+                yoğun aramadan geldiği gibi korunur
+        """
+        self.calls += 1
+        if len(results) <= 1:
+            return results[:top_n]
+
+        deadline = time.perf_counter() + self.time_budget
+        scores: List[np.ndarray] = []
+        batch_time = 0.0
+        try:
+            for start in range(0, len(results), self.batch_size):
+                started = time.perf_counter()
+                if started + batch_time > deadline:
+                    self.budget_exceeded += 1
+                    break
+                pairs = [(query, text) for text, _ in results[start:start + self.batch_size]]
+                scores.append(np.asarray(self.model.predict(pairs, batch_size=self.batch_size), dtype=np.float32))
+                batch_time = max(batch_time, time.perf_counter() - started)
+        except Exception:
+            self.failures += 1
+            return results[:top_n]
+
+        scored = np.concatenate(scores) if scores else np.empty(0, dtype=np.float32)
+        order = np.argsort(-scored, kind="stable")
+        reranked = [results[i] for i in order] + results[len(scored):]
+        return reranked[:top_n]
@@ -0,0 +1,86 @@
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+from rag.lexical_index import turkish_lower
+
+# Sorgu sonundaki noktalama ve boşluklar anlamı değiştirmez ("Net kâr nedir?" == "net kâr nedir")
+_TRAILING_PUNCTUATION = re.compile(r"[\s?!.,;:]+$")
+
+
+def normalize_query(query: str) -> str:
+    """Sorguyu önbellek anahtarı için Türkçe küçük harfe ve tek boşluklu biçime getirir."""
+    return _TRAILING_PUNCTUATION.sub("", " ".join(turkish_lower(query).split()))
+
+
+class RetrievalCache:
+    def __init__(self, max_entries: int = 1024):
+        """
+        Arama sonuçları için iş parçacığı güvenli LRU önbelleği.
+
+        Anahtar (normalize edilmiş sorgu, k, depo sürümü) üçlüsüdür. Depoya
+        her yazma sürüm numarasını artırdığından eski sürümle kaydedilmiş
+        sonuçlar bir daha istenmez ve LRU sırasıyla havuzdan düşer.
+
+        Args:
+            max_entries: Tutulacak en fazla sonuç listesi sayısı
+        """
+        self.max_entries = max_entries
+
+        # İstatistikler
+        self.hits = 0
+        self.misses = 0
+
+        self._entries: "OrderedDict[Tuple[str, int, Hashable], List[tuple]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def key(self, query: str, k: int, version: Hashable) -> Tuple[str, int, Hashable]:
+        return normalize_query(query), k, version
+
+    def get(self, key: Tuple[str, int, Hashable]) -> Optional[List[tuple]]:
+        """
+        Kayıtlı sonuçları döndürür ve isabet/ıska sayar.
+
+        Args:
+            key: key() ile üretilen anahtar
+
+        Returns:
+            Optional[List[tuple]]: Sonuçların kopyası (yoksa None)
+        """
+        with self._lock:
+            results = self._entries.get(key)
+            if results is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return list(results)
+
+    def put(self, key: Tuple[str, int, Hashable], results: List[tuple]) -> None:
+        """Sonuçları kaydeder; boyut aşılırsa en uzun süredir kullanılmayanı çıkarır."""
+        with self._lock:
+            self._entries[key] = list(results)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Kayıt sayısı, isabet/ıska sayıları ve isabet oranı."""
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+        }
@@ -1,5 +1,12 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Union
+import numpy as np
 from rag.vector_store import VectorStore
+from rag.fusion import reciprocal_rank_fusion
+from rag.reranker import CrossEncoderReranker
+from rag.mmr import maximal_marginal_relevance
+from rag.retrieval_cache import RetrievalCache
+from rag.context_builder import ContextBuilder
+from rag.query_expansion import QueryExpander, LLMQueryExpander
 from core.llm_client import LLMClient
 
 class RAGRetriever:
@@ -8,7 +15,17 @@ class RAGRetriever:
         vector_store: VectorStore,
         llm_client: LLMClient,
         top_k: int = 4,
-        similarity_threshold: float = 0.7
+        similarity_threshold: float = 0.7,
+        hybrid: bool = False,
+        lexical_threshold: float = 1.0,
+        candidate_factor: int = 2,
+        rrf_k: int = 60,
+        reranker: Optional[CrossEncoderReranker] = None,
+        rerank_candidates: int = 20,
+        mmr_lambda: Optional[float] = None,
+        cache: Optional[RetrievalCache] = None,
+        context_builder: Optional[ContextBuilder] = None,
+        query_expander: Optional[Union[QueryExpander, LLMQueryExpander]] = None
     ):
         """
         RAG retriever'ı başlatır.
@@ -18,29 +35,59 @@ class RAGRetriever:
             llm_client: LLM istemcisi
             top_k: Döndürülecek en alakalı belge sayısı
             similarity_threshold: Benzerlik eşiği
+            hybrid: Depo BM25 index'i tutuyorsa yoğun ve sözcüksel sonuçlar RRF ile birleştirilir
+            lexical_threshold: Yoğun aramada bulunmayan BM25 sonuçları için en düşük
+                BM25 puanı; bu puanın altındaki sözcüksel eşleşmeler elenir
+            candidate_factor: Hibrit aramada her yöntemden alınan aday sayısı (top_k katı)
+            rrf_k: RRF sabiti
+            reranker: Verilirse geniş aday kümesi cross-encoder ile yeniden sıralanır
+                ve prompt'a yalnızca en iyi top_k parça girer
+            rerank_candidates: Yeniden sıralamaya gönderilen aday sayısı
+            mmr_lambda: Verilirse son top_k adaylar arasından MMR ile seçilir
+                (1'e yakın: alaka, 0'a yakın: çeşitlilik); tekrarlanan paragraflar elenir
+            cache: Verilirse aynı sorgunun sonuçları deponun veri sürümü değişene kadar
+                yeniden kodlanmadan ve aranmadan önbellekten döner
+            context_builder: Verilirse bağlam, parçaların soruyla ilgili
+                cümlelerinden token bütçesi içinde kurulur
+            query_expander: Verilirse soru varyantları (eş anlamlı, kök, sayı
+                yazımı veya LLM) tek toplu aramada aranır ve sıraları RRF ile birleştirilir
         """
         self.vector_store = vector_store
         self.llm_client = llm_client
         self.top_k = top_k
         self.similarity_threshold = similarity_threshold
+        self.hybrid = hybrid
+        self.lexical_threshold = lexical_threshold
+        self.candidate_factor = candidate_factor
+        self.rrf_k = rrf_k
+        self.reranker = reranker
+        self.rerank_candidates = rerank_candidates
+        self.mmr_lambda = mmr_lambda
+        self.cache = cache
+        self.context_builder = context_builder
+        self.query_expander = query_expander
 
-    def _format_context(self, results: List[tuple]) -> str:
+    def _format_context(self, results: List[tuple], question: Optional[str] = None) -> str:
         """
         Benzerlik arama sonuçlarını bağlam metnine dönüştürür.
         
         Args:
             results: (metin, benzerlik skoru) çiftleri
+            question: Verilirse ve context_builder varsa bağlam token bütçesiyle kurulur
             
         Returns:
             str: Formatlanmış bağlam metni
         """
-        context_parts = []
+        # Yalnızca BM25 ile bulunan sonuçların puanı None'dır; onlar _fuse'da BM25 eşiğinden geçmiştir
+        texts = [
+            text for text, score in results
+            if score is None or score <= self.similarity_threshold
+        ]
         
-        for text, score in results:
-            if score <= self.similarity_threshold:
-                context_parts.append(f"İlgili bilgi: {text}")
+        if self.context_builder is not None and question is not None:
+            return self.context_builder.build(question, texts)
         
-        return "\n\n".join(context_parts)
+        return "\n\n".join(f"İlgili bilgi: {text}" for text in texts)
 
     def _create_prompt(self, question: str, context: str) -> str:
         """
@@ -74,13 +121,240 @@ Yanıt:"""
             Dict[str, Any]: Yanıt ve ilgili bilgiler
         """
         # Benzer belgeleri bul
-        results = self.vector_store.similarity_search(
-            query=question,
-            k=self.top_k
+        results = self._retrieve([question])[0]
+        
+        return self._answer(question, results)
+
+    def query_batch(self, questions: List[str]) -> List[Dict[str, Any]]:
+        """
+        Birden fazla soruyu tek toplu arama ile yanıtlar.
+        
+        Sorgular tek model çağrısında kodlanır ve tek FAISS aramasında
+        aranır; LLM yanıtları soru sırasıyla üretilir.
+        
+        Args:
+            questions: Kullanıcı soruları
+            
+        Returns:
+            List[Dict[str, Any]]: Her soru için yanıt ve ilgili bilgiler
+        """
+        return [
+            self._answer(question, results)
+            for question, results in zip(questions, self._retrieve(questions))
+        ]
+
+    def _use_hybrid(self) -> bool:
+        """Depo BM25 araması destekliyorsa ve hibrit arama açıksa True."""
+        return self.hybrid and getattr(self.vector_store, "lexical_enabled", False)
+
+    def _use_mmr(self) -> bool:
+        """MMR açıksa ve depo index vektörlerini döndürebiliyorsa True."""
+        return self.mmr_lambda is not None and hasattr(self.vector_store, "embed_queries")
+
+    def _candidate_count(self) -> int:
+        count = self.top_k * self.candidate_factor if self._use_hybrid() or self._use_mmr() else self.top_k
+        if self.reranker is not None:
+            count = max(count, self.rerank_candidates)
+        return count
+
+    def _retrieve(self, questions: List[str]) -> List[List[tuple]]:
+        """
+        Her soru için seçilen sonuçları önbellekten veya tek toplu aramayla döndürür.
+        
+        Args:
+            questions: Kullanıcı soruları
+            
+        Returns:
+            List[List[tuple]]: Her soru için en iyi top_k (metin, puan) çifti
+        """
+        # Veri sürümü arka plan index kurulumlarında değişmez; önbellek yalnızca yazmalarla boşa düşer
+        version = getattr(self.vector_store, "data_version", None)
+        if self.cache is None or version is None:
+            return self._search(questions)
+        
+        # Sürüm aramadan önce okunur: arama sırasında yapılan yazma da yeni sürümde görünür
+        keys = [self.cache.key(question, self.top_k, version) for question in questions]
+        results: List[Optional[List[tuple]]] = [self.cache.get(key) for key in keys]
+        misses = [i for i, cached in enumerate(results) if cached is None]
+        if misses:
+            for i, searched in zip(misses, self._search([questions[i] for i in misses])):
+                self.cache.put(keys[i], searched)
+                results[i] = searched
+        return results
+
+    def _search(self, questions: List[str]) -> List[List[tuple]]:
+        """
+        Soruları tek toplu aramayla arar ve her soru için seçilen sonuçları döndürür.
+        
+        Args:
+            questions: Kullanıcı soruları
+            
+        Returns:
+            List[List[tuple]]: Her soru için en iyi top_k (metin, puan) çifti
+        """
+        if self.query_expander is not None:
+            variants = self.query_expander.expand_batch(questions)
+        else:
+            variants = [[question] for question in questions]
+        # Tüm soruların tüm varyantları tek model çağrısı ve tek FAISS aramasıyla aranır
+        queries = [variant for group in variants for variant in group]
+        
+        search_kwargs: Dict[str, Any] = {}
+        if self._use_mmr():
+            # MMR için sorgu vektörleri bir kez kodlanır, aday vektörleri index'ten okunur
+            search_kwargs = {"query_vectors": self.vector_store.embed_queries(queries), "return_vectors": True}
+        batch_results = self.vector_store.similarity_search_batch(
+            queries=queries,
+            k=self._candidate_count(),
+            **search_kwargs
         )
         
+        selected = []
+        offset = 0
+        for question, group in zip(questions, variants):
+            results = batch_results[offset:offset + len(group)]
+            query_vector = search_kwargs["query_vectors"][offset] if search_kwargs else None
+            offset += len(group)
+            dense = results[0] if len(group) == 1 else self._merge_variants(results)
+            selected.append(self._select(question, dense, query_vector, lexical_query=" ".join(group)))
+        return selected
+
+    def _merge_variants(self, variant_results: List[List[tuple]]) -> List[tuple]:
+        """
+        Aynı sorunun varyant sonuçlarını RRF ile tek aday listesinde birleştirir.
+        
+        Args:
+            variant_results: Varyant başına yoğun arama sonuçları
+            
+        Returns:
+            List[tuple]: RRF sırasıyla adaylar; her metnin en küçük mesafeli sonucu
+        """
+        best: Dict[str, tuple] = {}
+        for results in variant_results:
+            for result in results:
+                if result[0] not in best or result[1] < best[result[0]][1]:
+                    best[result[0]] = result
+        
+        fused = reciprocal_rank_fusion(
+            [[result[0] for result in results] for results in variant_results],
+            k=self.rrf_k,
+            limit=self._candidate_count()
+        )
+        return [best[text] for text, _ in fused]
+
+    def _select(
+        self,
+        question: str,
+        dense: List[tuple],
+        query_vector: Optional[np.ndarray] = None,
+        lexical_query: Optional[str] = None
+    ) -> List[tuple]:
+        """
+        Aday sonuçlardan prompt'a girecek en iyi top_k sonucu seçer.
+        
+        Sıra: yoğun + BM25 birleştirme, varsa cross-encoder ile yeniden
+        sıralama, MMR açıksa çeşitlilik seçimi.
+        
+        Args:
+            question: Kullanıcı sorusu
+            dense: Yoğun aramanın (metin, L2 mesafesi) çiftleri; query_vector
+                verildiyse (metin, L2 mesafesi, vektör) üçlüleri
+            query_vector: MMR için sorgu vektörü
+            lexical_query: BM25 sorgusu (None ise soru; genişletmede tüm varyantlar)
+            
+        Returns:
+            List[tuple]: En iyi top_k (metin, puan) çifti
+        """
+        vectors = None
+        if query_vector is not None:
+            vectors = {text: vector for text, _, vector in dense}
+            dense = [(text, score) for text, score, _ in dense]
+        if self.reranker is None and vectors is None:
+            return self._fuse(question, dense, self.top_k, lexical_query=lexical_query)
+        
+        pool = self.rerank_candidates if self.reranker is not None else self.top_k * self.candidate_factor
+        candidates = self._fuse(question, dense, pool, vectors, lexical_query)
+        if self.reranker is not None:
+            # MMR'a yeniden sıralamanın en iyi adayları girer
+            keep = self.top_k if vectors is None else self.top_k * self.candidate_factor
+            candidates = self.reranker.rerank(question, candidates, keep)
+        if vectors is None or not candidates:
+            return candidates
+        
+        selected = maximal_marginal_relevance(
+            query_vector,
+            np.stack([vectors[text] for text, _ in candidates]),
+            self.top_k,
+            self.mmr_lambda
+        )
+        return [candidates[i] for i in selected]
+
+    def _fuse(
+        self,
+        question: str,
+        dense: List[tuple],
+        limit: int,
+        vectors: Optional[Dict[str, np.ndarray]] = None,
+        lexical_query: Optional[str] = None
+    ) -> List[tuple]:
+        """
+        Yoğun sonuçları BM25 sonuçlarıyla RRF kullanarak birleştirir.
+        
+        Args:
+            question: Kullanıcı sorusu
+            dense: Yoğun aramanın (metin, L2 mesafesi) çiftleri
+            limit: Döndürülecek sonuç sayısı
+            vectors: Verilirse BM25 sonuçlarının index vektörleri de buraya eklenir
+            lexical_query: BM25 sorgusu (None ise soru)
+            
+        Returns:
+            List[tuple]: En iyi limit (metin, mesafe) çifti; iki aramada da bulunan
+                metinler yoğun mesafesini korur, yalnızca BM25 ile bulunup
+                lexical_threshold'u geçen metinlerin puanı None'dır
+        """
+        if not self._use_hybrid():
+            return dense[:limit]
+        
+        lexical = self.vector_store.lexical_search(
+            lexical_query or question,
+            k=self._candidate_count(),
+            return_vectors=vectors is not None
+        )
+        if vectors is not None:
+            for text, _, vector in lexical:
+                vectors.setdefault(text, vector)
+            lexical = [(text, score) for text, score, _ in lexical]
+        distances: Dict[str, Optional[float]] = {}
+        for text, distance in dense:
+            distances.setdefault(text, distance)
+        # Yoğun aramanın kaçırdığı güçlü terim eşleşmesi (hisse kodu, sayı) BM25 puanıyla kabul edilir
+        lexical = [
+            (text, score) for text, score in lexical
+            if text in distances or score >= self.lexical_threshold
+        ]
+        for text, _ in lexical:
+            distances.setdefault(text, None)
+        
+        fused = reciprocal_rank_fusion(
+            [[text for text, _ in dense], [text for text, _ in lexical]],
+            k=self.rrf_k,
+            limit=limit
+        )
+        return [(text, distances.get(text)) for text, _ in fused]
+
+    def _answer(self, question: str, results: List[tuple]) -> Dict[str, Any]:
+        """
+        Arama sonuçlarından bağlam ve prompt oluşturup LLM yanıtını döndürür.
+        
+        Args:
+            question: Kullanıcı sorusu
+            results: (metin, benzerlik skoru) çiftleri
+            
+        Returns:
+            Dict[str, Any]: Yanıt ve ilgili bilgiler
+        """
         # Bağlamı oluştur
-        context = self._format_context(results)
+        context = self._format_context(results, question)
         
         # Prompt oluştur
         prompt = self._create_prompt(question, context)
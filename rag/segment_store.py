@@ -0,0 +1,709 @@
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+import faiss
+from rag.text_store import TextStore
+
+MANIFEST_FILE = "MANIFEST"
+MANIFEST_FORMAT = 2
+TOMBSTONE_FILE = "tombstones.bin"
+
+
+def _fsync_dir(path: str) -> None:
+    """Dizin girdilerini (rename/oluşturma) diske yazar."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        # Windows dizin açmaya izin vermez
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class SegmentView:
+    def __init__(self, segments: List[Tuple[str, np.ndarray]]):
+        """
+        Commit edilmiş segmentlerin değişmez, mmap'li görünümü.
+
+        Eşlemeler görünüm oluşturulurken açılır; segmentler sonradan
+        birleştirilse veya silinse de görünüm aynı satırları okumaya devam eder.
+
+        Args:
+            segments: (dosya adı, mmap'li vektör dizisi) çiftleri
+        """
+        self.segments = segments
+        self.rows = sum(len(data) for _, data in segments)
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def read_vectors(self, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """
+        Vektörlerin [start, stop) aralığını okur.
+
+        Args:
+            start: İlk satır
+            stop: Son satır (hariç); None ise tüm satırlar
+
+        Returns:
+            np.ndarray: float32 vektör matrisi
+        """
+        stop = self.rows if stop is None else stop
+        parts = []
+        offset = 0
+        for _, data in self.segments:
+            seg_start, seg_stop = offset, offset + len(data)
+            offset = seg_stop
+            if seg_stop <= start or seg_start >= stop:
+                continue
+            parts.append(data[max(start, seg_start) - seg_start:min(stop, seg_stop) - seg_start])
+
+        if not parts:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.ascontiguousarray(np.concatenate(parts), dtype=np.float32)
+
+    def read_rows(self, rows: np.ndarray) -> np.ndarray:
+        """
+        Verilen satır numaralarındaki tam hassasiyetli vektörleri okur.
+
+        Yalnızca istenen satırlar kopyalanır; sıkıştırılmış index sonuçlarının
+        yeniden sıralanmasında ve filtreli kesin aramada kullanılır.
+
+        Args:
+            rows: Satır numaraları
+
+        Returns:
+            np.ndarray: float32 vektörler (rows sırasıyla)
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        result = None
+        offset = 0
+        for _, data in self.segments:
+            seg_start, seg_stop = offset, offset + len(data)
+            offset = seg_stop
+            mask = (rows >= seg_start) & (rows < seg_stop)
+            if not mask.any():
+                continue
+            if result is None:
+                result = np.zeros((len(rows), data.shape[1]), dtype=np.float32)
+            result[mask] = data[rows[mask] - seg_start]
+
+        if result is None:
+            return np.zeros((len(rows), 0), dtype=np.float32)
+        return result
+
+
+class SegmentStore:
+    def __init__(
+        self,
+        path: str,
+        max_segments: int = 8,
+        background_compaction: bool = True
+    ):
+        """
+        Vektörleri ve metinleri yalnızca-ekleme (append-only) düzeninde saklar.
+
+        Her add_texts çağrısı yeni bir vektör segmenti yazar ve metinleri
+        TextStore'un sonuna ekler; commit noktası MANIFEST dosyasının atomik
+        olarak değiştirilmesidir. Böylece kayıt maliyeti tüm deponun değil,
+        yalnızca yeni partinin boyutuyla orantılıdır.
+
+        Args:
+            path: Segmentlerin ve manifest'in tutulacağı dizin
+            max_segments: Bu sayı aşılınca segmentler tek segmentte birleştirilir
+            background_compaction: Birleştirme arka planda mı yapılsın
+        """
+        self.path = path
+        self.max_segments = max_segments
+        self.background_compaction = background_compaction
+
+        self._lock = threading.Lock()
+        # Segment birleştirme ile silinmiş satır temizliği aynı anda çalışmaz
+        self._compaction_lock = threading.Lock()
+        self._compaction_thread: Optional[threading.Thread] = None
+        self._manifest: Dict[str, Any] = {
+            "format": MANIFEST_FORMAT,
+            "next_segment": 1,
+            "segments": [],
+            "texts": {"rows": 0, "bytes": 0}
+        }
+        self.texts = TextStore(path)
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.path, MANIFEST_FILE)
+
+    def exists(self) -> bool:
+        """Diskte commit edilmiş bir manifest olup olmadığını döndürür."""
+        return os.path.exists(self.manifest_path)
+
+    def __len__(self) -> int:
+        return self._manifest["texts"]["rows"]
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """
+        Commit edilmiş durumu yükler.
+
+        Manifest'te yer almayan segment dosyaları (yarım kalmış yazma veya
+        birleştirme artıkları) silinir, metin dosyalarının commit edilmemiş
+        kuyrukları kesilir. Vektörler ve metinler belleğe alınmaz; vektörler
+        read_vectors ile, metinler mmap'li TextStore üzerinden okunur.
+
+        Returns:
+            Optional[Dict[str, Any]]: "texts" (TextStore) ve kayıtlı index
+            bilgisi "index" (dict veya None); kayıt yoksa None
+        """
+        if not self.exists():
+            return None
+
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            self._manifest = json.load(f)
+
+        self._remove_orphans()
+
+        if "text_log" in self._manifest:
+            self._migrate_text_log()
+
+        state = self._manifest["texts"]
+        self.texts.blob_file = state.get("blob", self.texts.blob_file)
+        self.texts.offsets_file = state.get("offsets", self.texts.offsets_file)
+        self.texts.open(state["rows"], state["bytes"])
+
+        # Commit edilmemiş mezar taşı kuyruğunu kes
+        tombstones = self._manifest.get("tombstones")
+        if tombstones:
+            tomb_path = os.path.join(self.path, tombstones["file"])
+            if os.path.exists(tomb_path) and os.path.getsize(tomb_path) > tombstones["count"] * 8:
+                os.truncate(tomb_path, tombstones["count"] * 8)
+
+        return {"texts": self.texts, "index": self._manifest.get("index")}
+
+    @property
+    def next_id(self) -> int:
+        """Bir sonraki otomatik parça kimliği."""
+        return self._manifest.get("next_id", len(self))
+
+    def read_ids(self) -> np.ndarray:
+        """
+        Satır sırasıyla parça kimliklerini okur.
+
+        Kimlik dosyası olmayan eski segmentlerde kimlik satır numarasıdır.
+
+        Returns:
+            np.ndarray: int64 parça kimlikleri
+        """
+        with self._lock:
+            segments = list(self._manifest["segments"])
+        parts = []
+        offset = 0
+        for seg in segments:
+            parts.append(self._segment_ids(seg, offset))
+            offset += seg["rows"]
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+
+    def read_tombstones(self) -> np.ndarray:
+        """Commit edilmiş mezar taşlarının (silinmiş satır numaraları) listesi."""
+        tombstones = self._manifest.get("tombstones")
+        if not tombstones or not tombstones["count"]:
+            return np.zeros(0, dtype=np.int64)
+        with open(os.path.join(self.path, tombstones["file"]), "rb") as f:
+            data = f.read(tombstones["count"] * 8)
+        return np.frombuffer(data, dtype="<i8").astype(np.int64)
+
+    def delete(self, rows: List[int]) -> None:
+        """
+        Silinen satır numaralarını mezar taşı dosyasına ekler ve commit eder.
+
+        Maliyet silinen satır sayısıyla orantılıdır; veriler ancak rewrite ile
+        fiziksel olarak temizlenir (satırlar o zaman yeniden numaralanır).
+
+        Args:
+            rows: Silinen satır numaraları
+        """
+        if not len(rows):
+            return
+        os.makedirs(self.path, exist_ok=True)
+
+        with self._lock:
+            manifest = json.loads(json.dumps(self._manifest))
+            tombstones = manifest.setdefault("tombstones", {"file": TOMBSTONE_FILE, "count": 0})
+            tomb_path = os.path.join(self.path, tombstones["file"])
+
+            mode = "r+b" if os.path.exists(tomb_path) else "wb"
+            with open(tomb_path, mode) as f:
+                f.seek(tombstones["count"] * 8)
+                f.write(np.asarray(rows, dtype="<i8").tobytes())
+                f.truncate()
+                f.flush()
+                os.fsync(f.fileno())
+            tombstones["count"] += len(rows)
+
+            self._commit(manifest)
+
+    def view(self, previous: Optional[SegmentView] = None) -> SegmentView:
+        """
+        Commit edilmiş segmentlerin değişmez görünümünü açar.
+
+        Args:
+            previous: Önceki görünüm; değişmeyen segmentlerin eşlemeleri yeniden kullanılır
+
+        Returns:
+            SegmentView: mmap'li segment görünümü
+        """
+        reuse = dict(previous.segments) if previous is not None else {}
+        with self._lock:
+            segments = [
+                (seg["file"], reuse.get(seg["file"]) if seg["file"] in reuse
+                 else np.load(os.path.join(self.path, seg["file"]), mmap_mode="r"))
+                for seg in self._manifest["segments"]
+            ]
+        return SegmentView(segments)
+
+    def read_vectors(self, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """
+        Commit edilmiş vektörlerin [start, stop) aralığını okur.
+
+        Segmentler mmap ile açılır; yalnızca istenen satırlar kopyalanır.
+
+        Args:
+            start: İlk satır
+            stop: Son satır (hariç); None ise tüm satırlar
+
+        Returns:
+            np.ndarray: float32 vektör matrisi
+        """
+        return self.view().read_vectors(start, stop)
+
+    def read_rows(self, rows: np.ndarray) -> np.ndarray:
+        """
+        Verilen satır numaralarındaki tam hassasiyetli vektörleri okur.
+
+        Args:
+            rows: Satır numaraları
+
+        Returns:
+            np.ndarray: float32 vektörler (rows sırasıyla)
+        """
+        return self.view().read_rows(rows)
+
+    def save_index(
+        self,
+        index: faiss.Index,
+        rows: int,
+        mode: str,
+        storage: str = "float32"
+    ) -> None:
+        """
+        Eğitilmiş index'in anlık görüntüsünü kaydeder.
+
+        Yükleme sırasında index okunur ve yalnızca `rows` sonrasındaki
+        satırlar eklenir; böylece IVF/HNSW yeniden eğitilmez.
+
+        Args:
+            index: Kaydedilecek index (ilk `rows` satırı içermeli)
+            rows: Index'in kapsadığı satır sayısı
+            mode: Index modu
+            storage: Vektör kodlaması
+        """
+        os.makedirs(self.path, exist_ok=True)
+        with self._lock:
+            index_file = f"index-{self._manifest['next_segment']:06d}.faiss"
+            self._manifest["next_segment"] += 1
+
+        tmp_path = os.path.join(self.path, index_file + ".tmp")
+        faiss.write_index(index, tmp_path)
+        with open(tmp_path, "rb+") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, os.path.join(self.path, index_file))
+
+        with self._lock:
+            manifest = json.loads(json.dumps(self._manifest))
+            previous = manifest.get("index")
+            manifest["index"] = {
+                "file": index_file,
+                "rows": rows,
+                "mode": mode,
+                "storage": storage
+            }
+            self._commit(manifest)
+
+        if previous:
+            try:
+                os.remove(os.path.join(self.path, previous["file"]))
+            except OSError:
+                pass
+
+    def drop_index(self) -> None:
+        """Kayıtlı index anlık görüntüsünü manifest'ten kaldırır."""
+        with self._lock:
+            previous = self._manifest.get("index")
+            if not previous:
+                return
+            manifest = json.loads(json.dumps(self._manifest))
+            del manifest["index"]
+            self._commit(manifest)
+        try:
+            os.remove(os.path.join(self.path, previous["file"]))
+        except OSError:
+            pass
+
+    def load_index(self) -> Optional[faiss.Index]:
+        """Manifest'te kayıtlı index anlık görüntüsünü okur."""
+        info = self._manifest.get("index")
+        if not info:
+            return None
+        return faiss.read_index(os.path.join(self.path, info["file"]))
+
+    def append(
+        self,
+        vectors: np.ndarray,
+        texts: List[str],
+        metadata: Optional[Dict[str, List[Any]]] = None,
+        ids: Optional[List[int]] = None
+    ) -> List[int]:
+        """
+        Yeni bir partiyi segment + metin kaydı olarak ekler ve commit eder.
+
+        Args:
+            vectors: Eklenecek vektörler (satır sayısı metin sayısına eşit olmalı)
+            texts: Eklenecek metinler
+            metadata: Sütun düzeninde metadata (alan adı -> satır değerleri)
+            ids: Parça kimlikleri (None ise otomatik atanır)
+
+        Returns:
+            List[int]: Satırların parça kimlikleri
+        """
+        if len(vectors) != len(texts):
+            raise ValueError("Vektör ve metin sayısı eşleşmiyor")
+        if ids is not None and len(ids) != len(texts):
+            raise ValueError("Kimlik ve metin sayısı eşleşmiyor")
+        if not texts:
+            return []
+
+        os.makedirs(self.path, exist_ok=True)
+
+        with self._lock:
+            manifest = json.loads(json.dumps(self._manifest))
+            next_id = self.next_id
+            if ids is None:
+                ids = list(range(next_id, next_id + len(texts)))
+            manifest["next_id"] = max(next_id, max(ids) + 1)
+
+            # 1) Segment dosyalarını (vektörler, kimlikler, metadata) yaz
+            seg_file = f"seg-{manifest['next_segment']:06d}.npy"
+            manifest["next_segment"] += 1
+            self._write_array(os.path.join(self.path, seg_file), vectors)
+            segment = {"file": seg_file, "rows": len(texts)}
+            segment["ids"] = self._write_ids(seg_file, ids)
+            if metadata:
+                segment["meta"] = self._write_metadata(seg_file, metadata)
+            manifest["segments"].append(segment)
+
+            # 2) Metinleri blob + ofset dosyalarının commit edilmiş sonuna yaz
+            rows, nbytes = self.texts.write(texts)
+            manifest["texts"].update({"rows": rows, "bytes": nbytes})
+
+            # 3) Manifest'i atomik olarak değiştir (commit noktası)
+            self._commit(manifest)
+            self.texts.publish(rows, nbytes)
+
+        if len(self._manifest["segments"]) > self.max_segments:
+            self._schedule_compaction()
+        return list(ids)
+
+    def rewrite(self, keep: np.ndarray) -> None:
+        """
+        Yalnızca `keep` maskesindeki satırları tutarak depoyu yeniden yazar.
+
+        Vektörler, kimlikler ve metadata tek segmentte, metinler yeni
+        blob + ofset dosyalarında toplanır; index anlık görüntüsü (satır
+        numaraları değiştiği için) bırakılır. Yeni dosyalar manifest
+        commit'iyle birlikte tek adımda devreye girer. Ağır kopyalama kilit
+        dışında yapılır; bu sırada eklenen segmentler (metinleriyle) ve
+        silinen satırlar yeni numaralarıyla yeni manifest'e taşınır.
+
+        Args:
+            keep: Başlangıçtaki satırlar için tutulacaksa True olan bool maske
+        """
+        with self._compaction_lock:
+            with self._lock:
+                segments = list(self._manifest["segments"])
+                generation = self._manifest["next_segment"]
+                self._manifest["next_segment"] += 1
+
+            keep = np.asarray(keep, dtype=bool)
+            snapshot_rows = sum(seg["rows"] for seg in segments)
+            if len(keep) != snapshot_rows:
+                raise ValueError(f"Maske uzunluğu ({len(keep)}) satır sayısıyla ({snapshot_rows}) eşleşmiyor")
+            rows = np.flatnonzero(keep)
+            seg_file = f"seg-{generation:06d}.npy"
+            vectors = self.read_rows(rows)
+            self._write_array(os.path.join(self.path, seg_file), vectors)
+            segment = {"file": seg_file, "rows": int(len(rows))}
+            segment["ids"] = self._write_ids(seg_file, self.read_ids()[rows])
+            metadata = self._merge_metadata(segments)
+            if metadata:
+                segment["meta"] = self._write_metadata(
+                    seg_file,
+                    {name: [values[row] for row in rows] for name, values in metadata.items()}
+                )
+
+            new_texts = TextStore(
+                self.path,
+                blob_file=f"texts-{generation:06d}.bin",
+                offsets_file=f"offsets-{generation:06d}.bin"
+            )
+            # Yayınlanan boyut, kilit altında eklenecek metinlerin başlangıç noktasıdır
+            new_texts.publish(*new_texts.write([self.texts[row] for row in rows]))
+
+            with self._lock:
+                manifest = json.loads(json.dumps(self._manifest))
+                rewritten = {seg["file"] for seg in segments}
+                newer = [seg for seg in manifest["segments"] if seg["file"] not in rewritten]
+                old_files = [self.texts.blob_file, self.texts.offsets_file]
+                for old in segments:
+                    old_files.extend(old.get(key) for key in ("file", "ids", "meta"))
+                if manifest.get("index"):
+                    old_files.append(manifest.pop("index")["file"])
+
+                # Kopyalama sırasında eklenen satırların metinleri yeni dosyalara taşınır
+                total_rows = snapshot_rows + sum(seg["rows"] for seg in newer)
+                text_rows, nbytes = new_texts.write(
+                    [self.texts[row] for row in range(snapshot_rows, total_rows)]
+                )
+
+                # Eski satır numarası -> yeni satır numarası (atılan satırlar -1)
+                remap = np.full(total_rows, -1, dtype=np.int64)
+                remap[rows] = np.arange(len(rows))
+                remap[snapshot_rows:] = np.arange(len(rows), len(rows) + total_rows - snapshot_rows)
+                tombstones = self.read_tombstones()
+                tombstones = remap[tombstones[tombstones < total_rows]]
+                tombstones = np.unique(tombstones[tombstones >= 0])
+
+                old_tombstones = manifest.get("tombstones", {}).get("file")
+                if old_tombstones:
+                    old_files.append(old_tombstones)
+                tomb_file = f"tombstones-{generation:06d}.bin" if len(tombstones) else TOMBSTONE_FILE
+                if len(tombstones):
+                    with open(os.path.join(self.path, tomb_file), "wb") as f:
+                        f.write(tombstones.astype("<i8").tobytes())
+                        f.flush()
+                        os.fsync(f.fileno())
+
+                manifest["segments"] = [segment] + newer
+                manifest["texts"] = {
+                    "rows": text_rows,
+                    "bytes": nbytes,
+                    "blob": new_texts.blob_file,
+                    "offsets": new_texts.offsets_file
+                }
+                manifest["tombstones"] = {"file": tomb_file, "count": int(len(tombstones))}
+                self._commit(manifest)
+                old_files = [name for name in old_files if name != tomb_file]
+                self.texts.switch_files(new_texts.blob_file, new_texts.offsets_file, text_rows, nbytes)
+
+        for name in old_files:
+            if not name:
+                continue
+            try:
+                os.remove(os.path.join(self.path, name))
+            except OSError:
+                pass
+
+    def compact(self) -> bool:
+        """
+        Commit edilmiş tüm segmentleri tek bir segmentte birleştirir.
+
+        Ağır kopyalama kilit dışında yapılır; birleştirme sırasında eklenen
+        segmentler yeni manifest'e aynen taşınır.
+
+        Returns:
+            bool: Birleştirme yapıldıysa True
+        """
+        with self._compaction_lock:
+            with self._lock:
+                segments = list(self._manifest["segments"])
+                if len(segments) < 2:
+                    return False
+                merged_file = f"seg-{self._manifest['next_segment']:06d}.npy"
+                self._manifest["next_segment"] += 1
+
+            merged = np.concatenate([
+                np.load(os.path.join(self.path, seg["file"]), mmap_mode="r")
+                for seg in segments
+            ])
+            self._write_array(os.path.join(self.path, merged_file), merged)
+
+            merged_segment = {"file": merged_file, "rows": int(len(merged))}
+            merged_ids, offset = [], 0
+            for seg in segments:
+                merged_ids.append(self._segment_ids(seg, offset))
+                offset += seg["rows"]
+            merged_segment["ids"] = self._write_ids(merged_file, np.concatenate(merged_ids))
+            merged_meta = self._merge_metadata(segments)
+            if merged_meta:
+                merged_segment["meta"] = self._write_metadata(merged_file, merged_meta)
+
+            with self._lock:
+                manifest = json.loads(json.dumps(self._manifest))
+                merged_names = {seg["file"] for seg in segments}
+                newer = [seg for seg in manifest["segments"] if seg["file"] not in merged_names]
+                manifest["segments"] = [merged_segment] + newer
+                self._commit(manifest)
+
+        for seg in segments:
+            for name in [seg["file"], seg.get("ids"), seg.get("meta")]:
+                if not name:
+                    continue
+                try:
+                    os.remove(os.path.join(self.path, name))
+                except OSError:
+                    pass
+        return True
+
+    def read_metadata(self) -> List[Tuple[int, Optional[Dict[str, List[Any]]]]]:
+        """
+        Commit edilmiş segmentlerin metadata sütunlarını okur.
+
+        Returns:
+            List[Tuple[int, Optional[Dict[str, List[Any]]]]]: Segment başına
+            (satır sayısı, sütunlar veya None)
+        """
+        with self._lock:
+            segments = list(self._manifest["segments"])
+        return [(seg["rows"], self._read_segment_metadata(seg)) for seg in segments]
+
+    def _read_segment_metadata(self, seg: Dict[str, Any]) -> Optional[Dict[str, List[Any]]]:
+        if not seg.get("meta"):
+            return None
+        with open(os.path.join(self.path, seg["meta"]), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _merge_metadata(self, segments: List[Dict[str, Any]]) -> Dict[str, List[Any]]:
+        """Segmentlerin metadata sütunlarını, eksik alanları None ile doldurarak birleştirir."""
+        parts = [(seg["rows"], self._read_segment_metadata(seg)) for seg in segments]
+        names = []
+        for _, columns in parts:
+            for name in columns or {}:
+                if name not in names:
+                    names.append(name)
+
+        merged: Dict[str, List[Any]] = {name: [] for name in names}
+        for rows, columns in parts:
+            for name in names:
+                merged[name].extend((columns or {}).get(name) or [None] * rows)
+        return merged
+
+    def _segment_ids(self, seg: Dict[str, Any], offset: int) -> np.ndarray:
+        """Segmentin parça kimlikleri (eski segmentlerde satır numaraları)."""
+        if not seg.get("ids"):
+            return np.arange(offset, offset + seg["rows"], dtype=np.int64)
+        return np.load(os.path.join(self.path, seg["ids"]))
+
+    def _write_ids(self, seg_file: str, ids: List[int]) -> str:
+        """Segmentin parça kimliklerini yan dosyaya yazar ve adını döndürür."""
+        ids_file = seg_file.replace(".npy", ".ids.npy")
+        self._write_array(os.path.join(self.path, ids_file), np.asarray(ids, dtype=np.int64))
+        return ids_file
+
+    def _write_metadata(self, seg_file: str, columns: Dict[str, List[Any]]) -> str:
+        """Segmentin metadata sütunlarını yan dosyaya yazar ve adını döndürür."""
+        meta_file = seg_file.replace(".npy", ".meta.json")
+        tmp_path = os.path.join(self.path, meta_file + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(columns, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, os.path.join(self.path, meta_file))
+        return meta_file
+
+    def wait_for_compaction(self) -> None:
+        """Çalışan arka plan birleştirmesinin bitmesini bekler."""
+        thread = self._compaction_thread
+        if thread is not None:
+            thread.join()
+
+    def _schedule_compaction(self) -> None:
+        """Birleştirmeyi arka planda (veya senkron) başlatır."""
+        if not self.background_compaction:
+            self.compact()
+            return
+        with self._lock:
+            if self._compaction_thread is not None and self._compaction_thread.is_alive():
+                return
+            self._compaction_thread = threading.Thread(
+                target=self.compact,
+                name="segment-compaction",
+                daemon=True
+            )
+            self._compaction_thread.start()
+
+    def _write_array(self, path: str, array: np.ndarray) -> None:
+        """Diziyi geçici dosyaya yazıp fsync ettikten sonra yerine taşır."""
+        tmp_path = path + ".tmp"
+        dtype = np.int64 if np.issubdtype(array.dtype, np.integer) else np.float32
+        with open(tmp_path, "wb") as f:
+            np.save(f, np.ascontiguousarray(array, dtype=dtype))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _commit(self, manifest: Dict[str, Any]) -> None:
+        """Manifest'i crash-safe şekilde yazar ve bellekteki durumu günceller."""
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.manifest_path)
+        _fsync_dir(self.path)
+        self._manifest = manifest
+
+    def _migrate_text_log(self) -> None:
+        """Format 1 JSON satırlı metin günlüğünü TextStore düzenine taşır."""
+        log_state = self._manifest["text_log"]
+        log_path = os.path.join(self.path, log_state["file"])
+        if os.path.exists(log_path):
+            with open(log_path, "rb") as f:
+                data = f.read(log_state["bytes"])
+        else:
+            data = b""
+        texts = [json.loads(line) for line in data.decode("utf-8").splitlines()]
+
+        self.texts.open(0, 0)
+        rows, nbytes = self.texts.write(texts)
+
+        manifest = json.loads(json.dumps(self._manifest))
+        del manifest["text_log"]
+        manifest["format"] = MANIFEST_FORMAT
+        manifest["texts"] = {"rows": rows, "bytes": nbytes}
+        self._commit(manifest)
+
+        try:
+            os.remove(log_path)
+        except OSError:
+            pass
+
+    def _remove_orphans(self) -> None:
+        """Manifest'te olmayan segment ve geçici dosyaları temizler."""
+        live = set()
+        for seg in self._manifest["segments"]:
+            live.update(seg.get(key) for key in ("file", "ids", "meta"))
+        if self._manifest.get("index"):
+            live.add(self._manifest["index"]["file"])
+        texts = self._manifest.get("texts", {})
+        live.update([texts.get("blob"), texts.get("offsets")])
+        live.add(self._manifest.get("tombstones", {}).get("file"))
+        for name in os.listdir(self.path):
+            orphan_segment = name.startswith(("seg-", "index-", "texts-", "offsets-", "tombstones-")) and name not in live
+            if orphan_segment or name.endswith(".tmp"):
+                try:
+                    os.remove(os.path.join(self.path, name))
+                except OSError:
+                    pass
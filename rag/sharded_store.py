@@ -0,0 +1,344 @@
+import hashlib
+import heapq
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from core.embeddings import EmbeddingModel
+from rag.vector_store import VectorStore
+
+SHARD_MODES = ("hash", "doc")
+SHARDS_FILE = "SHARDS"
+
+
+class ShardedVectorStore:
+    def __init__(
+        self,
+        embedding_model: EmbeddingModel,
+        index_path: str = "data/sharded_store",
+        num_shards: int = 4,
+        shard_by: str = "hash",
+        max_workers: Optional[int] = None,
+        **store_kwargs: Any
+    ):
+        """
+        Parçaları N ayrı VectorStore parçasına (shard) bölen vektör veritabanı.
+
+        Sorgular tüm parçalarda paralel aranır (FAISS arama sırasında GIL'i
+        bırakır) ve parça başına top-k sonuçlar yığın ile birleştirilir.
+        similarity_search sözleşmesi VectorStore ile aynıdır.
+
+        Args:
+            embedding_model: Embedding modeli
+            index_path: Parça dizinlerinin bulunduğu kök dizin
+            num_shards: Parça sayısı (mevcut bir depoda kayıtlı değer kullanılır)
+            shard_by: "hash" (metin özeti) veya "doc" (metadata doc_id; aynı
+                belgenin parçaları aynı parçaya düşer)
+            max_workers: Arama iş parçacığı sayısı (None ise parça sayısı)
+            **store_kwargs: Her parçanın VectorStore'una iletilen ayarlar
+        """
+        if shard_by not in SHARD_MODES:
+            raise ValueError(f"Geçersiz parçalama modu: {shard_by}")
+        if num_shards < 1:
+            raise ValueError("Parça sayısı en az 1 olmalıdır")
+
+        self.embedding_model = embedding_model
+        self.index_path = index_path
+        self.num_shards, self.shard_by = self._load_layout(num_shards, shard_by)
+
+        self.shards = [
+            VectorStore(
+                embedding_model,
+                index_path=os.path.join(index_path, f"shard-{i:03d}"),
+                **store_kwargs
+            )
+            for i in range(self.num_shards)
+        ]
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or self.num_shards,
+            thread_name_prefix="shard-search"
+        )
+
+        # Parça kimlikleri tüm parçalarda tekildir
+        self._id_lock = threading.Lock()
+        self._next_id = max(shard.store.next_id for shard in self.shards)
+
+    def add_texts(
+        self,
+        texts: List[str],
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        ids: Optional[List[int]] = None,
+        embeddings: Optional[np.ndarray] = None
+    ) -> List[int]:
+        """
+        Metinleri parçalara dağıtarak ekler.
+
+        Args:
+            texts: Eklenecek metinler
+            metadatas: Metin başına metadata
+            ids: Kalıcı parça kimlikleri (None ise otomatik atanır)
+            embeddings: Önceden hesaplanmış embedding'ler (None ise model ile hesaplanır)
+
+        Returns:
+            List[int]: Eklenen parçaların kimlikleri
+        """
+        if not texts:
+            return []
+        if metadatas is not None and len(metadatas) != len(texts):
+            raise ValueError("Metadata ve metin sayısı eşleşmiyor")
+        if ids is not None:
+            if len(ids) != len(texts):
+                raise ValueError("Kimlik ve metin sayısı eşleşmiyor")
+            existing = [chunk_id for chunk_id in ids if self._shard_of_id(chunk_id) is not None]
+            if existing:
+                raise ValueError(f"Parça kimlikleri zaten var: {existing[:5]}")
+        ids = self._reserve_ids(ids, len(texts))
+
+        for shard, positions in self._route(texts, metadatas).items():
+            self.shards[shard].add_texts(
+                [texts[i] for i in positions],
+                [metadatas[i] for i in positions] if metadatas else None,
+                [ids[i] for i in positions],
+                embeddings[positions] if embeddings is not None else None
+            )
+        return ids
+
+    def upsert(
+        self,
+        ids: List[int],
+        texts: List[str],
+        metadatas: Optional[List[Dict[str, Any]]] = None
+    ) -> List[int]:
+        """
+        Kimliği verilen parçaları ekler; var olanların eski sürümünü siler.
+
+        Parçanın yeni sürümü başka bir parçaya düşerse eski sürüm silinir.
+
+        Args:
+            ids: Parça kimlikleri
+            texts: Parça metinleri
+            metadatas: Metin başına metadata
+
+        Returns:
+            List[int]: Yazılan parçaların kimlikleri
+        """
+        if len(ids) != len(texts):
+            raise ValueError("Kimlik ve metin sayısı eşleşmiyor")
+        self._reserve_ids(ids, len(ids))
+
+        for shard, positions in self._route(texts, metadatas).items():
+            batch_ids = [ids[i] for i in positions]
+            moved = [
+                chunk_id for chunk_id in batch_ids
+                if self._shard_of_id(chunk_id) not in (None, shard)
+            ]
+            self.delete(moved)
+            self.shards[shard].upsert(
+                batch_ids,
+                [texts[i] for i in positions],
+                [metadatas[i] for i in positions] if metadatas else None
+            )
+        return list(ids)
+
+    def delete(self, ids: List[int]) -> int:
+        """
+        Parçaları bulundukları parçalardan siler.
+
+        Args:
+            ids: Silinecek parça kimlikleri
+
+        Returns:
+            int: Silinen parça sayısı
+        """
+        by_shard: Dict[int, List[int]] = {}
+        for chunk_id in ids:
+            shard = self._shard_of_id(chunk_id)
+            if shard is not None:
+                by_shard.setdefault(shard, []).append(chunk_id)
+        return sum(self.shards[shard].delete(batch) for shard, batch in by_shard.items())
+
+    def similarity_search(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Verilen sorguya en benzer metinleri tüm parçalarda bulur.
+
+        Args:
+            query: Arama sorgusu
+            k: Döndürülecek sonuç sayısı
+            filter: Metadata filtresi
+
+        Returns:
+            List[Tuple[str, float]]: (metin, benzerlik skoru) çiftleri
+        """
+        return self.similarity_search_batch([query], k=k, filter=filter)[0]
+
+    def similarity_search_batch(
+        self,
+        queries: List[str],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        query_vectors: Optional[np.ndarray] = None,
+        return_vectors: bool = False
+    ) -> List[List[tuple]]:
+        """
+        Sorguları bir kez vektöre çevirir, parçalarda paralel arar ve
+        sonuçları birleştirir.
+
+        Args:
+            queries: Arama sorguları
+            k: Sorgu başına döndürülecek sonuç sayısı
+            filter: Tüm sorgulara uygulanacak metadata filtresi
+            query_vectors: embed_queries ile önceden kodlanmış sorgular
+            return_vectors: True ise her sonuca index'teki vektörü eklenir
+
+        Returns:
+            List[List[tuple]]: Her sorgu için (metin, benzerlik skoru) çiftleri;
+                return_vectors ile (metin, benzerlik skoru, vektör) üçlüleri
+        """
+        if not queries:
+            return []
+        if not all(isinstance(query, str) for query in queries):
+            raise TypeError("Sorgular string olmalıdır")
+
+        if query_vectors is None:
+            query_vectors = self.embed_queries(queries)
+        futures = [
+            self._executor.submit(
+                shard.similarity_search_batch,
+                queries, k, filter,
+                query_vectors=query_vectors,
+                return_vectors=return_vectors
+            )
+            for shard in self.shards
+        ]
+        per_shard = [future.result() for future in futures]
+
+        # Her parçanın listesi mesafeye göre sıralı; yığın ile ilk k birleştirilir
+        return [
+            list(islice(heapq.merge(*(rows[qi] for rows in per_shard), key=lambda result: result[1]), k))
+            for qi in range(len(queries))
+        ]
+
+    def lexical_search(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        return_vectors: bool = False
+    ) -> List[tuple]:
+        """
+        Sorgu terimlerini her parçada BM25 ile arar ve puana göre birleştirir.
+
+        IDF parça içindeki belge sıklığından hesaplanır; parçalar aynı
+        dağılımdan beslendiği sürece puanlar karşılaştırılabilir.
+
+        Args:
+            query: Arama sorgusu
+            k: Döndürülecek sonuç sayısı
+            filter: Metadata filtresi
+            return_vectors: True ise her sonuca index'teki vektörü eklenir
+
+        Returns:
+            List[tuple]: (metin, BM25 puanı) çiftleri, puana göre azalan;
+                return_vectors ile (metin, BM25 puanı, vektör) üçlüleri
+        """
+        if not self.lexical_enabled:
+            raise RuntimeError("Bu depoda BM25 index'i kapalı (lexical_index=False)")
+        futures = [
+            self._executor.submit(shard.lexical_search, query, k, filter, return_vectors)
+            for shard in self.shards
+        ]
+        per_shard = [future.result() for future in futures]
+        return list(islice(heapq.merge(*per_shard, key=lambda result: -result[1]), k))
+
+    def embed_queries(self, queries: List[str]) -> np.ndarray:
+        """
+        Sorguları parçaların ortak vektör uzayına kodlar.
+
+        Args:
+            queries: Arama sorguları
+
+        Returns:
+            np.ndarray: Sorgu vektörleri
+        """
+        return self.shards[0].embed_queries(queries)
+
+    @property
+    def lexical_enabled(self) -> bool:
+        """Tüm parçalar BM25 index'i tutuyorsa True."""
+        return all(shard.lexical_enabled for shard in self.shards)
+
+    @property
+    def version(self) -> int:
+        """Parçaların sürüm toplamı; herhangi bir parçaya yazıldığında artar."""
+        return sum(shard.version for shard in self.shards)
+
+    @property
+    def data_version(self) -> int:
+        """Parçaların veri sürümü toplamı; yalnızca veri değiştiğinde artar."""
+        return sum(shard.data_version for shard in self.shards)
+
+    def wait_for_rebuild(self) -> None:
+        """Parçalardaki arka plan index kurulumlarının bitmesini bekler."""
+        for shard in self.shards:
+            shard.wait_for_rebuild()
+
+    def close(self) -> None:
+        """Arama iş parçacıklarını kapatır."""
+        self._executor.shutdown(wait=True)
+
+    def _route(
+        self,
+        texts: List[str],
+        metadatas: Optional[List[Dict[str, Any]]]
+    ) -> Dict[int, List[int]]:
+        """Metinleri parça numarasına göre gruplar (parça -> metin sıraları)."""
+        groups: Dict[int, List[int]] = {}
+        for i, text in enumerate(texts):
+            key = text
+            if self.shard_by == "doc" and metadatas and (metadatas[i] or {}).get("doc_id"):
+                key = str(metadatas[i]["doc_id"])
+            digest = hashlib.sha1(key.encode("utf-8")).digest()
+            shard = int.from_bytes(digest[:8], "little") % self.num_shards
+            groups.setdefault(shard, []).append(i)
+        return groups
+
+    def _shard_of_id(self, chunk_id: int) -> Optional[int]:
+        """Canlı parça kimliğinin bulunduğu parça numarası."""
+        for i, shard in enumerate(self.shards):
+            if chunk_id in shard.ids:
+                return i
+        return None
+
+    def _reserve_ids(self, ids: Optional[List[int]], count: int) -> List[int]:
+        """Otomatik kimlik ayırır veya verilen kimlikleri sayaca işler."""
+        with self._id_lock:
+            if ids is None:
+                ids = list(range(self._next_id, self._next_id + count))
+            if ids:
+                self._next_id = max(self._next_id, max(ids) + 1)
+        return [int(chunk_id) for chunk_id in ids]
+
+    def _load_layout(self, num_shards: int, shard_by: str) -> Tuple[int, str]:
+        """Kayıtlı parça düzenini okur; yoksa verilen düzeni kaydeder."""
+        layout_path = os.path.join(self.index_path, SHARDS_FILE)
+        if os.path.exists(layout_path):
+            with open(layout_path, "r", encoding="utf-8") as f:
+                layout = json.load(f)
+            return layout["num_shards"], layout["shard_by"]
+
+        os.makedirs(self.index_path, exist_ok=True)
+        tmp_path = layout_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"num_shards": num_shards, "shard_by": shard_by}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, layout_path)
+        return num_shards, shard_by
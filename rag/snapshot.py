@@ -0,0 +1,89 @@
+from typing import Optional
+import numpy as np
+import faiss
+from rag.lexical_index import LexicalIndex
+from rag.metadata_store import MetadataStore
+from rag.segment_store import SegmentView
+from rag.text_store import TextView
+
+
+class IndexSnapshot:
+    def __init__(
+        self,
+        index: faiss.Index,
+        delta: Optional[faiss.Index],
+        mode: str,
+        storage: str,
+        trained_rows: int,
+        texts: TextView,
+        vectors: SegmentView,
+        metadata: MetadataStore,
+        deleted: Optional[np.ndarray] = None,
+        version: int = 0,
+        data_version: int = 0,
+        generation: int = 0,
+        lexical: Optional[LexicalIndex] = None
+    ):
+        """
+        VectorStore'un aramalar tarafından kilitsiz okunan değişmez sürümü.
+
+        FAISS index'leri, metin/vektör görünümleri ve silinmiş satır maskesi
+        yayınlandıktan sonra değiştirilmez: yazarlar yeni sürümü kurar ve tek
+        bir atama ile yerine koyar. Metadata deposu ve BM25 index'i sürümler
+        arasında paylaşılır ve yerinde yalnızca sona eklenerek büyür; okuyucular
+        onların yalnızca ilk `rows` satırına bakar, bu yüzden sonradan eklenen
+        satırlar bu sürümün sonuçlarına ve BM25 istatistiklerine girmez. Ana
+        index'e eklenmemiş son satırlar küçük bir düz `delta` index'inde
+        tutulur; böylece her yazmada büyük index kopyalanmaz.
+
+        Args:
+            index: Ana (eğitilmiş olabilecek) FAISS index'i
+            delta: Ana index'ten sonraki satırların düz index'i (yoksa None)
+            mode: Ana index'in modu
+            storage: Ana index'in vektör kodlaması
+            trained_rows: Ana index'in eğitildiği satır sayısı
+            texts: Metinlerin değişmez görünümü
+            vectors: Tam hassasiyetli vektörlerin değişmez görünümü
+            metadata: Metadata deposu (yalnızca ilk `rows` satır okunur)
+            deleted: Silinmiş satır maskesi (kısa ise eksik satırlar canlıdır)
+            version: Her yayında artan sürüm numarası
+            data_version: Yalnızca satırlar eklenip silindiğinde veya temizlendiğinde
+                artan sürüm numarası (index yeniden kurulumunda değişmez)
+            generation: Satırlar yeniden numaralandıkça artan nesil numarası
+            lexical: BM25 ters index'i (yalnızca ilk `rows` satır okunur)
+        """
+        self.index = index
+        self.delta = delta
+        self.mode = mode
+        self.storage = storage
+        self.trained_rows = trained_rows
+        self.texts = texts
+        self.vectors = vectors
+        self.metadata = metadata
+        self.deleted = deleted
+        self.version = version
+        self.data_version = data_version
+        self.generation = generation
+        self.lexical = lexical
+
+    @property
+    def base_rows(self) -> int:
+        """Ana index'teki satır sayısı."""
+        return self.index.ntotal
+
+    @property
+    def rows(self) -> int:
+        """Görünür toplam satır sayısı."""
+        return self.index.ntotal + (self.delta.ntotal if self.delta is not None else 0)
+
+    @property
+    def deleted_count(self) -> int:
+        return int(self.deleted.sum()) if self.deleted is not None else 0
+
+    def live_mask(self) -> np.ndarray:
+        """Silinmemiş satırlar için True olan maske."""
+        mask = np.ones(self.rows, dtype=bool)
+        if self.deleted is not None:
+            known = min(self.rows, len(self.deleted))
+            mask[:known] = ~self.deleted[:known]
+        return mask
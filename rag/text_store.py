@@ -0,0 +1,173 @@
+import mmap
+import os
+from collections.abc import Sequence
+from typing import List, Tuple, Union
+import numpy as np
+
+BLOB_FILE = "texts.bin"
+OFFSETS_FILE = "offsets.bin"
+
+
+class TextView(Sequence):
+    def __init__(self, blob=None, ends: np.ndarray = None, rows: int = 0):
+        """
+        Metin deposunun değişmez bir görünümü.
+
+        Görünüm oluşturulduğu andaki eşlemeleri tutar; sonradan eklenen
+        satırları görmez ve depo yeniden yazılsa da geçerli kalır.
+
+        Args:
+            blob: UTF-8 blob eşlemesi
+            ends: int64 bitiş ofsetleri
+            rows: Görünür satır sayısı
+        """
+        self._blob = blob
+        self._ends = np.zeros(0, dtype=np.int64) if ends is None else ends
+        self._rows = rows
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def __getitem__(self, idx: Union[int, slice]) -> Union[str, List[str]]:
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(self._rows))]
+
+        # Önce satır sayısı okunur: publish onu en son günceller
+        rows = self._rows
+        ends, blob = self._ends, self._blob
+        if idx < 0:
+            idx += rows
+        if not 0 <= idx < rows:
+            raise IndexError("TextStore index out of range")
+
+        start, end = (int(ends[idx - 1]) if idx else 0), int(ends[idx])
+        if start == end:
+            return ""
+        return blob[start:end].decode("utf-8")
+
+
+class TextStore(TextView):
+    def __init__(
+        self,
+        path: str,
+        blob_file: str = BLOB_FILE,
+        offsets_file: str = OFFSETS_FILE
+    ):
+        """
+        Parça metinlerini ofset dizisi + UTF-8 blob olarak saklar.
+
+        Dosyalar mmap ile açılır; bir satır yalnızca erişildiğinde çözülür.
+        Böylece açılış maliyeti ve bellekte kalan veri korpus boyutuyla büyümez.
+
+        Args:
+            path: Blob ve ofset dosyalarının bulunduğu dizin
+            blob_file: UTF-8 blob dosyasının adı
+            offsets_file: int64 bitiş ofsetleri dosyasının adı
+        """
+        super().__init__()
+        self.path = path
+        self.blob_file = blob_file
+        self.offsets_file = offsets_file
+        self._bytes = 0
+
+    @property
+    def blob_path(self) -> str:
+        return os.path.join(self.path, self.blob_file)
+
+    @property
+    def offsets_path(self) -> str:
+        return os.path.join(self.path, self.offsets_file)
+
+    @property
+    def nbytes(self) -> int:
+        """Commit edilmiş blob boyutu."""
+        return self._bytes
+
+    def open(self, rows: int, nbytes: int) -> None:
+        """
+        Commit edilmiş satırları eşler, commit edilmemiş kuyrukları keser.
+
+        Args:
+            rows: Commit edilmiş satır sayısı
+            nbytes: Commit edilmiş blob boyutu
+        """
+        for file_path, size in [(self.blob_path, nbytes), (self.offsets_path, rows * 8)]:
+            if os.path.exists(file_path) and os.path.getsize(file_path) > size:
+                os.truncate(file_path, size)
+        self.publish(rows, nbytes)
+
+    def write(self, texts: List[str]) -> Tuple[int, int]:
+        """
+        Metinleri dosyaların commit edilmiş sonuna yazar (henüz görünmez).
+
+        Satırlar ancak çağıran taraf commit ettikten sonra publish ile
+        okuyuculara açılır.
+
+        Args:
+            texts: Eklenecek metinler
+
+        Returns:
+            Tuple[int, int]: Yazma sonrası (satır sayısı, blob boyutu)
+        """
+        os.makedirs(self.path, exist_ok=True)
+        encoded = [text.encode("utf-8") for text in texts]
+        ends = self._bytes + np.cumsum([len(data) for data in encoded], dtype=np.int64)
+
+        for file_path, offset, payload in [
+            (self.blob_path, self._bytes, b"".join(encoded)),
+            (self.offsets_path, self._rows * 8, ends.astype("<i8").tobytes())
+        ]:
+            mode = "r+b" if os.path.exists(file_path) else "wb"
+            with open(file_path, mode) as f:
+                f.seek(offset)
+                f.write(payload)
+                f.truncate()
+                f.flush()
+                os.fsync(f.fileno())
+
+        return self._rows + len(texts), int(ends[-1]) if len(ends) else self._bytes
+
+    def switch_files(self, blob_file: str, offsets_file: str, rows: int, nbytes: int) -> None:
+        """
+        Yeniden yazılmış (sıkıştırılmış) dosyalara geçer ve onları yayınlar.
+
+        Args:
+            blob_file: Yeni blob dosyasının adı
+            offsets_file: Yeni ofset dosyasının adı
+            rows: Yeni dosyalardaki satır sayısı
+            nbytes: Yeni blob boyutu
+        """
+        self.blob_file = blob_file
+        self.offsets_file = offsets_file
+        self.publish(rows, nbytes)
+
+    def publish(self, rows: int, nbytes: int) -> None:
+        """
+        Dosyaları yeniden eşler ve ilk `rows` satırı görünür yapar.
+
+        Eski eşlemeler kapatılmaz; onları tutan okuyucular çöp toplayıcıya
+        kadar güvenle okumaya devam eder.
+
+        Args:
+            rows: Görünür satır sayısı
+            nbytes: Görünür blob boyutu
+        """
+        blob = self._map(self.blob_path) if nbytes else None
+        offsets = self._map(self.offsets_path) if rows else None
+        ends = (
+            np.frombuffer(offsets, dtype="<i8", count=rows)
+            if offsets is not None else np.zeros(0, dtype=np.int64)
+        )
+        self._blob, self._ends = blob, ends
+        self._bytes = nbytes
+        self._rows = rows
+
+    def _map(self, file_path: str) -> mmap.mmap:
+        with open(file_path, "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def view(self) -> TextView:
+        """Şu an görünür satırların değişmez görünümü."""
+        # Önce satır sayısı okunur: publish onu en son günceller
+        rows = self._rows
+        return TextView(self._blob, self._ends, rows)
@@ -1,11 +1,34 @@
+import json
+import math
 import os
 import pickle
-from typing import List, Tuple, Optional
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Tuple, Optional
 import numpy as np
 import faiss
 from core.embeddings import EmbeddingModel
+from core.model_registry import get_embedding_model
+from rag.segment_store import SegmentStore, SegmentView
+from rag.snapshot import IndexSnapshot
+from rag.text_store import TextStore
+from rag.metadata_store import MetadataStore
+from rag.id_map import ChunkIdMap
+from rag.lexical_index import LexicalIndex, tokenize
+from rag.reduction import DimensionReducer
+from rag.index_factory import (
+    INDEX_MODES,
+    STORAGE_MODES,
+    apply_search_params,
+    build_index,
+    choose_index_mode,
+    effective_mode,
+    effective_storage
+)
 from pinecone import Pinecone, ServerlessSpec
-from sentence_transformers import SentenceTransformer
+from urllib3.exceptions import MaxRetryError, ProtocolError, TimeoutError as Urllib3TimeoutError
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -14,57 +37,298 @@ PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 PINECONE_ENVIRONMENT = os.getenv("PINECONE_ENVIRONMENT")
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
 
+# HTTP durumu olmayan ama geçici sayılan (yeniden denenen) bağlantı ve zaman aşımı hataları;
+# Pinecone istemci hataları (ör. PineconeApiValueError) hatalı isteği gösterir ve tekrarlanmaz
+TRANSIENT_ERRORS = (
+    ConnectionError,
+    TimeoutError,
+    MaxRetryError,
+    ProtocolError,
+    Urllib3TimeoutError,
+)
+
 class VectorStore:
     def __init__(
         self,
-        embedding_model: EmbeddingModel,
+        embedding_model: Optional[EmbeddingModel] = None,
         index_path: str = "data/vector_store",
-        dimension: Optional[int] = None
+        dimension: Optional[int] = None,
+        max_segments: int = 8,
+        index_mode: str = "auto",
+        nprobe: int = 16,
+        ef_search: int = 64,
+        retrain_factor: float = 4.0,
+        background_rebuild: bool = True,
+        storage: str = "float32",
+        rerank_factor: int = 0,
+        filter_brute_force_limit: int = 4096,
+        tombstone_threshold: float = 0.2,
+        delta_limit: int = 10_000,
+        reducer: Optional[DimensionReducer] = None,
+        lexical_index: bool = False
     ):
         """
         Vektör veritabanını başlatır.
         
         Args:
-            embedding_model: Embedding modeli
-            index_path: FAISS index'inin kaydedileceği yol
+            embedding_model: Embedding modeli (None ise süreçte paylaşılan varsayılan model)
+            index_path: Segmentlerin ve manifest'in kaydedileceği dizin
             dimension: Vektör boyutu (None ise model'den alınır)
+            max_segments: Arka plan birleştirmesini tetikleyen segment sayısı
+            index_mode: "auto", "flat", "ivf_flat", "ivf_pq" veya "hnsw"
+            nprobe: IVF modlarında taranacak küme sayısı
+            ef_search: HNSW arama kuyruğu genişliği
+            retrain_factor: Eğitilmiş index (IVF, SQ8, PQ) eğitildiği boyutun bu katına ulaşınca yeniden eğitilir
+            background_rebuild: Index yeniden kurulumu arka planda mı yapılsın
+            storage: Index'teki vektör kodlaması: "float32", "fp16", "sq8" veya "pq"
+            rerank_factor: 0'dan büyükse k * rerank_factor aday diskteki tam
+                hassasiyetli vektörlerle yeniden sıralanır
+            filter_brute_force_limit: Filtreye uyan satır sayısı bu değerin altındaysa
+                index yerine yalnızca bu satırlar üzerinde kesin arama yapılır
+            tombstone_threshold: Silinmiş satır oranı bu değeri aşınca depo ve
+                index silinmiş satırlar olmadan yeniden yazılır (0 ise kapalı)
+            delta_limit: Yeni satırları tutan düz delta index'i bu boyutu (veya
+                ana index'in %10'unu) aşınca ana index'in kopyasına katlanır
+            reducer: Embedding'leri index'ten önce düşük boyuta indirgeyen aşama
+                (PCA önceden reducer.fit(örnek) ile eğitilmiş olmalıdır; izdüşüm
+                index ile birlikte kaydedilir ve sorgulara da uygulanır)
+            lexical_index: Metinler için BM25 ters index'i tutulsun mu (hibrit arama için;
+                açılışta ve purge_deleted'da tüm metinlerden yeniden kurulduğundan
+                varsayılan olarak kapalıdır)
         """
-        self.embedding_model = embedding_model
+        if index_mode != "auto" and index_mode not in INDEX_MODES:
+            raise ValueError(f"Geçersiz index modu: {index_mode}")
+        if storage not in STORAGE_MODES:
+            raise ValueError(f"Geçersiz kodlama: {storage}")
+        
+        self.embedding_model = embedding_model or get_embedding_model()
         self.index_path = index_path
-        self.dimension = dimension or embedding_model.get_dimension()
         
-        # FAISS index'ini oluştur
-        self.index = faiss.IndexFlatL2(self.dimension)
+        # Kayıtlı izdüşüm varsa kaydedilmiş vektörlerle uyumlu olması için o kullanılır
+        self.reducer_path = os.path.join(index_path, "reduction.npz")
+        if os.path.exists(self.reducer_path):
+            saved = DimensionReducer.load(self.reducer_path)
+            if reducer is not None and reducer.dim != saved.dim:
+                raise ValueError(
+                    f"Depo {saved.dim} boyuta indirgenmiş; verilen indirgeyici {reducer.dim} boyutlu"
+                )
+            reducer = saved
+        elif reducer is not None and not reducer.fitted:
+            raise ValueError("PCA izdüşümü depoya verilmeden önce reducer.fit(örnek) ile eğitilmelidir")
+        self.reducer = reducer
+        self.dimension = reducer.dim if reducer else dimension or self.embedding_model.get_dimension()
+        self.index_mode = index_mode
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+        self.retrain_factor = retrain_factor
+        self.background_rebuild = background_rebuild
+        self.storage = storage
+        self.rerank_factor = rerank_factor
+        self.filter_brute_force_limit = filter_brute_force_limit
+        self.tombstone_threshold = tombstone_threshold
+        self.delta_limit = delta_limit
+        
+        # Yalnızca-ekleme disk düzeni (segmentler + metin günlüğü)
+        self.store = SegmentStore(index_path, max_segments=max_segments)
         
-        # Metinleri saklamak için liste
-        self.texts: List[str] = []
+        # Yazma işlemleri ve anlık görüntü yayını için kilit (aramalar kilit almaz)
+        self._write_lock = threading.Lock()
+        self._rebuild_thread: Optional[threading.Thread] = None
+        self._purge_thread: Optional[threading.Thread] = None
+        
+        # Metinler mmap'li blob + ofset dosyalarında; satırlar erişildikçe çözülür
+        self.texts: TextStore = self.store.texts
+        
+        # Parça metadata'sı (doc_id, session_id, page...) sütun düzeninde
+        self.metadata = MetadataStore()
+        
+        # Satır <-> kalıcı parça kimliği eşlemesi ve silinmiş satır maskesi
+        self.ids = ChunkIdMap()
+        self._published_deletes = self.ids.version
+        
+        # FAISS index'i (vektör sayısı arttıkça ANN moduna geçilir), metinler ve
+        # vektörler değişmez bir anlık görüntüde yayınlanır
+        self._snapshot = IndexSnapshot(
+            index=faiss.IndexFlatL2(self.dimension),
+            delta=None,
+            mode="flat",
+            storage="float32",
+            trained_rows=0,
+            texts=self.texts.view(),
+            vectors=SegmentView([]),
+            metadata=self.metadata,
+            lexical=LexicalIndex() if lexical_index else None
+        )
         
         # Eğer kayıtlı index varsa yükle
         self._load_if_exists()
+        
+        # İzdüşüm ilk açılışta kaydedilir; sonraki açılışlar aynı uzayda arar
+        if self.reducer is not None and not os.path.exists(self.reducer_path):
+            os.makedirs(index_path, exist_ok=True)
+            self.reducer.save(self.reducer_path)
+
+    @property
+    def snapshot(self) -> IndexSnapshot:
+        """Aramaların okuduğu güncel değişmez sürüm."""
+        return self._snapshot
+
+    @property
+    def version(self) -> int:
+        """Her yazmada (ve index yeniden kurulumunda) artan sürüm numarası."""
+        return self._snapshot.version
+
+    @property
+    def data_version(self) -> int:
+        """Yalnızca ekleme, silme ve temizlikte artan veri sürümü (index yeniden kurulumunda değişmez)."""
+        return self._snapshot.data_version
+
+    @property
+    def lexical_enabled(self) -> bool:
+        """Depo BM25 index'i tutuyorsa True."""
+        return self._snapshot.lexical is not None
+
+    @property
+    def index(self) -> faiss.Index:
+        """Güncel anlık görüntünün ana FAISS index'i."""
+        return self._snapshot.index
 
-    def add_texts(self, texts: List[str]) -> None:
+    @property
+    def active_mode(self) -> str:
+        return self._snapshot.mode
+
+    @property
+    def active_storage(self) -> str:
+        return self._snapshot.storage
+
+    def add_texts(
+        self,
+        texts: List[str],
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        ids: Optional[List[int]] = None,
+        embeddings: Optional[np.ndarray] = None
+    ) -> List[int]:
         """
         Metinleri vektör veritabanına ekler.
         
         Args:
             texts: Eklenecek metinler
+            metadatas: Metin başına metadata (örn. doc_id, session_id, page, uploaded_at)
+            ids: Kalıcı parça kimlikleri (None ise otomatik atanır)
+            embeddings: Önceden hesaplanmış embedding'ler (None ise model ile hesaplanır)
+            
+        Returns:
+            List[int]: Eklenen parçaların kimlikleri
         """
-        # Metinleri vektörlere dönüştür
-        embeddings = self.embedding_model.encode(texts)
+        return self._write(texts, metadatas, ids, replace=False, embeddings=embeddings)
+
+    def upsert(
+        self,
+        ids: List[int],
+        texts: List[str],
+        metadatas: Optional[List[Dict[str, Any]]] = None
+    ) -> List[int]:
+        """
+        Kimliği verilen parçaları ekler; var olanların eski sürümünü siler.
         
-        # FAISS index'ine ekle
-        self.index.add(embeddings)
+        Args:
+            ids: Parça kimlikleri
+            texts: Parça metinleri
+            metadatas: Metin başına metadata
+            
+        Returns:
+            List[int]: Yazılan parçaların kimlikleri
+        """
+        return self._write(texts, metadatas, ids, replace=True)
+
+    def delete(self, ids: List[int]) -> int:
+        """
+        Parçaları mezar taşıyla siler; satırlar aramada maskelenir.
+        
+        Fiziksel temizlik, silinmiş oran tombstone_threshold'u aşınca
+        purge_deleted ile yapılır.
         
-        # Metinleri sakla
-        self.texts.extend(texts)
+        Args:
+            ids: Silinecek parça kimlikleri
+            
+        Returns:
+            int: Silinen (canlı olan) parça sayısı
+        """
+        # Aynı kimlik iki kez verilirse bir kez silinir ve bir kez sayılır
+        ids = list(dict.fromkeys(ids))
+        with self._write_lock:
+            rows = [self.ids.row(chunk_id) for chunk_id in ids]
+            rows = [row for row in rows if row is not None]
+            self.store.delete(rows)
+            self.ids.delete(ids)
+            self._publish(data_changed=True)
         
-        # Değişiklikleri kaydet
-        self._save()
+        self._maybe_purge()
+        return len(rows)
+
+    def purge_deleted(self) -> int:
+        """
+        Silinmiş satırları diskten ve index'ten kaldırır.
+        
+        Canlı satırlar yeni bir segmente ve metin dosyalarına yazılır, FAISS
+        index'i bunlardan yeniden kurulur. Parça kimlikleri değişmez.
+        
+        Returns:
+            int: Kaldırılan satır sayısı
+        """
+        with self._write_lock:
+            snapshot = self._snapshot
+            keep = self.ids.live_mask(snapshot.rows)
+            removed = int(snapshot.rows - keep.sum())
+            if not removed:
+                return 0
+            
+            index = faiss.IndexFlatL2(self.dimension)
+            index.add(snapshot.vectors.read_rows(np.flatnonzero(keep)))
+            
+            # Eski anlık görüntü silinen dosyaların eşlemelerini tutmaya devam eder
+            self.store.rewrite(keep)
+            
+            metadata = MetadataStore()
+            for segment_rows, columns in self.store.read_metadata():
+                metadata.extend_columns(columns, segment_rows)
+            ids = ChunkIdMap()
+            ids.append(self.store.read_ids())
+            
+            # Satır numaraları değiştiği için BM25 index'i yeniden kurulur
+            lexical = None
+            if snapshot.lexical is not None:
+                lexical = LexicalIndex(snapshot.lexical.k1, snapshot.lexical.b)
+                lexical.add(self.texts.view())
+            
+            self.metadata, self.ids = metadata, ids
+            self._published_deletes = ids.version
+            self._publish(
+                data_changed=True,
+                index=index,
+                delta=None,
+                mode="flat",
+                storage="float32",
+                trained_rows=0,
+                deleted=None,
+                generation=snapshot.generation + 1,
+                lexical=lexical
+            )
+        
+        self._maybe_rebuild()
+        return removed
+
+    def wait_for_purge(self) -> None:
+        """Çalışan arka plan temizliğinin bitmesini bekler."""
+        thread = self._purge_thread
+        if thread is not None:
+            thread.join()
 
     def similarity_search(
         self,
         query: str,
-        k: int = 4
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None
     ) -> List[Tuple[str, float]]:
         """
         Verilen sorguya en benzer metinleri bulur.
@@ -72,90 +336,838 @@ class VectorStore:
         Args:
             query: Arama sorgusu
             k: Döndürülecek sonuç sayısı
+            filter: Metadata filtresi, örn. {"doc_id": "abc"} veya {"page": {"$gte": 3}}
             
         Returns:
             List[Tuple[str, float]]: (metin, benzerlik skoru) çiftleri
         """
-        # Sorguyu vektöre dönüştür
-        query_vector = self.embedding_model.encode(query)
+        return self.similarity_search_batch([query], k=k, filter=filter)[0]
+
+    def similarity_search_batch(
+        self,
+        queries: List[str],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        query_vectors: Optional[np.ndarray] = None,
+        return_vectors: bool = False
+    ) -> List[List[tuple]]:
+        """
+        Birden fazla sorguyu tek model çağrısı ve tek FAISS aramasıyla işler.
+        
+        Args:
+            queries: Arama sorguları
+            k: Sorgu başına döndürülecek sonuç sayısı
+            filter: Tüm sorgulara uygulanacak metadata filtresi
+            query_vectors: embed_queries ile önceden kodlanmış sorgular
+            return_vectors: True ise her sonuca index'teki vektörü eklenir
+            
+        Returns:
+            List[List[tuple]]: Her sorgu için (metin, benzerlik skoru) çiftleri;
+                return_vectors ile (metin, benzerlik skoru, vektör) üçlüleri
+        """
+        if not queries:
+            return []
+        if not all(isinstance(query, str) for query in queries):
+            raise TypeError("Sorgular string olmalıdır")
+        
+        # Tüm sorguları tek seferde vektöre dönüştür
+        if query_vectors is None:
+            query_vectors = self._embed(queries)
         
-        # En yakın komşuları bul
-        distances, indices = self.index.search(query_vector, k)
+        # Sorgu matrisi için en yakın komşuları tek bir tutarlı sürümde bul
+        snapshot = self._snapshot
+        distances, indices = self._search_vectors(query_vectors, k, filter, snapshot)
         
-        # Sonuçları formatla
+        # Sonuçları sorgu bazında formatla
+        texts = snapshot.texts
         results = []
-        for idx, distance in zip(indices[0], distances[0]):
-            if idx < len(self.texts):  # Geçerli index kontrolü
-                results.append((self.texts[idx], float(distance)))
+        for row_indices, row_distances in zip(indices, distances):
+            row = []
+            for idx, distance in zip(row_indices, row_distances):
+                if 0 <= idx < len(texts):  # Geçerli index kontrolü
+                    row.append((texts[idx], float(distance)))
+            if return_vectors:
+                valid = row_indices[(row_indices >= 0) & (row_indices < len(texts))]
+                row = [result + (vector,) for result, vector in zip(row, snapshot.vectors.read_rows(valid))]
+            results.append(row)
         
         return results
 
-    def _save(self) -> None:
-        """FAISS index'ini ve metinleri kaydeder."""
-        # Dizin oluştur
-        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+    def lexical_search(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        return_vectors: bool = False
+    ) -> List[tuple]:
+        """
+        Sorgu terimlerini BM25 ile arar (hisse kodu, hesap kodu, sayı gibi tam eşleşmeler için).
+        
+        Args:
+            query: Arama sorgusu
+            k: Döndürülecek sonuç sayısı
+            filter: Metadata filtresi
+            return_vectors: True ise her sonuca index'teki vektörü eklenir
+            
+        Returns:
+            List[tuple]: (metin, BM25 puanı) çiftleri, puana göre azalan;
+                return_vectors ile (metin, BM25 puanı, vektör) üçlüleri
+        """
+        snapshot = self._snapshot
+        if snapshot.lexical is None:
+            raise RuntimeError("Bu depoda BM25 index'i kapalı (lexical_index=False)")
+        
+        mask = None
+        if filter or snapshot.deleted is not None:
+            mask = snapshot.live_mask()
+            if filter:
+                mask &= snapshot.metadata.mask(filter, rows=snapshot.rows)
+        rows, scores = snapshot.lexical.search(query, k, rows=snapshot.rows, mask=mask)
+        results = [(snapshot.texts[row], float(score)) for row, score in zip(rows, scores)]
+        if return_vectors:
+            results = [result + (vector,) for result, vector in zip(results, snapshot.vectors.read_rows(rows))]
+        return results
+
+    def embed_queries(self, queries: List[str]) -> np.ndarray:
+        """
+        Sorguları index'in vektör uzayına kodlar (varsa boyut indirgemesiyle).
+        
+        Args:
+            queries: Arama sorguları
+            
+        Returns:
+            np.ndarray: Sorgu vektörleri
+        """
+        return self._embed(queries)
+
+    def evaluate_recall(self, queries: List[str], k: int = 4) -> float:
+        """
+        Mevcut index'in recall@k değerini tam hassasiyetli kaba kuvvet
+        aramasına göre ölçer.
+        
+        Args:
+            queries: Örnek sorgular
+            k: Karşılaştırılacak sonuç sayısı
+            
+        Returns:
+            float: Ortalama recall@k (0-1 arası)
+        """
+        snapshot = self._snapshot
+        if not queries or not snapshot.rows:
+            return 1.0
+        
+        query_vectors = self._embed(queries)
+        # Silinmiş satırlar hariç kaba kuvvet araması
+        live = np.flatnonzero(snapshot.live_mask())
+        _, exact = self._search_subset(query_vectors, k, live, snapshot)
+        _, approx = self._search_vectors(query_vectors, k, snapshot=snapshot)
+        
+        hits = [
+            len(set(e[e >= 0]) & set(a[a >= 0])) / max(1, len(e[e >= 0]))
+            for e, a in zip(exact, approx)
+        ]
+        return float(np.mean(hits))
+
+    def set_search_params(
+        self,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None
+    ) -> None:
+        """
+        Recall / gecikme dengesi için arama parametrelerini günceller.
+        
+        Args:
+            nprobe: IVF modlarında taranacak küme sayısı
+            ef_search: HNSW arama kuyruğu genişliği
+        """
+        if nprobe is not None:
+            self.nprobe = nprobe
+        if ef_search is not None:
+            self.ef_search = ef_search
+        # Skaler parametreler yayınlanmış index'te yerinde güncellenir
+        apply_search_params(self._snapshot.index, self.nprobe, self.ef_search)
+
+    def rebuild_index(
+        self,
+        mode: Optional[str] = None,
+        storage: Optional[str] = None
+    ) -> None:
+        """
+        Index'i kayıtlı vektörlerden istenen mod ve kodlamada yeniden kurar.
+        
+        Eğitim ve ekleme kilit dışında yapılır; bu sırada gelen eklemeler
+        eski sürümde aranır ve değişim anında yeni sürümün delta index'ine
+        aktarılır.
+        
+        Args:
+            mode: Index modu (None ise vektör sayısına göre seçilir)
+            storage: Vektör kodlaması (None ise self.storage)
+        """
+        snapshot = self._snapshot
+        rows = snapshot.rows
+        target_mode, target_storage = self._target_spec(rows)
+        mode = effective_mode(mode or target_mode, rows)
+        storage = effective_storage(storage or target_storage, mode, rows)
+        
+        vectors = snapshot.vectors.read_vectors(0, rows) if rows else np.zeros((0, self.dimension), dtype=np.float32)
+        new_index = build_index(mode, self.dimension, vectors, storage)
+        apply_search_params(new_index, self.nprobe, self.ef_search)
+        
+        with self._write_lock:
+            current = self._snapshot
+            # Kurulum sırasında satırlar yeniden numaralandıysa sonuç geçersiz
+            if current.generation != snapshot.generation:
+                return
+            
+            # Eğitilmiş index'i kaydet (yüklemede yeniden eğitim gerekmesin)
+            if (mode, storage) != ("flat", "float32"):
+                self.store.save_index(new_index, rows, mode, storage)
+            else:
+                self.store.drop_index()
+            
+            # Kurulum sırasında eklenen satırlar yeni sürümün delta index'ine
+            delta = None
+            if current.rows > rows:
+                delta = faiss.IndexFlatL2(self.dimension)
+                delta.add(current.vectors.read_vectors(rows, current.rows))
+            self._publish(index=new_index, delta=delta, mode=mode, storage=storage, trained_rows=rows)
+
+    def wait_for_rebuild(self) -> None:
+        """Çalışan arka plan index kurulumunun bitmesini bekler."""
+        thread = self._rebuild_thread
+        if thread is not None:
+            thread.join()
+
+    def _target_spec(self, rows: int) -> Tuple[str, str]:
+        """Vektör sayısı için hedeflenen (index modu, kodlama) çiftini döndürür."""
+        mode = choose_index_mode(rows) if self.index_mode == "auto" else self.index_mode
+        mode = effective_mode(mode, rows)
+        return mode, effective_storage(self.storage, mode, rows)
+
+    def _needs_rebuild(self) -> bool:
+        """Eşik aşıldığında (mod/kodlama değişimi veya eğitilmiş index büyümesi) True döndürür."""
+        snapshot = self._snapshot
+        rows = snapshot.rows
+        if self._target_spec(rows) != (snapshot.mode, snapshot.storage):
+            return True
+        trained = snapshot.mode.startswith("ivf") or snapshot.storage in ("sq8", "pq")
+        return trained and rows > self.retrain_factor * max(snapshot.trained_rows, 1)
+
+    def _search_vectors(
+        self,
+        query_vectors: np.ndarray,
+        k: int,
+        filter: Optional[Dict[str, Any]] = None,
+        snapshot: Optional[IndexSnapshot] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Anlık görüntünün ana ve delta index'lerinde arar ve sonuçları birleştirir.
+        
+        Filtre ve silinmiş satırlar FAISS ID seçicisine derlenir; gerekiyorsa
+        adaylar tam hassasiyetle yeniden sıralanır.
+        """
+        snapshot = snapshot or self._snapshot
+        mask = None
+        if filter or snapshot.deleted is not None:
+            # Silinmiş satırlar filtreyle aynı seçici üzerinden maskelenir
+            mask = snapshot.live_mask()
+            if filter:
+                mask &= snapshot.metadata.mask(filter, rows=snapshot.rows)
+            selected = np.flatnonzero(mask)
+            
+            # Seçici filtrelerde yalnızca uyan satırlar üzerinde kesin arama yapılır
+            if len(selected) <= self.filter_brute_force_limit:
+                return self._search_subset(query_vectors, k, selected, snapshot)
+        
+        base_rows = snapshot.base_rows
+        # ID seçiciyi desteklemeyen IndexPQ'da maske fazladan aday alınarak uygulanır
+        base_mask = None
+        params = None
+        if mask is not None and snapshot.mode == "flat" and snapshot.storage == "pq":
+            base_mask = mask[:base_rows]
+        elif mask is not None:
+            params = self._mask_parameters(mask[:base_rows], snapshot.mode)
+        if self._should_rerank(snapshot):
+            result = self._search_reranked(query_vectors, k, snapshot, params, base_mask)
+        elif base_mask is not None:
+            result = self._search_masked(query_vectors, k, snapshot.index, base_mask)
+        elif params is not None:
+            result = snapshot.index.search(query_vectors, k, params=params)
+        else:
+            result = snapshot.index.search(query_vectors, k)
+        
+        if snapshot.delta is None:
+            return result
+        
+        # Delta index'i ana index'ten sonraki satırları kesin olarak arar
+        if mask is not None:
+            params = self._mask_parameters(mask[base_rows:], "flat")
+            delta_distances, delta_indices = snapshot.delta.search(query_vectors, k, params=params)
+        else:
+            delta_distances, delta_indices = snapshot.delta.search(query_vectors, k)
+        delta_indices = np.where(delta_indices >= 0, delta_indices + base_rows, -1)
+        return self._merge_results(result, (delta_distances, delta_indices), k)
+
+    def _mask_parameters(self, mask: np.ndarray, mode: str) -> faiss.SearchParameters:
+        """Satır maskesini bitmap ID seçicili arama parametrelerine çevirir."""
+        bitmap = np.packbits(mask, bitorder="little")
+        params = self._search_parameters(faiss.IDSelectorBitmap(len(mask), faiss.swig_ptr(bitmap)), mode)
+        # Bitmap, arama bitene kadar canlı kalmalı
+        params.bitmap = bitmap
+        return params
+
+    def _search_parameters(self, selector: faiss.IDSelector, mode: str) -> faiss.SearchParameters:
+        """Index moduna uygun, ID seçicili arama parametreleri."""
+        if mode.startswith("ivf"):
+            return faiss.SearchParametersIVF(sel=selector, nprobe=self.nprobe)
+        if mode == "hnsw":
+            return faiss.SearchParametersHNSW(sel=selector, efSearch=self.ef_search)
+        return faiss.SearchParameters(sel=selector)
+
+    @staticmethod
+    def _merge_results(
+        first: Tuple[np.ndarray, np.ndarray],
+        second: Tuple[np.ndarray, np.ndarray],
+        k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """İki (mesafeler, indeksler) sonucunu sorgu başına ilk k'da birleştirir."""
+        distances = np.concatenate([first[0], second[0]], axis=1)
+        indices = np.concatenate([first[1], second[1]], axis=1)
+        distances = np.where(indices >= 0, distances, np.inf)
+        order = np.argsort(distances, axis=1, kind="stable")[:, :k]
+        return np.take_along_axis(distances, order, axis=1), np.take_along_axis(indices, order, axis=1)
+
+    @staticmethod
+    def _search_masked(
+        query_vectors: np.ndarray,
+        k: int,
+        index: faiss.Index,
+        mask: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        ID seçicisini desteklemeyen index'te maskeyi fazladan aday alarak uygular.
+        
+        Aday sayısı canlı satır oranına göre büyütülür; maskeyle süzüldükten
+        sonra bir sorgu için k aday kalmazsa aday sayısı ikiye katlanarak
+        (en fazla tüm index) arama tekrarlanır. Vektörler diskten okunmaz.
+        
+        Args:
+            query_vectors: Sorgu matrisi
+            k: Sorgu başına sonuç sayısı
+            index: Aranan index
+            mask: Index satırları için aranabilirlik maskesi
+            
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: index.search ile aynı biçimde (mesafeler, indeksler)
+        """
+        distances = np.full((len(query_vectors), k), np.inf, dtype=np.float32)
+        indices = np.full((len(query_vectors), k), -1, dtype=np.int64)
+        live = int(mask.sum())
+        if not live:
+            return distances, indices
+        
+        fetch = min(index.ntotal, math.ceil(k * len(mask) / live))
+        while True:
+            found_distances, found = index.search(query_vectors, fetch)
+            keep = (found >= 0) & mask[np.maximum(found, 0)]
+            if fetch >= index.ntotal or keep.sum(axis=1).min() >= min(k, live):
+                break
+            fetch = min(index.ntotal, fetch * 2)
+        
+        for qi in range(len(query_vectors)):
+            rows = found[qi][keep[qi]][:k]
+            distances[qi, :len(rows)] = found_distances[qi][keep[qi]][:k]
+            indices[qi, :len(rows)] = rows
+        return distances, indices
+
+    def _search_subset(
+        self,
+        query_vectors: np.ndarray,
+        k: int,
+        rows: np.ndarray,
+        snapshot: IndexSnapshot
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Yalnızca verilen satırların tam hassasiyetli vektörleri üzerinde kesin arama."""
+        distances = np.full((len(query_vectors), k), np.inf, dtype=np.float32)
+        indices = np.full((len(query_vectors), k), -1, dtype=np.int64)
+        if not len(rows):
+            return distances, indices
+        
+        n = min(k, len(rows))
+        sub_distances, local = faiss.knn(query_vectors, snapshot.vectors.read_rows(rows), n)
+        distances[:, :n] = sub_distances
+        indices[:, :n] = np.where(local >= 0, rows[np.maximum(local, 0)], -1)
+        return distances, indices
+
+    def _should_rerank(self, snapshot: IndexSnapshot) -> bool:
+        """Yaklaşık mesafeler yeniden sıralanacak mı?"""
+        approximate = snapshot.storage != "float32" or snapshot.mode == "ivf_pq"
+        return self.rerank_factor > 0 and approximate
+
+    def _search_reranked(
+        self,
+        query_vectors: np.ndarray,
+        k: int,
+        snapshot: IndexSnapshot,
+        params: Optional[faiss.SearchParameters] = None,
+        mask: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Sıkıştırılmış index'ten geniş aday kümesi alır ve diskteki tam
+        hassasiyetli vektörlerle kesin L2 mesafesine göre yeniden sıralar.
+        
+        Args:
+            query_vectors: Sorgu matrisi
+            k: Sorgu başına sonuç sayısı
+            snapshot: Aranan anlık görüntü
+            params: ID seçicili arama parametreleri (filtre için)
+            mask: ID seçicisiz index'te adaylara uygulanacak ana index maskesi
+            
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: index.search ile aynı biçimde (mesafeler, indeksler)
+        """
+        if mask is not None:
+            _, candidates = self._search_masked(query_vectors, k * self.rerank_factor, snapshot.index, mask)
+        elif params is not None:
+            _, candidates = snapshot.index.search(query_vectors, k * self.rerank_factor, params=params)
+        else:
+            _, candidates = snapshot.index.search(query_vectors, k * self.rerank_factor)
+        
+        distances = np.full((len(query_vectors), k), np.inf, dtype=np.float32)
+        indices = np.full((len(query_vectors), k), -1, dtype=np.int64)
+        for qi, row in enumerate(candidates):
+            row = row[row >= 0]
+            if not len(row):
+                continue
+            exact = ((snapshot.vectors.read_rows(row) - query_vectors[qi]) ** 2).sum(axis=1)
+            order = np.argsort(exact)[:k]
+            distances[qi, :len(order)] = exact[order]
+            indices[qi, :len(order)] = row[order]
+        
+        return distances, indices
+
+    def _write(
+        self,
+        texts: List[str],
+        metadatas: Optional[List[Dict[str, Any]]],
+        ids: Optional[List[int]],
+        replace: bool,
+        embeddings: Optional[np.ndarray] = None
+    ) -> List[int]:
+        """add_texts ve upsert için ortak yazma yolu."""
+        if not texts:
+            return []
+        if ids is not None:
+            ids = [int(chunk_id) for chunk_id in ids]
+            if len(ids) != len(texts):
+                raise ValueError("Kimlik ve metin sayısı eşleşmiyor")
+            if len(set(ids)) != len(ids):
+                raise ValueError("Aynı parça kimliği birden fazla kez verildi")
+        elif replace:
+            raise ValueError("upsert için parça kimlikleri gereklidir")
+        
+        columns = MetadataStore.to_columns(metadatas, len(texts))
+        
+        # BM25 terimleri kilit dışında ayrılır
+        tokens = [tokenize(text) for text in texts] if self._snapshot.lexical is not None else None
+        
+        # Metinleri vektörlere dönüştür
+        if embeddings is None:
+            embeddings = self.embedding_model.encode(texts)
+        elif len(embeddings) != len(texts):
+            raise ValueError("Embedding ve metin sayısı eşleşmiyor")
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        
+        with self._write_lock:
+            if self.reducer is not None:
+                embeddings = self.reducer.transform(embeddings)
+            
+            if ids is not None and not replace:
+                existing = [chunk_id for chunk_id in ids if chunk_id in self.ids]
+                if existing:
+                    raise ValueError(f"Parça kimlikleri zaten var: {existing[:5]}")
+            
+            # Hatalı metadata diske hiçbir şey yazılmadan reddedilir
+            self.metadata.validate(columns)
+            
+            # Sadece yeni partiyi kaydet (metinler commit sonrası görünür olur)
+            ids = self._save(embeddings, texts, columns, ids)
+            # Metadata ve BM25 index'i yerinde sona eklenir; yayınlanmış sürümler
+            # yalnızca kendi satır sayılarına kadar okuduğundan yeni satırları görmez
+            self.metadata.extend_columns(columns, len(texts))
+            if self._snapshot.lexical is not None:
+                self._snapshot.lexical.add_tokens(tokens)
+            
+            # Upsert: aynı kimliğin eski satırı yeni satır kaydedildikten sonra silinir
+            superseded = self.ids.append(ids)
+            self.store.delete(superseded)
+            
+            # Yeni sürümü kur ve yayınla; aramalar bu ana kadar eski sürümü görür
+            self._publish(data_changed=True, **self._grow(embeddings))
+        
+        self._maybe_rebuild()
+        if superseded:
+            self._maybe_purge()
+        return ids
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        """Metinleri kodlar ve varsa boyut indirgemesini uygular."""
+        embeddings = self.embedding_model.encode(texts)
+        if self.reducer is None:
+            return embeddings
+        return self.reducer.transform(embeddings)
+
+    def _grow(self, vectors: np.ndarray) -> Dict[str, Any]:
+        """
+        Yeni vektörleri içeren sonraki index sürümünü kurar (_write_lock altında).
+        
+        Yayınlanmış index'ler değiştirilmez: küçük delta index'i kopyalanıp
+        genişletilir; delta sınırı aşınca ana index'in kopyasına katlanır.
+        
+        Args:
+            vectors: Eklenen vektörler
+            
+        Returns:
+            Dict[str, Any]: _publish için "index" / "delta" alanları
+        """
+        snapshot = self._snapshot
+        delta_rows = snapshot.delta.ntotal if snapshot.delta is not None else 0
+        if delta_rows + len(vectors) > max(self.delta_limit, snapshot.base_rows // 10):
+            index = faiss.clone_index(snapshot.index)
+            if delta_rows:
+                index.add(snapshot.delta.reconstruct_n(0, delta_rows))
+            index.add(vectors)
+            return {"index": index, "delta": None}
+        
+        if snapshot.delta is not None:
+            delta = faiss.clone_index(snapshot.delta)
+        else:
+            delta = faiss.IndexFlatL2(self.dimension)
+        delta.add(vectors)
+        return {"delta": delta}
+
+    def _publish(self, data_changed: bool = False, **changes: Any) -> None:
+        """
+        Güncel sürümden, verilen alanları değiştirerek yeni anlık görüntü
+        kurar ve tek atamayla yayınlar (_write_lock altında çağrılır).
+        
+        Args:
+            data_changed: Satırlar eklendi, silindi veya temizlendiyse True
+                (veri sürümü artar; yalnızca index yeniden kurulduysa False)
+            **changes: Değişen IndexSnapshot alanları
+        """
+        current = self._snapshot
+        fields = {
+            "index": current.index,
+            "delta": current.delta,
+            "mode": current.mode,
+            "storage": current.storage,
+            "trained_rows": current.trained_rows,
+            "deleted": current.deleted,
+            "generation": current.generation,
+            "lexical": current.lexical,
+        }
+        fields.update(changes)
         
-        # FAISS index'ini kaydet
-        faiss.write_index(self.index, f"{self.index_path}.index")
+        # Silinmiş satır maskesi yalnızca değiştiğinde kopyalanır
+        if "deleted" not in changes and self.ids.version != self._published_deletes:
+            fields["deleted"] = self.ids.deleted.copy() if self.ids.deleted_count else None
+            self._published_deletes = self.ids.version
         
-        # Metinleri kaydet
-        with open(f"{self.index_path}.pkl", "wb") as f:
-            pickle.dump(self.texts, f)
+        self._snapshot = IndexSnapshot(
+            texts=self.texts.view(),
+            vectors=self.store.view(current.vectors),
+            metadata=self.metadata,
+            version=current.version + 1,
+            data_version=current.data_version + int(data_changed),
+            **fields
+        )
+
+    def _maybe_purge(self) -> None:
+        """Silinmiş satır oranı eşiği aştıysa temizliği başlatır."""
+        if self.tombstone_threshold <= 0 or self.ids.deleted_ratio < self.tombstone_threshold:
+            return
+        if not self.background_rebuild:
+            self.purge_deleted()
+            return
+        with self._write_lock:
+            if self._purge_thread is not None and self._purge_thread.is_alive():
+                return
+            self._purge_thread = threading.Thread(
+                target=self.purge_deleted,
+                name="tombstone-purge",
+                daemon=True
+            )
+            self._purge_thread.start()
+
+    def _maybe_rebuild(self) -> None:
+        """Gerekiyorsa index'i arka planda (veya senkron) yeniden kurar."""
+        if not self._needs_rebuild():
+            return
+        if not self.background_rebuild:
+            self.rebuild_index()
+            return
+        with self._write_lock:
+            if self._rebuild_thread is not None and self._rebuild_thread.is_alive():
+                return
+            self._rebuild_thread = threading.Thread(
+                target=self.rebuild_index,
+                name="index-rebuild",
+                daemon=True
+            )
+            self._rebuild_thread.start()
+
+    def _save(
+        self,
+        embeddings: np.ndarray,
+        texts: List[str],
+        metadata: Optional[Dict[str, List[Any]]] = None,
+        ids: Optional[List[int]] = None
+    ) -> List[int]:
+        """
+        Yeni partiyi segment olarak ekler ve manifest'i commit eder.
+        
+        Args:
+            embeddings: Yeni partinin vektörleri
+            texts: Yeni partinin metinleri
+            metadata: Yeni partinin sütun düzenindeki metadata'sı
+            ids: Yeni partinin parça kimlikleri (None ise otomatik)
+            
+        Returns:
+            List[int]: Kaydedilen parça kimlikleri
+        """
+        return self.store.append(embeddings, texts, metadata, ids)
 
     def _load_if_exists(self) -> None:
-        """Kayıtlı FAISS index'i ve metinleri yükler."""
+        """Kayıtlı segmentleri, metinleri ve index anlık görüntüsünü yükler."""
+        state = self.store.load()
+        if state is not None:
+            rows = len(self.texts)
+            for segment_rows, columns in self.store.read_metadata():
+                self.metadata.extend_columns(columns, segment_rows)
+            self.ids.append(self.store.read_ids())
+            self.ids.delete_rows(self.store.read_tombstones())
+            
+            # Eğitilmiş index varsa oku, sonrasında eklenen satırları ekle
+            index = faiss.IndexFlatL2(self.dimension)
+            mode, storage, start = "flat", "float32", 0
+            saved = self.store.load_index()
+            if saved is not None:
+                index = saved
+                mode = state["index"]["mode"]
+                storage = state["index"].get("storage", "float32")
+                start = state["index"]["rows"]
+                apply_search_params(index, self.nprobe, self.ef_search)
+            # Kayıtlı vektörler başka bir boyuttaysa (izdüşüm dosyası eksik veya
+            # değiştirilmiş) aramalar sessizce yanlış sonuç vermesin
+            stored_dim = saved.d if saved is not None else (
+                self.store.read_vectors(0, 1).shape[1] if rows else self.dimension
+            )
+            if stored_dim != self.dimension:
+                raise ValueError(
+                    f"Kayıtlı vektörler {stored_dim} boyutlu, depo {self.dimension} boyutla açıldı"
+                )
+            if rows > start:
+                index.add(self.store.read_vectors(start, rows))
+            
+            # BM25 index'i kaydedilmez; metinlerden yeniden kurulur
+            if self._snapshot.lexical is not None:
+                self._snapshot.lexical.add(self.texts.view())
+            
+            with self._write_lock:
+                self._publish(data_changed=True, index=index, mode=mode, storage=storage, trained_rows=start)
+            self._maybe_rebuild()
+            return
+        
+        # Eski düzen (tek .index + .pkl dosyası) varsa yükle ve taşı
         index_file = f"{self.index_path}.index"
         texts_file = f"{self.index_path}.pkl"
         
         if os.path.exists(index_file) and os.path.exists(texts_file):
-            # FAISS index'ini yükle
-            self.index = faiss.read_index(index_file)
-            
-            # Metinleri yükle
+            legacy_index = faiss.read_index(index_file)
             with open(texts_file, "rb") as f:
-                self.texts = pickle.load(f)
+                texts = pickle.load(f)
+            
+            vectors = legacy_index.reconstruct_n(0, legacy_index.ntotal)
+            index = faiss.IndexFlatL2(self.dimension)
+            index.add(vectors)
+            self.ids.append(self.store.append(vectors, texts))
+            self.metadata.extend(None, len(texts))
+            if self._snapshot.lexical is not None:
+                self._snapshot.lexical.add(texts)
+            with self._write_lock:
+                self._publish(data_changed=True, index=index)
+            self._maybe_rebuild()
 
 class PineconeVectorStore:
-    def __init__(self, session_id, index_name="finanlyst-index", dimension=384):
+    def __init__(
+        self,
+        session_id,
+        index_name="finanlyst-index",
+        dimension=384,
+        embedding_model=None,
+        host=None,
+        api_key=None,
+        batch_size=100,
+        max_batch_bytes=2_000_000,
+        max_workers=4,
+        max_retries=5,
+        backoff=0.5,
+        max_backoff=30.0,
+        namespace=None
+    ):
+        """
+        Oturum bazlı Pinecone vektör deposu.
+        
+        Her oturumun (veya kiracının) vektörleri index içinde kendi
+        namespace'inde tutulur; sorgular ve silmeler yalnızca bu namespace'i
+        tarar, oturumu kapatmak tek bir namespace silme işlemidir.
+        
+        Args:
+            session_id: Oturum kimliği
+            index_name: Pinecone index adı
+            dimension: Vektör boyutu
+            embedding_model: Embedding modeli (None ise süreçte paylaşılan model)
+            host: Index'in veri düzlemi adresi (verilirse index listesi/oluşturma atlanır;
+                yerel test sunucusu için de kullanılır)
+            api_key: Pinecone API anahtarı (None ise PINECONE_API_KEY)
+            batch_size: Bir upsert isteğindeki en fazla vektör sayısı
+            max_batch_bytes: Bir upsert isteğinin tahmini en büyük JSON boyutu
+            max_workers: Aynı anda gönderilen en fazla upsert isteği
+            max_retries: Geçici hatada (429, 5xx, bağlantı) bir partinin yeniden deneme sayısı
+            backoff: İlk yeniden denemeden önceki bekleme (saniye, her denemede iki katına çıkar)
+            max_backoff: En uzun bekleme süresi
+            namespace: Vektörlerin tutulduğu namespace (None ise session_id)
+        """
         self.dimension = dimension  # Önce tanımla
+        self.batch_size = batch_size
+        self.max_batch_bytes = max_batch_bytes
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
         # Pinecone örneği oluştur
-        pc = Pinecone(api_key=PINECONE_API_KEY)
-
-        # Index nesnesi oluştur veya al
-        if index_name not in pc.list_indexes().names():
-            pc.create_index(
-                name=index_name,
-                dimension=self.dimension,
-                metric='cosine',
-                spec=ServerlessSpec(
-                    cloud='aws',
-                    region='us-east-1'
+        pc = Pinecone(api_key=api_key or PINECONE_API_KEY)
+
+        if host:
+            self.index = pc.Index(host=host)
+        else:
+            # Index nesnesi oluştur veya al
+            if index_name not in pc.list_indexes().names():
+                pc.create_index(
+                    name=index_name,
+                    dimension=self.dimension,
+                    metric='cosine',
+                    spec=ServerlessSpec(
+                        cloud='aws',
+                        region='us-east-1'
+                    )
                 )
-            )
-        self.index = pc.Index(index_name)
+            self.index = pc.Index(index_name)
         self.session_id = session_id
-        self.embedder = SentenceTransformer(EMBEDDING_MODEL)
+        self.namespace = namespace or str(session_id)
+        # Her upsert/silmede artar; retriever önbelleği eski sonuçları bu sayede ayırır
+        self.version = 0
+        self._version_lock = threading.Lock()
+        # Model her istekte yeniden yüklenmez; süreçte paylaşılan örnek kullanılır
+        self.embedder = embedding_model or get_embedding_model(EMBEDDING_MODEL)
 
-    def add_texts(self, texts, ids=None, metadatas=None):
-        vectors = self.embedder.encode(texts).tolist()
-        if ids is None:
-            ids = [str(self.session_id) + "_" + str(i) for i in range(len(texts))]
-        # Her embedding'e session_id metadata'sı ekle
+    def add_texts(self, texts, ids=None, metadatas=None, embeddings=None, progress=None):
+        """
+        Metinleri kodlar ve partiler halinde, paralel olarak upsert eder.
+        
+        Partiler hem vektör sayısı (batch_size) hem de tahmini istek boyutu
+        (max_batch_bytes) ile sınırlanır; en fazla max_workers istek aynı anda
+        gönderilir. Geçici hatalar üstel bekleme ile yeniden denenir.
+        
+        Args:
+            texts: Eklenecek metinler
+            ids: Vektör kimlikleri (None ise doc_id/chunk metadata'sından, yoksa rastgele üretilir)
+            metadatas: Metin başına metadata
+            embeddings: Önceden hesaplanmış embedding'ler
+            progress: Her parti bittiğinde (gönderilen, toplam) ile çağrılır
+            
+        Returns:
+            int: Upsert edilen vektör sayısı
+        """
+        if not texts:
+            return 0
+        if embeddings is None:
+            embeddings = self.embedder.encode(texts)
+        vectors = np.asarray(embeddings).tolist()
         if metadatas is None:
-            metadatas = [{"session_id": self.session_id} for _ in texts]
-        else:
-            for meta in metadatas:
-                meta["session_id"] = self.session_id
-        self.index.upsert(vectors=[(id, vec, meta) for id, vec, meta in zip(ids, vectors, metadatas)])
+            metadatas = [{} for _ in texts]
+        if ids is None:
+            # Aynı belge yeniden yüklenirse parçaları üzerine yazılır, tekrarlanmaz
+            ids = [
+                f"{meta['doc_id']}_{meta['chunk']}" if "doc_id" in meta and "chunk" in meta
+                else uuid.uuid4().hex
+                for meta in metadatas
+            ]
+        records = list(zip(ids, vectors, metadatas))
+        
+        batches = list(self._batches(records))
+        done = 0
+        errors = []
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {executor.submit(self._upsert_batch, batch): len(batch) for batch in batches}
+                for future in as_completed(futures):
+                    try:
+                        future.result()
+                    except Exception as e:
+                        errors.append(e)
+                        continue
+                    done += futures[future]
+                    if progress is not None:
+                        progress(done, len(records))
+        finally:
+            # Hata olsa da bazı partiler yazılmış olabilir
+            self._bump_version()
+        
+        if errors:
+            raise errors[0]
+        return done
+
+    def _batches(self, records):
+        """Kayıtları vektör sayısı ve tahmini JSON boyutu sınırına göre partilere böler."""
+        batch, batch_bytes = [], 0
+        for record in records:
+            record_id, values, metadata = record
+            size = len(json.dumps({"id": record_id, "values": values, "metadata": metadata}))
+            if batch and (len(batch) >= self.batch_size or batch_bytes + size > self.max_batch_bytes):
+                yield batch
+                batch, batch_bytes = [], 0
+            batch.append(record)
+            batch_bytes += size
+        if batch:
+            yield batch
+
+    def _upsert_batch(self, batch):
+        """Partiyi gönderir; geçici hatalarda üstel bekleme ile yeniden dener."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self.index.upsert(vectors=batch, namespace=self.namespace)
+            except Exception as e:
+                status = getattr(e, "status", None) or getattr(e, "status_code", None)
+                # Yalnızca 429, 5xx ve bağlantı/zaman aşımı hataları tekrarlanır;
+                # diğer HTTP hataları (ör. geçersiz boyut) ve programlama hataları hemen yükselir
+                if status is not None:
+                    retriable = status == 429 or status >= 500
+                else:
+                    retriable = isinstance(e, TRANSIENT_ERRORS)
+                if not retriable or attempt == self.max_retries:
+                    raise
+                time.sleep(min(self.backoff * 2 ** attempt, self.max_backoff))
 
     def query(self, query_text, top_k=5):
         query_vec = self.embedder.encode([query_text])[0].tolist()
-        # Sadece bu session_id'ye ait embedding'leri getir
+        # Yalnızca bu oturumun namespace'i taranır
         results = self.index.query(
-            query_vec,
+            vector=query_vec,
             top_k=top_k,
             include_metadata=True,
-            filter={"session_id": {"$eq": self.session_id}}
+            namespace=self.namespace
         )
         hits = results.get('matches', [])
         return [
@@ -168,4 +1180,64 @@ class PineconeVectorStore:
         ]
 
     def delete(self, ids):
-        self.index.delete(ids=ids)
+        try:
+            self.index.delete(ids=ids, namespace=self.namespace)
+        finally:
+            self._bump_version()
+
+    def drop_session(self):
+        """Oturumun tüm vektörlerini tek namespace silme işlemiyle kaldırır."""
+        try:
+            self.index.delete(delete_all=True, namespace=self.namespace)
+        finally:
+            self._bump_version()
+
+    def migrate_legacy_vectors(self, source_namespace="", page_size=100):
+        """
+        Eski düzende yazılmış vektörleri oturumun namespace'ine taşır (tek seferlik).
+        
+        Namespace'lerden önce tüm oturumlar varsayılan namespace'e session_id
+        metadata'sıyla yazılıyordu; bu vektörler namespace'li sorgularda
+        görünmez. Oturumun vektörleri sayfa sayfa okunur, kendi namespace'ine
+        yazılır ve ancak yazıldıktan sonra kaynaktan silinir; yarıda kalan
+        taşıma yeniden çalıştırılabilir.
+        
+        Args:
+            source_namespace: Eski vektörlerin bulunduğu namespace
+            page_size: Tek okumada alınan en fazla vektör sayısı
+            
+        Returns:
+            int: Taşınan vektör sayısı
+        """
+        moved = 0
+        try:
+            while True:
+                # Taşınan vektörler silindiğinden her tur ilk sayfa okunur
+                page = self.index.fetch_by_metadata(
+                    filter={"session_id": {"$eq": self.session_id}},
+                    namespace=source_namespace,
+                    limit=page_size
+                )
+                records = [
+                    (vector_id, list(vector.values), dict(vector.metadata or {}))
+                    for vector_id, vector in page.vectors.items()
+                ]
+                if not records:
+                    break
+                for batch in self._batches(records):
+                    self._upsert_batch(batch)
+                self.index.delete(ids=[record[0] for record in records], namespace=source_namespace)
+                moved += len(records)
+        finally:
+            if moved:
+                self._bump_version()
+        return moved
+
+    @property
+    def data_version(self) -> int:
+        """Sürüm yalnızca yazmalarla arttığından veri sürümüyle aynıdır."""
+        return self.version
+
+    def _bump_version(self):
+        with self._version_lock:
+            self.version += 1
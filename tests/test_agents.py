@@ -0,0 +1,34 @@
+from core.embedding_pool import EmbeddingPool
+
+def test_document_agent_bulk_ingest(document_agent, sample_document):
+    vector_store = document_agent.retriever.vector_store
+    before = vector_store.snapshot.rows
+    documents = [sample_document, sample_document.replace("Python", "Ruby")]
+    
+    pool = EmbeddingPool(
+        vector_store.embedding_model.model_name,
+        num_workers=2,
+        shard_size=2,
+        start_method="fork"
+    )
+    # Havuzdan gelen parçalar biriktirilip tek yazmada eklenir
+    writes = []
+    add_texts = vector_store.add_texts
+    def counting_add_texts(texts, **kwargs):
+        writes.append(len(texts))
+        return add_texts(texts, **kwargs)
+    vector_store.add_texts = counting_add_texts
+    try:
+        results = document_agent.bulk_ingest(documents, pool=pool)
+    finally:
+        pool.close()
+        del vector_store.add_texts
+    
+    assert len(results) == 2
+    assert results[0]["doc_id"] != results[1]["doc_id"]
+    chunk_count = sum(result["chunk_count"] for result in results)
+    assert vector_store.snapshot.rows == before + chunk_count
+    assert writes == [chunk_count]
+    
+    text, _ = vector_store.similarity_search("Ruby programlama dili", k=1)[0]
+    assert "Ruby" in text
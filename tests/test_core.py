@@ -0,0 +1,269 @@
+import pytest
+import os
+import threading
+import time
+import numpy as np
+from core.embeddings import EmbeddingModel
+from core.embedding_cache import EmbeddingCache
+from core.embedding_batcher import EmbeddingBatcher
+from core.embedding_backends import parity_check
+from core.embedding_pool import EmbeddingPool
+from core.model_registry import EmbeddingRegistry
+from core.session_pool import SessionPool
+
+def test_embedding_cache_hits_and_lru(temp_dir):
+    cache = EmbeddingCache(os.path.join(temp_dir, "embeddings.sqlite"), max_entries=3)
+    model = EmbeddingModel(cache=cache)
+    texts = ["Net kâr arttı", "Satışlar düştü", "Net kâr arttı"]
+    
+    first = model.encode(texts)
+    assert first.shape == (3, model.get_dimension())
+    assert np.allclose(first[0], first[2])
+    # Partide tekrar eden metin modele bir kez gönderilir
+    assert len(cache) == 2 and cache.hits == 0
+    
+    second = model.encode(texts)
+    assert np.allclose(first, second)
+    assert cache.hits == 3
+    
+    # Sınır aşılınca en uzun süredir kullanılmayan kayıt silinir
+    model.encode(["Satışlar düştü"])
+    model.encode(["Borç azaldı", "Nakit arttı"])
+    assert len(cache) == 3
+    assert 0 not in cache.get_many(model.model_name, ["Net kâr arttı"])
+    assert 0 in cache.get_many(model.model_name, ["Satışlar düştü"])
+    
+    # Önbellek yeniden açıldığında kayıtlar korunur
+    cache.close()
+    reopened = EmbeddingCache(os.path.join(temp_dir, "embeddings.sqlite"), max_entries=3)
+    assert len(reopened) == 3
+    assert 0 not in reopened.get_many("baska-model", ["Satışlar düştü"])
+    reopened.close()
+
+def test_embedding_batcher_coalesces_concurrent_calls(embedding_model):
+    batcher = EmbeddingBatcher(embedding_model, max_batch_size=16, max_wait_ms=50)
+    texts = [f"Çeyrek {i} gelir raporu" for i in range(12)]
+    
+    results = [None] * len(texts)
+    def encode(i):
+        results[i] = batcher.encode(texts[i])
+    
+    threads = [threading.Thread(target=encode, args=(i,)) for i in range(len(texts))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    batcher.close()
+    
+    expected = embedding_model.encode(texts)
+    for i, result in enumerate(results):
+        assert result.shape == (1, embedding_model.get_dimension())
+        assert np.allclose(result[0], expected[i], atol=1e-5)
+    # Eşzamanlı çağrılar daha az sayıda model çağrısında birleştirilir
+    assert batcher.encoded == len(texts)
+    assert batcher.batches < len(texts)
+
+def test_embedding_batcher_slices_large_requests(embedding_model):
+    batcher = EmbeddingBatcher(embedding_model, max_batch_size=4, max_wait_ms=1)
+    documents = [f"Rapor sayfası {i}" for i in range(40)]
+    
+    # İlk dilim, sorgu kuyruğa girene kadar bekletilir
+    calls = []
+    submitted = threading.Event()
+    encode = embedding_model.encode
+    def recording_encode(texts):
+        submitted.wait(timeout=5)
+        calls.append(list(texts))
+        return encode(texts)
+    batcher.model = type("RecordingModel", (), {"encode": staticmethod(recording_encode)})()
+    
+    bulk = batcher.submit(documents)
+    query = batcher.submit("Net kâr nedir?")
+    submitted.set()
+    result = bulk.result()
+    query_result = query.result()
+    batcher.close()
+    
+    # Büyük istek dilimlenir; arada gelen sorgu onun bitmesini beklemez
+    assert all(len(call) <= 4 for call in calls)
+    assert any("Net kâr nedir?" in call for call in calls[:3])
+    assert result.shape == (40, embedding_model.get_dimension())
+    assert np.allclose(result, encode(documents), atol=1e-5)
+    assert np.allclose(query_result[0], encode(["Net kâr nedir?"])[0], atol=1e-5)
+
+def test_embedding_batcher_restarts_once_after_fork(embedding_model):
+    batcher = EmbeddingBatcher(embedding_model, max_batch_size=16, max_wait_ms=1)
+    
+    # Fork sonrası durumu taklit et: kayıtlı süreç kimliği eşleşmez
+    restarts = []
+    start_worker = batcher._start_worker
+    def slow_start_worker():
+        restarts.append(threading.current_thread().name)
+        time.sleep(0.05)
+        start_worker()
+    batcher._start_worker = slow_start_worker
+    batcher._pid = -1
+    
+    futures = [None] * 8
+    def submit(i):
+        futures[i] = batcher.submit(f"Çeyrek {i} gelir raporu")
+    
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(len(futures))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    # Aynı anda gelen istekler tek yeni işçi görür; hiçbir istek eski kuyrukta kalmaz
+    assert len(restarts) == 1
+    assert all(future.result(timeout=5).shape == (1, embedding_model.get_dimension()) for future in futures)
+    batcher.close()
+
+def test_embedding_backend_parity_check(embedding_model):
+    texts = ["Net kâr arttı", "Satışlar düştü", "Borç azaldı", "Nakit akışı güçlü"]
+    report = parity_check(embedding_model, embedding_model, texts, k=2)
+    
+    assert report["passed"] == 1.0
+    assert report["min_cosine"] > 0.999
+    assert report["topk_overlap"] == 1.0
+    assert report["candidate_texts_per_s"] > 0
+    
+    with pytest.raises(ValueError):
+        EmbeddingModel(backend="tensorflow")
+
+def test_onnx_backend_matches_torch(embedding_model):
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("optimum")
+    texts = ["Net kâr arttı", "Satışlar düştü", "Borç azaldı", "Nakit akışı güçlü"]
+    onnx_model = EmbeddingModel(backend="onnx")
+    
+    assert onnx_model.cache_key.endswith("@onnx")
+    assert onnx_model.get_dimension() == embedding_model.get_dimension()
+    report = parity_check(embedding_model, onnx_model, texts, k=2)
+    assert report["passed"] == 1.0
+    assert report["topk_overlap"] == 1.0
+
+def test_model_registry_shares_instances():
+    registry = EmbeddingRegistry()
+    
+    # Aynı modeli isteyen eşzamanlı iş parçacıkları tek yüklemeyi paylaşır
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(registry.get("sentence-transformers/all-MiniLM-L6-v2")))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert len(set(map(id, results))) == 1
+    assert registry.get("sentence-transformers/all-MiniLM-L6-v2") is results[0]
+    assert registry.loaded() == [("sentence-transformers/all-MiniLM-L6-v2", "torch")]
+    
+    # Paylaşılan örnekle çelişen ayar sessizce yok sayılmaz
+    with pytest.raises(ValueError):
+        registry.get("sentence-transformers/all-MiniLM-L6-v2", intra_op_threads=2)
+    with pytest.raises(ValueError):
+        registry.get("sentence-transformers/all-MiniLM-L6-v2", cache=object())
+
+def test_embedding_length_bucketing(embedding_model):
+    texts = [
+        "Gelir",
+        "Şirketin yıllık raporunda net kâr, satışlar ve nakit akışı ayrıntılı olarak açıklandı " * 5,
+        "Borç oranı düştü",
+        "Faaliyet giderleri arttı ve marj daraldı",
+    ] * 3
+    budget = embedding_model.batch_token_budget
+    try:
+        embedding_model.batch_token_budget = 64
+        batches = embedding_model._plan_batches(embedding_model._token_lengths(texts))
+        bucketed = embedding_model._encode(texts)
+    finally:
+        embedding_model.batch_token_budget = budget
+    
+    # Her metin tam bir kez kodlanır ve sonuç özgün sıraya döner
+    assert sorted(np.concatenate(batches).tolist()) == list(range(len(texts)))
+    assert np.allclose(bucketed, embedding_model._encode_batch(texts), atol=1e-5)
+    
+    report = embedding_model.benchmark(texts, batch_size=4)
+    assert report["tokens"] > 0
+    assert report["bucketed_padding_ratio"] <= report["fixed_padding_ratio"]
+    assert report["bucketed_tokens_per_s"] > 0
+
+def test_embedding_pool_matches_single_process(embedding_model):
+    texts = [f"{i}. çeyrekte gelir {i * 10} milyon TL oldu" for i in range(10)]
+    # Test süreci modeli zaten yüklediği için işçiler fork ile açılır
+    pool = EmbeddingPool(embedding_model.model_name, num_workers=2, shard_size=3, start_method="fork")
+    try:
+        assert pool.get_dimension() == embedding_model.get_dimension()
+        starts = sorted(start for start, _ in pool.iter_encode(texts))
+        embeddings = pool.encode(texts)
+    finally:
+        pool.close()
+    
+    assert starts == [0, 3, 6, 9]
+    assert np.allclose(embeddings, embedding_model.encode(texts), atol=1e-5)
+
+def test_embedding_pool_uses_model_cache(temp_dir):
+    cache = EmbeddingCache(os.path.join(temp_dir, "embeddings.sqlite"))
+    model = EmbeddingModel(cache=cache)
+    texts = [f"{i}. çeyrekte gider {i * 5} milyon TL oldu" for i in range(7)]
+    expected = model.encode(texts[:4])
+    
+    # Havuz modelin arka ucunu, önbelleğini ve anahtarını devralır
+    pool = EmbeddingPool.from_model(model, num_workers=2, shard_size=2, start_method="fork")
+    try:
+        assert pool.cache is cache and pool.cache_key == model.cache_key
+        embeddings = pool.encode(texts)
+        hits = cache.hits
+        # İkinci kodlamada tüm metinler önbellekten gelir
+        assert np.allclose(pool.encode(texts), embeddings)
+        assert cache.hits - hits == len(texts)
+    finally:
+        pool.close()
+    
+    assert np.allclose(embeddings[:4], expected, atol=1e-5)
+    assert np.allclose(embeddings, model.encode(texts), atol=1e-5)
+    cache.close()
+
+def test_session_pool_reuse_and_eviction():
+    now = [0.0]
+    built, evicted = [], []
+    def build(session_id):
+        built.append(session_id)
+        return {"session_id": session_id}
+    
+    pool = SessionPool(
+        build,
+        max_sessions=2,
+        ttl=60,
+        on_evict=lambda session_id, _: evicted.append(session_id),
+        clock=lambda: now[0]
+    )
+    first = pool.get("a")
+    assert pool.get("a") is first
+    pool.get("b")
+    pool.get("a")
+    # Boyut aşılınca en uzun süredir kullanılmayan oturum çıkarılır
+    pool.get("c")
+    assert evicted == ["b"] and len(pool) == 2
+    
+    # Boşta kalan oturumlar TTL ile çıkarılır ve yeniden kurulur
+    now[0] = 61
+    pool.get("a")
+    assert evicted == ["b", "a", "c"] and len(pool) == 1
+    assert built == ["a", "b", "c", "a"]
+    
+    stats = pool.stats()
+    assert stats["hits"] == 2 and stats["misses"] == 4
+    assert stats["hit_rate"] == pytest.approx(2 / 6)
+    
+    # Aynı oturumun eşzamanlı istekleri tek kurulumu paylaşır
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(pool.get("d"))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(map(id, results))) == 1 and built.count("d") == 1
@@ -1,8 +1,19 @@
+import time
+import numpy as np
+import pandas as pd
 import pytest
 from core.embeddings import EmbeddingModel
 from core.llm_client import LLMClient
 from rag.vector_store import VectorStore
 from rag.retriever import RAGRetriever
+from rag.fusion import reciprocal_rank_fusion
+from rag.mmr import maximal_marginal_relevance
+from rag.retrieval_cache import RetrievalCache
+from rag.context_builder import ContextBuilder
+from rag.query_expansion import QueryExpander, LLMQueryExpander
+from rag.lexical_index import tokenize
+import rag.reranker as reranker_module
+from rag.reranker import CrossEncoderReranker
 
 @pytest.fixture
 def embedding_model():
@@ -82,4 +93,211 @@ def test_query_flow(retriever, vector_store):
     
     # Kaynak sayısını kontrol et
     assert len(result["sources"]) <= retriever.top_k
-    assert len(result["similarity_scores"]) <= retriever.top_k 
\ No newline at end of file
+    assert len(result["similarity_scores"]) <= retriever.top_k
+
+def test_tokenize_turkish_financial_terms():
+    tokens = tokenize("THYAO'nun 2023 net kârı 1.250,50 milyon TL ve IFRS 16 için 102.01 hesabı")
+    
+    assert "thyao" in tokens and "ifrs" in tokens
+    assert "1.250,50" in tokens and "102.01" in tokens
+    assert "ve" not in tokens and "için" not in tokens
+    # Büyük harfli kısaltmalar ve Türkçe İ/I küçük harfli yazımla aynı terime düşer
+    assert tokenize("IŞIK İNŞAAT ISCTR") == tokenize("ışık inşaat isctr") == ["işik", "inşaat", "isctr"]
+
+def test_hybrid_retrieval_fuses_bm25(embedding_model, llm_client, temp_dir):
+    store = VectorStore(
+        embedding_model=embedding_model,
+        index_path=f"{temp_dir}/hybrid",
+        tombstone_threshold=0,
+        lexical_index=True
+    )
+    texts = [
+        "Şirketin nakit akışı bu çeyrekte güçlü seyretti",
+        "ASELS hisse kodlu şirketin brüt kâr marjı yükseldi",
+        "Faaliyet giderleri beklentinin üzerinde gerçekleşti",
+        "Nakit ve nakit benzerleri hesabı 102 kodunda izlenir",
+    ]
+    try:
+        store.add_texts(texts)
+        store.delete([3])
+        
+        lexical = store.lexical_search("asels marjı", k=2)
+        assert lexical[0][0] == texts[1] and lexical[0][1] > 0
+        # Silinmiş satırlar BM25 sonuçlarında da görünmez
+        assert store.lexical_search("102 kodunda", k=2) == []
+        # BM25 index'i varsayılan olarak kapalıdır; hibrit arama yalnızca yoğun sonuçları kullanır
+        assert not VectorStore(embedding_model=embedding_model, index_path=f"{temp_dir}/dense").lexical_enabled
+        
+        retriever = RAGRetriever(store, llm_client, top_k=2, similarity_threshold=0.8, hybrid=True)
+        dense = store.similarity_search("ASELS marjı", k=4)
+        results = retriever._select("ASELS marjı", dense)
+        assert len(results) == 2 and results[0][0] == texts[1]
+        # İki aramada da bulunan parça yoğun mesafesini korur ve benzerlik eşiğine tabidir
+        assert results[0][1] == dict(dense)[texts[1]]
+        
+        # Yoğun aramanın kaçırdığı parça yalnızca BM25 eşiğini geçerse eklenir
+        missed = [result for result in dense if result[0] != texts[1]]
+        assert (texts[1], None) in retriever._select("ASELS marjı", missed)
+        assert texts[1] in retriever._format_context([(texts[1], None)])
+        retriever.lexical_threshold = lexical[0][1] + 1.0
+        assert texts[1] not in [text for text, _ in retriever._select("ASELS marjı", missed)]
+    finally:
+        store.wait_for_rebuild()
+        store.store.wait_for_compaction()
+    
+    assert reciprocal_rank_fusion([["a", "b"], ["b", "c"]], k=1) == [("b", 1 / 3 + 1 / 2), ("a", 1 / 2), ("c", 1 / 3)]
+
+class _OverlapCrossEncoder:
+    """Sorguyla ortak kelime sayısını puan olarak veren test modeli."""
+    def __init__(self, model_name, max_length=None):
+        self.delay = 0.0
+        self.fail = False
+    
+    def predict(self, pairs, batch_size=None):
+        if self.fail:
+            raise RuntimeError("model hatası")
+        time.sleep(self.delay)
+        return [len(set(query.split()) & set(text.split())) for query, text in pairs]
+
+def test_cross_encoder_rerank_budget_and_fallback(monkeypatch):
+    monkeypatch.setattr(reranker_module, "CrossEncoder", _OverlapCrossEncoder)
+    reranker = CrossEncoderReranker(batch_size=2, time_budget_ms=1000)
+    results = [("a b", 0.1), ("c d", 0.2), ("x y z", 0.3), ("x y", 0.4), ("x", 0.5)]
+    
+    # Tüm adaylar puanlanır; yoğun arama mesafeleri korunur
+    assert reranker.rerank("x y z", results, 3) == [("x y z", 0.3), ("x y", 0.4), ("x", 0.5)]
+    
+    # Bütçe ilk partiden sonra doluyor: kalan adaylar yoğun sırayla eklenir
+    reranker.model.delay = 0.05
+    reranker.time_budget = 0.08
+    assert reranker.rerank("x y z", results, 3) == [("a b", 0.1), ("c d", 0.2), ("x y z", 0.3)]
+    assert reranker.budget_exceeded == 1
+    
+    # Model hatasında yoğun sıra aynen kullanılır
+    reranker.model.fail = True
+    assert reranker.rerank("x y z", results, 2) == results[:2]
+    assert reranker.failures == 1
+
+def test_mmr_skips_repeated_paragraphs(embedding_model, llm_client, temp_dir):
+    store = VectorStore(embedding_model=embedding_model, index_path=f"{temp_dir}/mmr")
+    texts = [
+        "Net satışlar yüzde 12 arttı ilk çeyrek raporu",
+        "Net satışlar yüzde 12 arttı ilk çeyrek özeti",
+        "Borçluluk oranı geriledi ve satışlar arttı",
+    ]
+    try:
+        store.add_texts(texts)
+        question = "net satışlar arttı"
+        
+        plain = RAGRetriever(store, llm_client, top_k=2, similarity_threshold=2.5, hybrid=False)
+        assert [text for text, _ in plain._retrieve([question])[0]] == texts[:2]
+        
+        diverse = RAGRetriever(store, llm_client, top_k=2, similarity_threshold=2.5, hybrid=False, mmr_lambda=0.3)
+        results = diverse._retrieve([question])[0]
+        assert {text for text, _ in results} == {texts[0], texts[2]}
+        # Mesafeler yoğun aramadan geldiği gibi korunur
+        assert all(isinstance(distance, float) for _, distance in results)
+    finally:
+        store.wait_for_rebuild()
+        store.store.wait_for_compaction()
+    
+    # λ=1 yalnızca alakaya bakar; aynı vektörler çeşitlilikle geriye düşer
+    vectors = np.array([[1.0, 0.0], [1.0, 0.0], [0.8, 0.6]])
+    assert maximal_marginal_relevance(np.array([1.0, 0.0]), vectors, 2, lambda_mult=1.0) == [0, 1]
+    assert maximal_marginal_relevance(np.array([1.0, 0.0]), vectors, 2, lambda_mult=0.3) == [0, 2]
+
+def test_retrieval_cache_invalidated_by_writes(embedding_model, llm_client, temp_dir):
+    store = VectorStore(embedding_model=embedding_model, index_path=f"{temp_dir}/cache")
+    cache = RetrievalCache(max_entries=2)
+    retriever = RAGRetriever(store, llm_client, top_k=2, similarity_threshold=2.5, cache=cache)
+    try:
+        store.add_texts(["Net kâr 2023 yılında arttı", "Faaliyet giderleri azaldı"])
+        first = retriever._retrieve(["Net kâr nedir?"])[0]
+        
+        # Büyük/küçük harf, boşluk ve son noktalama farkı aynı kayda düşer
+        assert retriever._retrieve(["  net KÂR   nedir"])[0] == first
+        assert (cache.hits, cache.misses) == (1, 1)
+        
+        # Index yeniden kurulumu veriyi değiştirmez; önbellek korunur
+        store.rebuild_index(mode="flat")
+        assert store.version > store.data_version
+        assert retriever._retrieve(["Net kâr nedir?"])[0] == first
+        assert (cache.hits, cache.misses) == (2, 1)
+        
+        # Yazma sürümü artırır; eski sonuç bir daha dönmez
+        store.add_texts(["Net kâr marjı geriledi"])
+        assert "Net kâr marjı geriledi" in [text for text, _ in retriever._retrieve(["Net kâr nedir?"])[0]]
+        assert cache.stats()["misses"] == 2
+    finally:
+        store.wait_for_rebuild()
+        store.store.wait_for_compaction()
+
+def test_context_builder_budget_and_dedup(vector_store, llm_client):
+    builder = ContextBuilder(token_budget=40)
+    chunks = [
+        "Şirketin net kârı 2023 yılında 1.250,5 milyon TL oldu. Yönetim kurulu yeni üyeler seçti.",
+        # Örtüşen parça aynı cümleyi tekrar getirir
+        "Yönetim kurulu yeni üyeler seçti. Şirketin net kârı 2023 yılında 1.250,5 milyon TL oldu.",
+        "Faaliyet giderleri azaldı.",
+    ]
+    context = builder.build("Net kâr ne kadar?", chunks)
+    
+    # Yalnızca soruyla ilgili cümle bir kez alınır; terim paylaşmayan parça bütçeye sığdığı kadar girer
+    assert context.count("1.250,5 milyon") == 1
+    assert "Yönetim kurulu" not in context
+    assert sum(builder.count_tokens(context.split("\n\n"))) <= 40
+    
+    # Retriever eşik filtresinden sonra bağlamı kurucuya bırakır
+    retriever = RAGRetriever(vector_store, llm_client, similarity_threshold=0.8, context_builder=builder)
+    assert retriever._format_context([(chunks[0], 0.5), (chunks[2], 0.9)], "net kâr") == (
+        "İlgili bilgi: Şirketin net kârı 2023 yılında 1.250,5 milyon TL oldu."
+    )
+    
+    # Bütçeyi aşan tabloda talimatla ilgili satırlar korunur
+    frame = pd.DataFrame({"hisse": [f"HISSE{i}" for i in range(50)] + ["ASELS"], "fiyat": list(range(51))})
+    table = builder.fit_table(frame, "ASELS fiyatı")
+    assert "ASELS" in table and "satır gösterilmedi" in table
+    assert builder.count_tokens([table])[0] <= 40
+
+class _VariantLLM:
+    def __init__(self, response):
+        self.response = response
+        self.calls = 0
+    
+    def generate(self, prompt, max_tokens=128):
+        self.calls += 1
+        if self.response is None:
+            raise Exception("API hatası")
+        return self.response
+
+def test_query_expansion_fused_in_one_batch(embedding_model, llm_client, temp_dir, monkeypatch):
+    expander = QueryExpander()
+    assert expander.expand("Net kâr ne oldu?")[:2] == ["Net kâr ne oldu?", "net dönem kârı ne oldu?"]
+    assert "borç yüzde 12" in " ".join(expander.expand("Borçları %12 arttı mı"))
+    
+    # LLM varyantları tüm sorular için tek çağrıda üretilir; hata durumunda özgün soru kalır
+    llm = _VariantLLM("1: hasılat ne kadar\n2: borç durumu\nboş satır\n1: satış gelirleri")
+    assert LLMQueryExpander(llm).expand_batch(["ciro", "borç"]) == [
+        ["ciro", "hasılat ne kadar", "satış gelirleri"], ["borç", "borç durumu"]
+    ]
+    assert llm.calls == 1
+    assert LLMQueryExpander(_VariantLLM(None)).expand_batch(["ciro"]) == [["ciro"]]
+    
+    store = VectorStore(embedding_model=embedding_model, index_path=f"{temp_dir}/expansion")
+    texts = ["ciro ne oldu sorusu sık sorulur", "ciro ne oldu diye soruldu", "hasılat"]
+    try:
+        store.add_texts(texts)
+        plain = RAGRetriever(store, llm_client, top_k=2, hybrid=False)
+        assert [text for text, _ in plain._retrieve(["ciro ne oldu"])[0]] == [texts[1], texts[0]]
+        
+        searches = []
+        search_batch = store.similarity_search_batch
+        monkeypatch.setattr(store, "similarity_search_batch", lambda **kwargs: searches.append(kwargs) or search_batch(**kwargs))
+        expander = LLMQueryExpander(_VariantLLM("1: hasılat\n1: hasılat tutarı"))
+        expanded = RAGRetriever(store, llm_client, top_k=2, hybrid=False, query_expander=expander)
+        # Farklı ifade edilen parça varyantlar sayesinde bulunur; tüm varyantlar tek aramada
+        assert texts[2] in [text for text, _ in expanded._retrieve(["ciro ne oldu"])[0]]
+        assert [call["queries"] for call in searches] == [["ciro ne oldu", "hasılat", "hasılat tutarı"]]
+    finally:
+        store.wait_for_rebuild()
+        store.store.wait_for_compaction()
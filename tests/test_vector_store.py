@@ -1,8 +1,20 @@
 import pytest
 import os
 import shutil
+import threading
+import time
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+from pinecone.exceptions import PineconeApiValueError
 from core.embeddings import EmbeddingModel
-from rag.vector_store import VectorStore
+from rag.vector_store import VectorStore, PineconeVectorStore
+from rag.segment_store import SegmentStore
+from rag.text_store import TextStore
+from rag.metadata_store import MetadataStore
+from rag.reduction import DimensionReducer, reduction_report
+from rag.sharded_store import ShardedVectorStore
+from rag.index_factory import build_index, choose_index_mode, effective_mode, factory_string
 
 @pytest.fixture
 def embedding_model():
@@ -16,12 +28,16 @@ def vector_store(embedding_model):
     
     store = VectorStore(
         embedding_model=embedding_model,
-        index_path=f"{test_dir}/test_index"
+        index_path=f"{test_dir}/test_index",
+        lexical_index=True
     )
     
     yield store
     
-    # Test sonrası temizlik
+    # Test sonrası temizlik (arka plan işleri dosyaları değiştirmeden önce biter)
+    store.wait_for_rebuild()
+    store.wait_for_purge()
+    store.store.wait_for_compaction()
     shutil.rmtree(test_dir)
 
 def test_embedding_model(embedding_model):
@@ -84,4 +100,632 @@ def test_vector_store_persistence(vector_store):
     
     # Verilerin yüklendiğini kontrol et
     assert len(new_store.texts) == len(texts)
-    assert new_store.texts == texts 
\ No newline at end of file
+    assert list(new_store.texts) == texts 
+
+def test_vector_store_incremental_segments(vector_store):
+    # Her add_texts çağrısı yeni bir segment eklemeli
+    vector_store.add_texts(["Birinci parti"])
+    vector_store.add_texts(["İkinci parti", "Üçüncü metin"])
+    
+    segments = vector_store.store._manifest["segments"]
+    assert [seg["rows"] for seg in segments] == [1, 2]
+    
+    new_store = VectorStore(
+        embedding_model=vector_store.embedding_model,
+        index_path=vector_store.index_path
+    )
+    assert new_store.index.ntotal == 3
+    assert list(new_store.texts) == ["Birinci parti", "İkinci parti", "Üçüncü metin"]
+
+def test_segment_store_recovery_and_compaction(temp_dir):
+    path = os.path.join(temp_dir, "segments")
+    store = SegmentStore(path, max_segments=2, background_compaction=False)
+    
+    for i in range(3):
+        store.append(np.full((2, 4), i, dtype=np.float32), [f"metin {i}a", f"metin {i}b"])
+    
+    # Üçüncü segment eşiği aştığı için tek segmentte birleştirilmiş olmalı
+    assert len(store._manifest["segments"]) == 1
+    
+    # Commit edilmemiş metin kuyruğu ve yarım segment yüklemede yok sayılmalı
+    with open(store.texts.blob_path, "ab") as f:
+        f.write("yarım kayıt".encode("utf-8"))
+    np.save(os.path.join(path, "seg-999999.npy"), np.zeros((1, 4), dtype=np.float32))
+    
+    reloaded = SegmentStore(path)
+    state = reloaded.load()
+    assert reloaded.read_vectors().shape == (6, 4)
+    assert reloaded.read_vectors(3, 5)[:, 0].tolist() == [1, 2]
+    assert state["texts"][-1] == "metin 2b"
+    assert os.path.getsize(store.texts.blob_path) == state["texts"].nbytes
+    assert not os.path.exists(os.path.join(path, "seg-999999.npy"))
+
+def test_segment_store_rewrite_keeps_concurrent_writes(temp_dir):
+    path = os.path.join(temp_dir, "segments")
+    store = SegmentStore(path, background_compaction=False)
+    for i in range(2):
+        store.append(np.full((2, 4), i, dtype=np.float32), [f"metin {i}a", f"metin {i}b"])
+    store.delete([1])
+    
+    # Kopyalama sürerken yeni parti eklenir ve iki satır daha silinir
+    read_rows = store.read_rows
+    def read_rows_with_writes(rows):
+        store.append(np.full((2, 4), 9, dtype=np.float32), ["yeni a", "yeni b"])
+        store.delete([2, 5])
+        return read_rows(rows)
+    store.read_rows = read_rows_with_writes
+    
+    store.rewrite(np.array([True, False, True, True]))
+    assert store.read_vectors()[:, 0].tolist() == [0, 1, 1, 9, 9]
+    assert store.texts.view()[:] == ["metin 0a", "metin 1a", "metin 1b", "yeni a", "yeni b"]
+    assert store.read_tombstones().tolist() == [1, 4]
+    
+    reloaded = SegmentStore(path)
+    state = reloaded.load()
+    assert list(state["texts"]) == ["metin 0a", "metin 1a", "metin 1b", "yeni a", "yeni b"]
+    assert reloaded.read_tombstones().tolist() == [1, 4]
+    assert reloaded.read_ids().tolist() == [0, 2, 3, 4, 5]
+
+def test_index_factory_modes():
+    assert choose_index_mode(100) == "flat"
+    assert choose_index_mode(200_000) == "hnsw"
+    assert choose_index_mode(5_000_000) == "ivf_pq"
+    # Eğitim verisi yetersizse IVF modları flat'e düşer
+    assert effective_mode("ivf_flat", 10) == "flat"
+    
+    vectors = np.random.RandomState(0).rand(2000, 16).astype(np.float32)
+    for mode in ["flat", "ivf_flat", "ivf_pq", "hnsw"]:
+        index = build_index(mode, 16, vectors)
+        assert index.ntotal == len(vectors)
+        _, indices = index.search(vectors[:1], 1)
+        assert indices[0][0] == 0
+
+def test_index_factory_storage_modes():
+    vectors = np.random.RandomState(0).rand(2000, 16).astype(np.float32)
+    assert factory_string("flat", 16, 2000, "sq8") == "SQ8"
+    assert factory_string("hnsw", 16, 2000, "fp16") == "HNSW32,SQfp16"
+    # Eğitim verisi yetersizse sıkıştırma uygulanmaz
+    assert factory_string("flat", 16, 10, "pq") == "Flat"
+    
+    for storage in ["fp16", "sq8", "pq"]:
+        index = build_index("flat", 16, vectors, storage)
+        assert index.ntotal == len(vectors)
+        assert index.sa_code_size() < 16 * 4
+
+def test_pq_storage_masks_deleted_rows_without_brute_force(vector_store, monkeypatch):
+    dim = vector_store.embedding_model.get_dimension()
+    vectors = np.random.RandomState(0).rand(1200, dim).astype(np.float32)
+    store = VectorStore(
+        embedding_model=vector_store.embedding_model,
+        index_path=f"{vector_store.index_path}_pq",
+        index_mode="flat",
+        storage="pq",
+        filter_brute_force_limit=100,
+        background_rebuild=False,
+        tombstone_threshold=0
+    )
+    store.add_texts([f"Parça {i}" for i in range(len(vectors))], embeddings=vectors)
+    assert store.active_storage == "pq"
+    store.delete(list(range(0, 1200, 2)))
+    
+    # Silinen satırlar IndexPQ'da fazladan aday alınarak elenir; tüm canlı satırlar diskten okunmaz
+    monkeypatch.setattr(store, "_search_subset", lambda *args: pytest.fail("kaba kuvvet arama"))
+    for rerank_factor in (0, 4):
+        store.rerank_factor = rerank_factor
+        for results in store.similarity_search_batch(["sorgu"] * 4, k=5, query_vectors=vectors[:4]):
+            assert len(results) == 5
+            assert all(int(text.split()[1]) % 2 == 1 for text, _ in results)
+    store.store.wait_for_compaction()
+
+def test_vector_store_hnsw_mode_persistence(vector_store):
+    store = VectorStore(
+        embedding_model=vector_store.embedding_model,
+        index_path=vector_store.index_path,
+        index_mode="hnsw",
+        background_rebuild=False
+    )
+    store.add_texts(["Python programlama dili", "Veri bilimi ve analizi"])
+    assert store.active_mode == "hnsw"
+    
+    # Eğitilmiş index diskten okunmalı, yeniden kurulmamalı
+    new_store = VectorStore(
+        embedding_model=vector_store.embedding_model,
+        index_path=vector_store.index_path,
+        index_mode="hnsw"
+    )
+    assert new_store.active_mode == "hnsw"
+    assert new_store.index.ntotal == 2
+    assert new_store.similarity_search("Python programlama dili", k=1)[0][0] == "Python programlama dili"
+
+def test_text_store_mmap_rows(temp_dir):
+    store = TextStore(os.path.join(temp_dir, "texts"))
+    rows, nbytes = store.write(["Net kâr arttı", "", "Özkaynaklar"])
+    
+    # Yayınlanmadan önce satırlar görünmemeli
+    assert len(store) == 0
+    
+    store.publish(rows, nbytes)
+    assert len(store) == 3
+    assert store[0] == "Net kâr arttı"
+    assert store[1] == ""
+    assert store[-1] == "Özkaynaklar"
+    assert store[1:] == ["", "Özkaynaklar"]
+
+def test_vector_store_similarity_search_batch(vector_store):
+    texts = [
+        "Python programlama dili çok popüler",
+        "Yapay zeka ve makine öğrenmesi geleceğin teknolojisi",
+        "Veri bilimi ve analizi önemli bir alan"
+    ]
+    vector_store.add_texts(texts)
+    
+    queries = ["programlama dilleri", "makine öğrenmesi"]
+    batch_results = vector_store.similarity_search_batch(queries, k=2)
+    
+    # Toplu sonuçlar tekil aramalarla aynı olmalı
+    assert len(batch_results) == len(queries)
+    for query, results in zip(queries, batch_results):
+        assert results == vector_store.similarity_search(query, k=2)
+    assert vector_store.similarity_search_batch([], k=2) == []
+
+def test_vector_store_compressed_storage_rerank(vector_store):
+    store = VectorStore(
+        embedding_model=vector_store.embedding_model,
+        index_path=vector_store.index_path,
+        index_mode="flat",
+        storage="fp16",
+        rerank_factor=2,
+        background_rebuild=False
+    )
+    texts = [
+        "Python programlama dili çok popüler",
+        "Yapay zeka ve makine öğrenmesi geleceğin teknolojisi",
+        "Veri bilimi ve analizi önemli bir alan"
+    ]
+    store.add_texts(texts)
+    assert store.active_storage == "fp16"
+    
+    results = store.similarity_search(texts[1], k=2)
+    assert results[0][0] == texts[1]
+    assert results[0][1] <= results[1][1]
+    assert store.evaluate_recall(texts, k=2) == 1.0
+
+def test_metadata_store_filters():
+    metadata = MetadataStore()
+    metadata.extend([{"doc_id": "a", "page": 1}, {"doc_id": "b", "page": 2}], 2)
+    metadata.extend(None, 1)
+    metadata.extend([{"doc_id": "a", "page": 5, "session_id": "s1"}], 1)
+    
+    assert metadata.mask({"doc_id": "a"}).tolist() == [True, False, False, True]
+    assert metadata.mask({"page": {"$gte": 2}}).tolist() == [False, True, False, True]
+    assert metadata.mask({"doc_id": {"$in": ["a", "b"]}, "page": {"$lt": 5}}).tolist() == [True, True, False, False]
+    assert metadata.mask({"session_id": "s1"}, rows=5).tolist() == [False, False, False, True, False]
+    assert metadata.get(3) == {"doc_id": "a", "page": 5, "session_id": "s1"}
+    
+    with pytest.raises(ValueError):
+        metadata.mask({"doc_id": {"$gt": "a"}})
+
+def test_mixed_type_metadata_keeps_store_openable(embedding_model, temp_dir):
+    index_path = os.path.join(temp_dir, "mixed")
+    store = VectorStore(embedding_model=embedding_model, index_path=index_path)
+    store.add_texts(["Birinci sayfa"], [{"page": 1}])
+    
+    # Sayısal alana metin veren parti diske hiçbir şey yazılmadan reddedilir
+    with pytest.raises(ValueError):
+        store.add_texts(["Önsöz sayfası"], [{"page": "iii"}])
+    assert len(store.store) == len(store.ids) == store.snapshot.rows == 1
+    
+    # Eski sürümlerin yazdığı karışık türlü segment de açılışı bozmaz; alan metne düşer
+    store.store.append(store._embed(["Önsöz sayfası"]), ["Önsöz sayfası"], {"page": ["iii"]})
+    store.wait_for_rebuild()
+    store.store.wait_for_compaction()
+    
+    reopened = VectorStore(embedding_model=embedding_model, index_path=index_path)
+    assert reopened.snapshot.rows == 2
+    assert reopened.metadata.get(0) == {"page": "1"} and reopened.metadata.get(1) == {"page": "iii"}
+    assert reopened.metadata.mask({"page": 1}).tolist() == [True, False]
+    reopened.add_texts(["Üçüncü sayfa"], [{"page": "3"}])
+    reopened.wait_for_rebuild()
+    reopened.store.wait_for_compaction()
+
+def test_vector_store_filtered_search(vector_store):
+    vector_store.add_texts(
+        ["Python programlama dili", "Python ile veri analizi"],
+        metadatas=[{"doc_id": "rapor-1"}, {"doc_id": "rapor-2"}]
+    )
+    vector_store.add_texts(["Python yorumlanan bir dildir"])
+    
+    results = vector_store.similarity_search("Python", k=3, filter={"doc_id": "rapor-2"})
+    assert [text for text, _ in results] == ["Python ile veri analizi"]
+    
+    # Metadata diskten geri yüklenmeli
+    new_store = VectorStore(
+        embedding_model=vector_store.embedding_model,
+        index_path=vector_store.index_path
+    )
+    assert new_store.similarity_search("Python", k=3, filter={"doc_id": "rapor-1"}) == \
+        vector_store.similarity_search("Python", k=3, filter={"doc_id": "rapor-1"})
+    assert new_store.similarity_search("Python", k=3, filter={"doc_id": "yok"}) == []
+
+def test_vector_store_delete_and_upsert(vector_store):
+    # Otomatik temizliği kapat, silinmiş satırlar maskelenerek kalsın
+    vector_store.tombstone_threshold = 0
+    ids = vector_store.add_texts(["Python programlama dili", "Java programlama dili", "Bugün hava güneşli"])
+    assert ids == [0, 1, 2]
+    with pytest.raises(ValueError):
+        vector_store.add_texts(["Tekrar"], ids=[1])
+    
+    assert vector_store.delete([1, 1, 99]) == 1
+    texts = [text for text, _ in vector_store.similarity_search("Java", k=3)]
+    assert "Java programlama dili" not in texts
+    
+    vector_store.upsert([0], ["Python ile veri analizi"], [{"doc_id": "rapor-1"}])
+    results = vector_store.similarity_search("Python", k=3)
+    assert [text for text, _ in results].count("Python ile veri analizi") == 1
+    assert "Python programlama dili" not in [text for text, _ in results]
+    
+    # Mezar taşları diskten geri yüklenmeli
+    new_store = VectorStore(
+        embedding_model=vector_store.embedding_model,
+        index_path=vector_store.index_path,
+        tombstone_threshold=0
+    )
+    assert new_store.similarity_search("Python", k=3) == results
+    
+    # Temizlik satırları kaldırır, parça kimlikleri korunur
+    assert new_store.purge_deleted() == 2
+    assert list(new_store.texts) == ["Bugün hava güneşli", "Python ile veri analizi"]
+    assert new_store.ids.row(0) == 1
+    assert new_store.metadata.get(1) == {"doc_id": "rapor-1"}
+    assert new_store.similarity_search("Python", k=3) == results
+
+def test_sharded_vector_store_matches_single_store(vector_store, temp_dir):
+    texts = ["Python programlama dili", "Java programlama dili", "Bugün hava güneşli", "Python ile veri analizi"]
+    metadatas = [{"doc_id": "a"}, {"doc_id": "b"}, {"doc_id": "a"}, {"doc_id": "c"}]
+    vector_store.add_texts(texts, metadatas)
+    
+    sharded = ShardedVectorStore(
+        embedding_model=vector_store.embedding_model,
+        index_path=os.path.join(temp_dir, "sharded"),
+        num_shards=3,
+        shard_by="doc",
+        tombstone_threshold=0,
+        lexical_index=True
+    )
+    assert sharded.add_texts(texts, metadatas) == [0, 1, 2, 3]
+    
+    # Aynı belgenin parçaları aynı parçaya düşer
+    shard_a = [shard for shard in sharded.shards if "Python programlama dili" in list(shard.texts)]
+    assert "Bugün hava güneşli" in list(shard_a[0].texts)
+    assert sharded.similarity_search("Python", k=3) == vector_store.similarity_search("Python", k=3)
+    assert sharded.similarity_search("Python", k=3, filter={"doc_id": "a"}) == \
+        vector_store.similarity_search("Python", k=3, filter={"doc_id": "a"})
+    
+    # Hibrit arama ve MMR için gereken arayüz tek depoyla aynı sonuçları verir
+    assert sharded.lexical_enabled
+    # BM25 puanları parça içi IDF ile hesaplanır; sıralama aynıdır
+    assert [text for text, _ in sharded.lexical_search("python", k=2)] == \
+        [text for text, _ in vector_store.lexical_search("python", k=2)]
+    query_vectors = sharded.embed_queries(["Python"])
+    with_vectors = sharded.similarity_search_batch(["Python"], k=2, query_vectors=query_vectors, return_vectors=True)[0]
+    assert [result[:2] for result in with_vectors] == vector_store.similarity_search("Python", k=2)
+    assert all(result[2].shape == (query_vectors.shape[1],) for result in with_vectors)
+    
+    sharded.delete([0])
+    assert "Python programlama dili" not in [text for text, _ in sharded.similarity_search("Python", k=4)]
+    sharded.close()
+
+def test_vector_store_snapshot_isolation(vector_store):
+    vector_store.delta_limit = 2
+    vector_store.tombstone_threshold = 0
+    vector_store.add_texts(["Python programlama dili", "Java programlama dili"])
+    snapshot = vector_store.snapshot
+    
+    vector_store.add_texts(["Python ile veri analizi"])
+    vector_store.delete([1])
+    
+    # Eski sürüm değişmez; yeni sürüm eklemeleri ve silmeleri görür
+    assert snapshot.rows == 2 and len(snapshot.texts) == 2
+    assert snapshot.deleted is None
+    assert vector_store.snapshot.rows == 3
+    assert vector_store.snapshot.version > snapshot.version
+    
+    errors = []
+    def search():
+        try:
+            for _ in range(20):
+                for text, _ in vector_store.similarity_search("Python", k=3):
+                    assert text != "Java programlama dili"
+        except Exception as e:
+            errors.append(e)
+    
+    threads = [threading.Thread(target=search) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for i in range(10):
+        vector_store.add_texts([f"Python notu {i}"])
+    for thread in threads:
+        thread.join()
+    
+    assert not errors
+    assert vector_store.snapshot.rows == 13
+
+def test_snapshot_ignores_rows_appended_in_place(vector_store):
+    vector_store.add_texts(
+        ["Python programlama dili", "Java programlama dili"],
+        [{"doc_id": "a"}, {"doc_id": "a"}]
+    )
+    snapshot = vector_store.snapshot
+    rows = snapshot.rows
+    expected = snapshot.lexical.search("programlama", 10, rows=rows)
+    
+    errors = []
+    stop = threading.Event()
+    def search():
+        # Paylaşılan metadata ve BM25 index'i büyürken eski sürümün sonuçları değişmez
+        try:
+            while not stop.is_set():
+                mask = snapshot.metadata.mask({"doc_id": "a"}, rows=rows)
+                found, scores = snapshot.lexical.search("programlama", 10, rows=rows, mask=mask)
+                assert len(mask) == rows and (found < rows).all()
+                assert found.tolist() == expected[0].tolist()
+                assert np.allclose(scores, expected[1])
+        except Exception as e:
+            errors.append(e)
+    
+    threads = [threading.Thread(target=search) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    try:
+        for i in range(20):
+            vector_store.add_texts([f"Go programlama dili {i}"], [{"doc_id": "a", "page": i}])
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+    
+    assert not errors
+    assert len(vector_store.lexical_search("programlama", k=30, filter={"doc_id": "a"})) == 22
+
+def test_vector_store_dimension_reduction(embedding_model):
+    index_path = "test_data/reduced_index"
+    texts = [f"{word} raporu {i}" for i, word in enumerate(
+        ["gelir", "gider", "borç", "nakit", "kâr", "zarar", "satış", "marj"] * 4
+    )]
+    dim = 16
+    # PCA depoya verilmeden önce örnek üzerinde eğitilmelidir
+    with pytest.raises(ValueError):
+        VectorStore(embedding_model=embedding_model, index_path=index_path, reducer=DimensionReducer(dim))
+    reducer = DimensionReducer(dim).fit(embedding_model.encode(texts))
+    store = VectorStore(
+        embedding_model=embedding_model,
+        index_path=index_path,
+        reducer=reducer
+    )
+    try:
+        # Eğitim örneğinden küçük partiler de indirgenir
+        store.add_texts(texts[:4])
+        store.add_texts(texts[4:])
+        assert store.dimension == dim and store.index.d == dim
+        assert store.similarity_search("nakit raporu 3", k=1)[0][0] == "nakit raporu 3"
+        
+        # İzdüşüm index ile kaydedilir ve yeniden açılışta sorgulara uygulanır
+        reopened = VectorStore(embedding_model=embedding_model, index_path=index_path)
+        assert reopened.reducer.method == "pca" and reopened.dimension == dim
+        assert reopened.similarity_search("nakit raporu 3", k=1)[0][0] == "nakit raporu 3"
+        reopened.store.wait_for_compaction()
+        
+        # Rapor, varyans payı bilinmeyen yüklü izdüşümü yeniden eğitmez
+        reopened.reducer.explained_variance = None
+        components = reopened.reducer.components.copy()
+        report = reduction_report(embedding_model, reopened.reducer, texts, texts[:4], k=3)
+        assert np.array_equal(reopened.reducer.components, components)
+        assert reopened.reducer.explained_variance is None
+        assert 0.0 < report["explained_variance"] <= 1.0
+        
+        # Kayıtlı izdüşümle veya kayıtlı vektörlerle çelişen boyut reddedilir
+        with pytest.raises(ValueError):
+            VectorStore(embedding_model=embedding_model, index_path=index_path, reducer=DimensionReducer(8, "truncate"))
+        DimensionReducer(8, "truncate").save(store.reducer_path)
+        with pytest.raises(ValueError):
+            VectorStore(embedding_model=embedding_model, index_path=index_path)
+        
+        # Parçalı depoda tüm parçalar ve sorgular aynı izdüşümü kullanır
+        sharded = ShardedVectorStore(embedding_model, index_path="test_data/reduced_shards", num_shards=2, reducer=reducer)
+        sharded.add_texts(texts)
+        sharded.wait_for_rebuild()
+        sharded.close()
+        sharded = ShardedVectorStore(embedding_model, index_path="test_data/reduced_shards")
+        assert all(shard.dimension == dim for shard in sharded.shards)
+        assert sharded.embed_queries(["nakit"]).shape == (1, dim)
+        assert sharded.similarity_search("nakit raporu 3", k=1)[0][0] == "nakit raporu 3"
+        sharded.close()
+        
+        report = reduction_report(embedding_model, DimensionReducer(dim, "truncate"), texts, texts[:4], k=3)
+        assert 0.0 <= report["recall_at_k"] <= 1.0
+        assert report["memory_ratio"] == dim / embedding_model.get_dimension()
+    finally:
+        store.wait_for_rebuild()
+        store.store.wait_for_compaction()
+        shutil.rmtree("test_data", ignore_errors=True)
+
+@pytest.fixture
+def vector_service():
+    """Pinecone veri düzlemini taklit eden yerel, bellek içi HTTP sunucusu."""
+    state = {"namespaces": {}, "batches": [], "active": 0, "max_active": 0, "failed": False}
+    lock = threading.Lock()
+    
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            namespace = state["namespaces"].setdefault(body.get("namespace", ""), {})
+            status, response = 200, {}
+            if self.path == "/vectors/upsert":
+                with lock:
+                    # İlk istek geçici hata ile reddedilir
+                    fail = not state["failed"]
+                    state["failed"] = True
+                    state["active"] += 1
+                    state["max_active"] = max(state["max_active"], state["active"])
+                time.sleep(0.05)
+                vectors = body["vectors"]
+                with lock:
+                    state["active"] -= 1
+                    if fail:
+                        status, response = 503, {"message": "meşgul"}
+                    else:
+                        state["batches"].append((len(vectors), len(json.dumps(body)), body.get("namespace")))
+                        for vector in vectors:
+                            namespace[vector["id"]] = vector
+                        response = {"upsertedCount": len(vectors)}
+            elif self.path == "/query":
+                query = np.asarray(body["vector"])
+                scored = sorted(
+                    namespace.values(),
+                    key=lambda vector: -float(np.dot(query, vector["values"]))
+                )[:body["topK"]]
+                response = {
+                    "namespace": body.get("namespace", ""),
+                    "matches": [
+                        {
+                            "id": vector["id"],
+                            "score": float(np.dot(query, vector["values"])),
+                            "metadata": vector.get("metadata", {})
+                        }
+                        for vector in scored
+                    ]
+                }
+            elif self.path == "/vectors/fetch_by_metadata":
+                wanted = body["filter"]["session_id"]["$eq"]
+                matches = [
+                    vector for vector in namespace.values()
+                    if vector.get("metadata", {}).get("session_id") == wanted
+                ][:body.get("limit", 100)]
+                response = {
+                    "namespace": body.get("namespace", ""),
+                    "vectors": {vector["id"]: vector for vector in matches},
+                    "usage": {"readUnits": 1}
+                }
+            elif self.path == "/vectors/delete":
+                with lock:
+                    if body.get("deleteAll"):
+                        state["namespaces"].pop(body.get("namespace", ""), None)
+                    for vector_id in body.get("ids") or []:
+                        namespace.pop(vector_id, None)
+            payload = json.dumps(response).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        
+        def log_message(self, *args):
+            pass
+    
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}", state
+    server.shutdown()
+
+def pinecone_store(embedding_model, host, session_id, **kwargs):
+    return PineconeVectorStore(
+        session_id=session_id,
+        embedding_model=embedding_model,
+        host=host,
+        api_key="yerel",
+        **kwargs
+    )
+
+def test_pinecone_batched_parallel_upsert(embedding_model, vector_service):
+    host, state = vector_service
+    store = pinecone_store(
+        embedding_model, host, "oturum",
+        batch_size=8,
+        max_batch_bytes=4000,
+        max_workers=3,
+        backoff=0.01
+    )
+    texts = [f"Bölüm {i}: gelir ve gider tablosu" for i in range(40)]
+    metadatas = [{"doc_id": "rapor", "chunk": i} for i in range(40)]
+    updates = []
+    
+    written = store.add_texts(texts, metadatas=metadatas, progress=lambda done, total: updates.append((done, total)))
+    assert written == 40
+    
+    # Partiler sayı ve boyut sınırına uyar, istekler paralel gider, geçici hata yeniden denenir
+    assert sorted(state["namespaces"]["oturum"]) == sorted(f"rapor_{i}" for i in range(40))
+    assert all(count <= 8 and size <= 4000 + 200 for count, size, _ in state["batches"])
+    assert state["max_active"] > 1
+    assert updates[-1] == (40, 40)
+    assert [done for done, _ in updates] == sorted(done for done, _ in updates)
+
+def test_pinecone_migrates_legacy_vectors(embedding_model, vector_service):
+    host, state = vector_service
+    # Eski düzen: tüm oturumlar varsayılan namespace'te, session_id metadata'sıyla
+    vectors = embedding_model.encode(["Nakit akışı güçlü", "Borç oranı düştü", "Satışlar arttı"]).tolist()
+    state["namespaces"][""] = {
+        f"{session_id}_{i}": {"id": f"{session_id}_{i}", "values": vector, "metadata": {"session_id": session_id}}
+        for i, (session_id, vector) in enumerate(zip(["oturum", "oturum", "baska"], vectors))
+    }
+    
+    store = pinecone_store(embedding_model, host, "oturum", backoff=0.01)
+    assert store.query("Nakit", top_k=5) == []
+    assert store.migrate_legacy_vectors(page_size=1) == 2
+    assert store.version == 1
+    assert {hit["id"] for hit in store.query("Nakit", top_k=5)} == {"oturum_0", "oturum_1"}
+    # Başka oturumların eski vektörleri yerinde kalır; tekrar çalıştırmak zararsızdır
+    assert list(state["namespaces"][""]) == ["baska_2"]
+    assert store.migrate_legacy_vectors() == 0
+
+def test_pinecone_retries_only_transient_errors(embedding_model, vector_service):
+    host, _ = vector_service
+    store = pinecone_store(embedding_model, host, "oturum", max_retries=3, backoff=0.01)
+    
+    class FlakyIndex:
+        def __init__(self, errors):
+            self.errors = errors
+            self.calls = 0
+        
+        def upsert(self, vectors, namespace):
+            self.calls += 1
+            if self.errors:
+                raise self.errors.pop(0)
+            return {"upsertedCount": len(vectors)}
+    
+    # Bağlantı ve zaman aşımı hataları yeniden denenir
+    store.index = FlakyIndex([ConnectionError("bağlantı koptu"), TimeoutError("zaman aşımı")])
+    assert store.add_texts(["Nakit akışı güçlü"]) == 1
+    assert store.index.calls == 3
+    
+    # Durum kodu olmayan diğer hatalar ilk denemede yükselir
+    store.index = FlakyIndex([TypeError("geçersiz vektör"), None])
+    with pytest.raises(TypeError):
+        store.add_texts(["Nakit akışı güçlü"])
+    assert store.index.calls == 1
+    
+    # Pinecone istemcisinin kendi hataları da (durum kodu yok) hatalı isteği gösterir
+    store.index = FlakyIndex([PineconeApiValueError("geçersiz boyut"), None])
+    with pytest.raises(PineconeApiValueError):
+        store.add_texts(["Nakit akışı güçlü"])
+    assert store.index.calls == 1
+
+def test_pinecone_session_namespaces(embedding_model, vector_service):
+    host, state = vector_service
+    first = pinecone_store(embedding_model, host, "oturum-1", backoff=0.01)
+    second = pinecone_store(embedding_model, host, "oturum-2", backoff=0.01)
+    first.add_texts(["Nakit akışı güçlü", "Borç oranı düştü"])
+    second.add_texts(["Nakit akışı zayıf"])
+    
+    # Sorgular ve silmeler yalnızca oturumun namespace'inde çalışır
+    assert {hit["id"] for hit in first.query("Nakit", top_k=5)} == set(state["namespaces"]["oturum-1"])
+    assert len(second.query("Nakit", top_k=5)) == 1
+    
+    second.delete(list(state["namespaces"]["oturum-1"]))
+    assert len(state["namespaces"]["oturum-1"]) == 2
+    
+    first.drop_session()
+    assert "oturum-1" not in state["namespaces"]
+    assert len(second.query("Nakit", top_k=5)) == 1
+    
+    # Her upsert ve silme, retriever önbelleği için sürümü artırır
+    assert (first.version, second.version) == (2, 2)